@@ -0,0 +1,141 @@
+import os
+from typing import Dict, List, Optional
+
+import pyrtl
+from pyrtl import Input, Output, Const, MemBlock, Register
+
+from tracing import WindowTrace
+
+# the simulation backends we can run the design on, from slowest to fastest:
+#  * sim:      pyrtl.Simulation, interpreted one net at a time. best for debugging
+#  * fast:     pyrtl.FastSimulation, the block is turned into python code
+#  * compiled: pyrtl.CompiledSimulation, the block is turned into C. needs gcc and can only trace
+#              inputs and outputs, so we add outputs for anything else the tracer asks for
+BACKENDS = {
+    "sim": pyrtl.Simulation,
+    "fast": pyrtl.FastSimulation,
+    "compiled": pyrtl.CompiledSimulation,
+}
+
+# picked up by everything that builds a simulation, including the tests
+# the test runner and the command line tools can also change it with set_backend
+_backend = os.environ.get("SIM_BACKEND", "sim")
+
+def set_backend(name: str):
+    global _backend
+    assert name in BACKENDS, f"unknown backend {name}, expected one of {list(BACKENDS)}"
+    _backend = name
+
+def get_backend() -> str:
+    return _backend
+
+# CompiledSimulation can only see a wire if it drives an output directly
+def _probe_traced_wires(tracer: pyrtl.SimulationTrace, block: pyrtl.Block):
+    probed = {
+        net.args[0].name for net in block.logic
+        if net.op == "w" and isinstance(net.dests[0], Output)
+    }
+    for wire in list(tracer.wires_to_track):
+        if isinstance(wire, (Input, Output, Const)) or wire.name in probed:
+            continue
+        probe = Output(bitwidth=wire.bitwidth, name=f"probe_{wire.name}")
+        probe <<= wire
+
+# CompiledSimulation keeps its registers in C where nothing can read them, so this adds an output for the value each
+# one takes next. after a step, probe_next_<register> is what the register holds now
+# returns the outputs it added, for _remove_probes
+def _probe_registers(block: pyrtl.Block) -> List[Output]:
+    probes = []
+    for net in list(block.logic):
+        if net.op == "r":
+            probe = Output(bitwidth=net.dests[0].bitwidth, name=f"probe_next_{net.dests[0].name}")
+            probe <<= net.args[0]
+            probes.append(probe)
+    return probes
+
+# takes probes back out of the block. a CompiledSimulation doesn't look at its block again once it's been built,
+# so they keep working in the simulation they were added for, and nothing built from the block later pays for them
+def _remove_probes(block: pyrtl.Block, probes: List[Output]):
+    names = {probe.name for probe in probes}
+    for net in [net for net in block.logic if net.op == "w" and net.dests[0].name in names]:
+        block.logic.remove(net)
+    for probe in probes:
+        block.remove_wirevector(probe)
+
+# CompiledSimulation builds concats 64 bit limb by limb and loses track of the most significant piece if it
+# runs over into another limb (the next limb starts that piece over from its first bit), which breaks things
+# like packing wide clauses. splitting that piece at the limb boundary gives the same wire without the problem
+def _split_straddling_concats(block: pyrtl.Block):
+    for net in list(block.logic):
+        if net.op != "c":
+            continue
+        top = net.args[0]
+        start = net.dests[0].bitwidth - top.bitwidth
+        cut = -start % 64
+        if cut == 0 or cut >= top.bitwidth:
+            continue
+        split = pyrtl.LogicNet("c", None, (top[cut:], top[:cut]) + tuple(net.args[1:]), net.dests)
+        block.logic.remove(net)
+        block.add_net(split)
+
+# drop in replacement for pyrtl.Simulation(...) that builds whichever backend is selected
+# the memory_value_map is handed over as-is, every backend takes the same {MemBlock: {addr: value}} format
+# (None for either map is a fresh empty one, the simulators hang on to what they're given)
+# registers makes sure every register can be read back (see register_values), which only costs anything on compiled
+def simulation(
+    tracer=True,
+    register_value_map: Optional[Dict[Register, int]] = None,
+    memory_value_map: Optional[Dict[MemBlock, Dict[int, int]]] = None,
+    block: pyrtl.Block = None,
+    backend: str = None,
+    registers: bool = False
+):
+    backend = backend or _backend
+    register_value_map = {} if register_value_map is None else register_value_map
+    memory_value_map = {} if memory_value_map is None else memory_value_map
+    assert backend in BACKENDS, f"unknown backend {backend}, expected one of {list(BACKENDS)}"
+
+    block = pyrtl.working_block(block)
+
+    register_probes = []
+    if backend == "compiled":
+        if registers:
+            assert tracer is None, "reading registers back on compiled needs the default tracer"
+            with pyrtl.set_working_block(block, no_sanity_check=True):
+                register_probes = _probe_registers(block)
+        # compiled needs a tracer to read anything back at all, so "no tracer" means just the outputs' latest values
+        if tracer is None:
+            tracer = WindowTrace(list(block.wirevector_subset(Output)), window=1, block=block)
+        elif tracer is True:
+            tracer = pyrtl.SimulationTrace(block=block)
+        with pyrtl.set_working_block(block, no_sanity_check=True):
+            _probe_traced_wires(tracer, block)
+            _split_straddling_concats(block)
+
+    sim = BACKENDS[backend](
+        tracer=tracer,
+        register_value_map=register_value_map,
+        memory_value_map=memory_value_map,
+        block=block
+    )
+    # the block is usually a design runner.get_design hands out to everyone, only this simulation wanted them
+    _remove_probes(block, register_probes)
+    return sim
+
+# what every register holds now, by name, on any backend (compiled needs to have been built with registers=True)
+def register_values(sim) -> Dict[str, int]:
+    registers = sim.block.wirevector_subset(Register)
+    if isinstance(sim, pyrtl.Simulation):
+        return {reg.name: sim.regvalue[reg] for reg in registers}
+    if isinstance(sim, pyrtl.FastSimulation):
+        return {reg.name: sim.regs[reg.name] for reg in registers}
+    # before the first step they're still where they started
+    initial = sim.tracer.register_value_map
+    values = {}
+    for reg in registers:
+        probe = sim.tracer.trace[f"probe_next_{reg.name}"]
+        if len(probe):
+            values[reg.name] = probe[-1]
+        else:
+            values[reg.name] = initial.get(reg, reg.reset_value or 0)
+    return values
@@ -1,5 +1,6 @@
 import pyrtl
 from pyrtl import WireVector, Register
+import helpers
 from helpers import wirevector_list, connect_wire_lists
 
 from clause_resolver import ClauseResolver
@@ -18,74 +19,156 @@ from clause_storage import ClauseStorage
 # - va_write_addr_o:   address of a variable to write
 # - va_write_val_o:    val of a variable to write
 # - va_write_enable_o: enable bit for writing a variable
+# - reason_o:          address of the clause behind this cycle's write or contradiction (one lane only)
+# - conflict_vars_o:   variables of the clause that fell over, along with status_o (the lowest lane's with lanes > 1)
+#
+# with lanes > 1 we look at that many clauses per cycle, one ClauseResolver each
+# var_vals_i, var_assigned_i and va_addrs_o then hold clause_size wires per lane, lane 0 first
+# arbitration between the lanes:
+# - a contradiction in any lane wins over everything else
+# - otherwise the lowest lane with an implication gets to write
+# - if more than one lane implies, we stay on the same row next cycle so the rest get another look
+#   (each of those cycles assigns a new variable, so this always moves on eventually)
+#
+# wrap_around changes when a pass ends. normally an implication means we finish the pass and then go again
+# from clause 0. with wrap_around we keep going round instead and stop once we get back to where the last
+# implication was without having made another one. with one lane that's the row just before it (the clause
+# that implied is satisfied now), with more lanes it's that row itself since the other lanes in it need
+# another look with the new value, unless we're stalling on it and giving them that look straight away
+#
+# learned gives ClauseStorage the extra read port and the write port that cdcl's ConflictAnalyzer uses,
+# along with another input:
+# - last_addr_i: last row holding a clause, the sweep goes round from there instead of the end of the memory
+
+# picks a if it's valid (top bit set), otherwise b
+# fed through a bin tree this gives the lowest valid lane
+def first_valid(a, b):
+    return pyrtl.select(a[-1], a, b)
 
 class BCP:
-    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = "bcp_"):
+    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = "bcp_", lanes: int = 1,
+                 wrap_around: bool = False, learned: bool = False):
+        assert lanes == 1 or not learned, "learned clauses need reason_o, which only means something with one lane"
         ## inputs ##
         self.start_i =        WireVector(bitwidth = 1, name = name_prefix+"start_i")
-        self.var_vals_i =     wirevector_list(1, name_prefix+"var_vals_i", clause_size)
-        self.var_assigned_i = wirevector_list(1, name_prefix+"var_assigned_i", clause_size)
+        self.var_vals_i =     wirevector_list(1, name_prefix+"var_vals_i", clause_size * lanes)
+        self.var_assigned_i = wirevector_list(1, name_prefix+"var_assigned_i", clause_size * lanes)
 
         ## outputs ##
         self.active_o =          WireVector(bitwidth = 1, name = name_prefix+"active_o")
         self.status_o =          WireVector(bitwidth = 1, name = name_prefix+"status_o")
-        self.va_addrs_o =        wirevector_list(var_bits, name_prefix+"va_addrs_o", clause_size)
+        self.va_addrs_o =        wirevector_list(var_bits, name_prefix+"va_addrs_o", clause_size * lanes)
         self.va_write_addr_o =   WireVector(bitwidth = var_bits, name = name_prefix+"va_write_addr_o")
         self.va_write_val_o =    WireVector(bitwidth = 1, name = name_prefix+"va_write_val_o")
         self.va_write_enable_o = WireVector(bitwidth = 1, name = name_prefix+"va_write_enable_o")
+        self.reason_o =          WireVector(bitwidth = clause_bits, name = name_prefix+"reason_o")
+        self.conflict_vars_o =   wirevector_list(var_bits, name_prefix+"conflict_vars_o", clause_size)
+
+        ## substructures ##
+        # lane 0 keeps the plain wire names so single lane traces look the same as ever
+        clause_resolvers = [
+            ClauseResolver(clause_bits, var_bits, clause_size, f"lane{lane}_" if lane > 0 else "")
+            for lane in range(lanes)
+        ]
+        self.clause_storage  = ClauseStorage(clause_bits, var_bits, clause_size, lanes, 2 if learned else 1, learned)
 
         ## internal registers ##
-        clause_addr = Register(bitwidth = clause_bits, name = "clause_addr") # current clause address
-        max_addr    = pyrtl.Const(-1, bitwidth = clause_bits)
+        row_bits = self.clause_storage.addr_width
+        clause_addr = Register(bitwidth = row_bits, name = "clause_addr") # current clause address (row, with lanes)
+        if learned:
+            self.last_addr_i = WireVector(bitwidth = row_bits, name = name_prefix+"last_addr_i")
+            max_addr = self.last_addr_i
+        else:
+            max_addr = pyrtl.Const(-1, bitwidth = row_bits)
+        advance = WireVector(bitwidth = 1, name = "advance") # move on to the next row
 
         active =      Register(bitwidth = 1, name = "active")
         update_made = Register(bitwidth = 1, name = "update_made") # has a variable been written this iteration
+        stop_addr =   Register(bitwidth = row_bits, name = "stop_addr") # last row to look at (wrap_around)
 
         ## internal wires ##
         iteration_finished = WireVector(bitwidth = 1, name = "iteration_finished")
         reset =              WireVector(bitwidth = 1, name = "reset") # reset to a new iteration
         writing =            WireVector(bitwidth = 1, name = "writing") # are we writing a variable this cycle
         contradiction =      WireVector(bitwidth = 1, name = "contradiction") # bcp found a contradiction
+        stall =              WireVector(bitwidth = 1, name = "stall") # more than one lane implied, look at this row again
 
-        ## substructures ##
-        clause_resolver = ClauseResolver(clause_bits, var_bits, clause_size)
-        self.clause_storage  = ClauseStorage(clause_bits, var_bits, clause_size)
+        lane_conflicts = wirevector_list(1, "lane_conflict", lanes)
+        lane_implies =   wirevector_list(1, "lane_implies", lanes)
+        # {implies, var, val} for each lane
+        lane_writes =    wirevector_list(var_bits + 2, "lane_write", lanes)
+        chosen_write =   WireVector(bitwidth = var_bits + 2, name = "chosen_write")
 
         ## logic ##
-        iteration_finished <<= (clause_addr == max_addr)
+        self.clause_storage.addr_i <<= clause_addr
+        self.reason_o <<= clause_addr if lanes == 1 else 0
+        for lane, clause_resolver in enumerate(clause_resolvers):
+            lane_wires = slice(lane * clause_size, (lane + 1) * clause_size)
+            connect_wire_lists(clause_resolver.cs_vars_i, self.clause_storage.vars_o[lane_wires])
+            connect_wire_lists(clause_resolver.cs_negated_i, self.clause_storage.negs_o[lane_wires])
+            connect_wire_lists(self.va_addrs_o[lane_wires], self.clause_storage.vars_o[lane_wires])
+            connect_wire_lists(clause_resolver.var_vals_i, self.var_vals_i[lane_wires])
+            connect_wire_lists(clause_resolver.var_assigned_i, self.var_assigned_i[lane_wires])
+
+            lane_conflicts[lane] <<= active & (clause_resolver.clause_status_o == 1)
+            lane_implies[lane] <<= active & (clause_resolver.clause_status_o == 3)
+            lane_writes[lane] <<= pyrtl.concat(lane_implies[lane], clause_resolver.implied_var_o, clause_resolver.implied_val_o)
+
+        contradiction <<= helpers.create_bin_tree(lane_conflicts, lambda a, b: a|b)
+        if lanes > 1:
+            # {conflict, vars} for each lane
+            conflict_clause = helpers.create_bin_tree([
+                pyrtl.concat_list(self.clause_storage.vars_o[lane * clause_size:(lane + 1) * clause_size] + [lane_conflicts[lane]])
+                for lane in range(lanes)
+            ], first_valid)
+            connect_wire_lists(self.conflict_vars_o, [
+                conflict_clause[i * var_bits:(i + 1) * var_bits] for i in range(clause_size)
+            ])
+        else:
+            connect_wire_lists(self.conflict_vars_o, self.clause_storage.vars_o)
+        chosen_write <<= helpers.create_bin_tree(lane_writes, first_valid)
+        writing <<= chosen_write[-1] & ~contradiction
+        if lanes > 1:
+            stall <<= (helpers.saturating_count(lane_implies) == 3) & ~contradiction
+        else:
+            stall <<= 0
+
+        if wrap_around:
+            iteration_finished <<= (clause_addr == stop_addr) & ~writing & ~stall
+            # the pass only ends once there's nothing left to do
+            go_again = pyrtl.Const(0, bitwidth = 1)
+        else:
+            iteration_finished <<= (clause_addr == max_addr) & ~stall
+            # essentially forward writing since update_made won't update fast enough
+            go_again = update_made | writing
         reset <<= iteration_finished | self.start_i | contradiction
+        advance <<= active & ~stall
+
+        with pyrtl.conditional_assignment:
+            with self.start_i:
+                stop_addr.next |= max_addr
+            with writing:
+                row_before = pyrtl.select(clause_addr == 0, max_addr, clause_addr - 1)
+                stop_addr.next |= pyrtl.select(stall, row_before, clause_addr) if lanes > 1 else row_before
 
         with pyrtl.conditional_assignment:
             with reset:
                 clause_addr.next |= 0
-                # essentially forward writing since update_made won't update fast enough
-                active.next      |= self.start_i | ((update_made | writing) & ~contradiction)
+                active.next      |= self.start_i | (go_again & ~contradiction)
                 update_made.next |= 0
+            with advance & (clause_addr == max_addr):
+                clause_addr.next |= 0
+                active.next      |= active
+                update_made.next |= update_made | writing
             with pyrtl.otherwise:
-                clause_addr.next |= clause_addr + active
+                clause_addr.next |= clause_addr + advance
                 active.next      |= active
                 update_made.next |= update_made | writing
 
-        self.clause_storage.addr_i <<= clause_addr
-        connect_wire_lists(clause_resolver.cs_vars_i, self.clause_storage.vars_o)
-        connect_wire_lists(clause_resolver.cs_negated_i, self.clause_storage.negs_o)
-        connect_wire_lists(self.va_addrs_o, self.clause_storage.vars_o)
-        connect_wire_lists(clause_resolver.var_vals_i, self.var_vals_i)
-        connect_wire_lists(clause_resolver.var_assigned_i, self.var_assigned_i)
-
         with pyrtl.conditional_assignment:
-            with ~active:
-                pass
-            with clause_resolver.clause_status_o == 0:
-                pass
-            with clause_resolver.clause_status_o == 1:
-                contradiction |= 1
-            with clause_resolver.clause_status_o == 2:
-                pass
-            with clause_resolver.clause_status_o == 3:
-                writing |= 1
-                self.va_write_addr_o   |= clause_resolver.implied_var_o
-                self.va_write_val_o    |= clause_resolver.implied_val_o
+            with writing:
+                self.va_write_addr_o   |= chosen_write[1:1+var_bits]
+                self.va_write_val_o    |= chosen_write[0]
                 self.va_write_enable_o |= 1
 
         # more forwarding type of thing so that we can don't need to stall status for a cycle
@@ -0,0 +1,610 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict, fields, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dimacs import CnfInstance, find_instances, parse_dimacs
+from dpll import DECISIONS, ENGINES, POLARITIES, STORES, UNDOS
+import backends
+import checkpoint
+import golden
+import runner
+import timing
+import tlm
+
+PERCENTILES = [50, 90, 99]
+
+# one row of the benchmark report
+@dataclass
+class BenchmarkRow:
+    path: str
+    suite: str
+    num_vars: int
+    num_clauses: int
+    # size of the design the instance ran on
+    clause_bits: int
+    var_bits: int
+    clause_size: int
+    lanes: int
+    engine: str
+    wrap_around: bool
+    cdcl: bool
+    decision: str
+    polarity: str
+    undo: str
+    store: str
+    expected: str
+    verdict: str
+    correct: Optional[bool]
+    cycles: int
+    decisions: int
+    conflicts: int
+    # cycles spent backtracking and backjumping
+    backtrack_cycles: int
+    sim_seconds: float
+    elab_seconds: float
+    # static timing of the design and cycles at that clock, 0 unless timing was asked for
+    max_freq_mhz: float
+    runtime_us: float
+
+# uf* / sat* files are satisfiable, uuf* / unsat* are not (SATLIB naming)
+def expected_verdict(path: Path) -> str:
+    name = path.name.lower()
+    if re.match(r"(uuf|unsat)", name):
+        return "UNSAT"
+    if re.match(r"(uf|sat)", name):
+        return "SAT"
+    return "UNKNOWN"
+
+def check_verdict(expected: str, verdict: str) -> Optional[bool]:
+    if expected == "UNKNOWN" or verdict not in ("SAT", "UNSAT"):
+        return None
+    return expected == verdict
+
+# the options that pick a variant of the design rather than its size, in build_dpll's order
+# BenchmarkOptions and BenchmarkRow both have a field for each, and everything that reports on variants goes by this
+VARIANT_FIELDS = ("lanes", "engine", "wrap_around", "cdcl", "decision", "polarity", "undo", "store")
+
+# how each instance should be run, this gets shipped to the worker processes
+# any of the design parameters left as None is sized to fit each instance
+@dataclass
+class BenchmarkOptions:
+    clause_bits: Optional[int] = None
+    var_bits: Optional[int] = None
+    clause_size: Optional[int] = None
+    # clauses BCP looks at per cycle
+    lanes: int = 1
+    # propagation engine, one of dpll.ENGINES
+    engine: str = "scan"
+    # scan only: keep going round instead of starting every pass from clause 0
+    wrap_around: bool = False
+    # learn clauses and backjump instead of backtracking chronologically
+    cdcl: bool = False
+    # decision heuristic, one of dpll.DECISIONS
+    decision: str = "static"
+    # value decisions try first, one of dpll.POLARITIES
+    polarity: str = "zero"
+    # how backtracking finds what to undo, one of dpll.UNDOS
+    undo: str = "scan"
+    # where the variable words live, one of dpll.STORES
+    store: str = "memory"
+    max_cycles: int = runner.MAX_CYCLES
+    backend: str = "sim"
+    # if set, also run every instance on this backend and check they agree cycle for cycle
+    cross_check: Optional[str] = None
+    # also run static timing on every design, to turn cycles into an estimated runtime
+    timing: bool = False
+    # also solve every instance with golden.py and check the run against it
+    golden: bool = False
+    # predict cycles with tlm.py instead of simulating the design
+    tlm: bool = False
+    # wall clock budget for each instance, on top of max_cycles
+    max_seconds: Optional[float] = None
+    # if set, keep a checkpoint of every instance here and carry on from it if it's already there
+    checkpoint_dir: Optional[str] = None
+    # cycles between checkpoints
+    checkpoint_every: int = checkpoint.EVERY
+
+    # the design parameters to use for this instance
+    # the clause memory needs at least two rows of lanes, so a fitted clause_bits can come out bigger than the instance needs
+    def design_size(self, instance: CnfInstance) -> Tuple[int, int, int]:
+        clause_bits, var_bits, clause_size = instance.design_size()
+        clause_bits = max(clause_bits, self.lanes.bit_length())
+        fixed = (self.clause_bits, self.var_bits, self.clause_size)
+        return tuple(
+            smallest if given is None else given
+            for given, smallest in zip(fixed, (clause_bits, var_bits, clause_size))
+        )
+
+    # everything else build_dpll takes, in its order
+    def design_variant(self) -> tuple:
+        return tuple(getattr(self, name) for name in VARIANT_FIELDS)
+
+# returns the row and anything worth telling whoever's reading the log about it. it can run in a worker process,
+# so it doesn't print anything itself
+def benchmark_instance(path: Path, options: BenchmarkOptions) -> Tuple[BenchmarkRow, List[str]]:
+    messages = []
+    instance = parse_dimacs(path)
+    size = options.design_size(instance)
+    expected = expected_verdict(path)
+    verdict, result = "TOO_LARGE", runner.RunResult(False, False, 0, 0.0)
+    if options.tlm:
+        # nothing to build
+        design, elab_seconds = None, 0.0
+        fits = instance.fits(*size)
+    else:
+        design, elab_seconds = runner.get_design(*size, *options.design_variant())
+        fits = runner.fits(design, instance)
+    if not fits:
+        pass
+    elif options.tlm:
+        result = tlm.predict(instance, *size, *options.design_variant(), max_cycles=options.max_cycles)
+        verdict = result.verdict
+    elif options.cross_check is not None:
+        try:
+            result = runner.cross_check(design, instance, options.backend, options.cross_check, options.max_cycles)
+            verdict = result.verdict
+        except runner.BackendMismatch as e:
+            messages.append(str(e))
+            verdict = "MISMATCH"
+    elif options.checkpoint_dir is not None:
+        name = "-".join(str(value) for value in size + options.design_variant())
+        result = checkpoint.run_instance(
+            design, instance, Path(options.checkpoint_dir) / f"{path.name}.{name}.json", options.checkpoint_every,
+            options.max_cycles, options.backend, options.max_seconds
+        )
+        verdict = result.verdict
+    else:
+        result = runner.run_instance(design, instance, options.max_cycles, options.backend, options.max_seconds)
+        verdict = result.verdict
+    # every SAT the design reports comes with the model it found, checked against the clauses (the tlm has none)
+    if verdict == "SAT" and result.verified is False:
+        messages.append(f"{path}: the model the design found doesn't satisfy every clause")
+        verdict = "MISMATCH"
+    # (the golden model can't follow phase saving or random polarity, but those still have to get the right verdict)
+    if options.golden and verdict in ("SAT", "UNSAT"):
+        polarity = options.polarity if options.polarity in golden.POLARITIES else "zero"
+        found = golden.differences(options, result, golden.solve(instance, size[1], polarity))
+        if found:
+            messages.append(f"{path}: differs from the golden model: {', '.join(found)}")
+            verdict = "MISMATCH"
+
+    max_freq_mhz, runtime_us = 0.0, 0.0
+    if options.timing:
+        report = timing.timing_report(*size, *options.design_variant())
+        max_freq_mhz, runtime_us = report.max_freq_mhz, report.runtime_us(result.cycles)
+
+    return BenchmarkRow(
+        str(path), path.parent.name, instance.num_vars, len(instance.clauses), *size, *options.design_variant(),
+        expected, verdict, check_verdict(expected, verdict), result.cycles, result.decisions, result.conflicts,
+        result.backtrack_cycles, result.sim_seconds, elab_seconds, max_freq_mhz, runtime_us
+    ), messages
+
+# rows for instances that never produced a result of their own
+def failed_row(path: Path, verdict: str, options: BenchmarkOptions) -> BenchmarkRow:
+    return BenchmarkRow(
+        str(path), path.parent.name, 0, 0, 0, 0, 0, *options.design_variant(),
+        expected_verdict(path), verdict, None, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0
+    )
+
+class Progress:
+    def __init__(self, total: int, log):
+        self.total = total
+        self.log = log
+        self.count = 0
+        self.incorrect = 0
+        self.start = time.perf_counter()
+
+    def report(self, row: BenchmarkRow):
+        self.count += 1
+        self.incorrect += row.correct is False
+        elapsed = time.perf_counter() - self.start
+        eta = elapsed / self.count * (self.total - self.count)
+        print(
+            f"[{self.count}/{self.total} {elapsed:.0f}s eta {eta:.0f}s, {self.incorrect} incorrect] "
+            f"{row.path}: {row.verdict} (expected {row.expected}) "
+            f"size:{row.clause_bits}/{row.var_bits}/{row.clause_size} {variant_label(row)} "
+            f"cycles:{row.cycles} decisions:{row.decisions} conflicts:{row.conflicts} backtrack:{row.backtrack_cycles} "
+            f"time:{row.sim_seconds:.2f}s",
+            file=self.log, flush=True
+        )
+
+# what runs each instance, benchmark_instance unless something (a test) hands in a stand in. for run_parallel it has
+# to be a module level function, since it gets pickled over to the workers
+InstanceRunner = Callable[[Path, BenchmarkOptions], Tuple[BenchmarkRow, List[str]]]
+
+# designs are elaborated the first time an instance needs them and reused for every instance of the same size
+def run_serial(paths: List[Path], options: BenchmarkOptions, on_row: Callable[[BenchmarkRow], None], log,
+               run: InstanceRunner = benchmark_instance):
+    for path in paths:
+        row, messages = run(path, options)
+        for message in messages:
+            print(message, file=log)
+        on_row(row)
+
+## PROCESS POOL ##
+# the simulations are pure python (or a C library driven from python), so we parallelize with processes
+# rather than threads. each worker keeps its own design cache for as long as the pool lives
+
+# a worker dying takes the whole pool down with it, and we can't tell which of the instances
+# in flight was responsible. so everything that was in flight gets retried in a fresh pool one at a time,
+# and only a crash with nothing else running counts as a strike against that instance. anything that reaches
+# MAX_CRASHES strikes is reported as CRASHED
+MAX_CRASHES = 2
+
+def run_parallel(paths: List[Path], options: BenchmarkOptions, jobs: int, on_row: Callable[[BenchmarkRow], None], log,
+                 run: InstanceRunner = benchmark_instance):
+    todo = list(reversed(paths))
+    # in flight when a pool broke, run on their own until they finish or crash
+    suspects = []
+    crashes = {path: 0 for path in paths}
+
+    def crashed(lost: List[Path]):
+        if len(lost) > 1:
+            suspects.extend(reversed(lost))
+            return
+        path = lost[0]
+        crashes[path] += 1
+        if crashes[path] >= MAX_CRASHES:
+            print(f"{path}: worker crashed {crashes[path]} times, giving up", file=log)
+            on_row(failed_row(path, "CRASHED", options))
+        else:
+            suspects.append(path)
+
+    while todo or suspects:
+        lost = []
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            in_flight = {}
+            while (todo or suspects or in_flight) and not lost:
+                if suspects:
+                    if not in_flight:
+                        path = suspects.pop()
+                        in_flight[pool.submit(run, path, options)] = path
+                else:
+                    while todo and len(in_flight) < jobs:
+                        path = todo.pop()
+                        in_flight[pool.submit(run, path, options)] = path
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = in_flight.pop(future)
+                    try:
+                        row, messages = future.result()
+                    except BrokenProcessPool:
+                        lost.append(path)
+                    except Exception as e:
+                        print(f"{path}: {type(e).__name__}: {e}", file=log)
+                        on_row(failed_row(path, "ERROR", options))
+                    else:
+                        for message in messages:
+                            print(message, file=log)
+                        on_row(row)
+
+            if lost:
+                # everything else that was running died with it
+                lost += in_flight.values()
+                print(f"worker crashed with {len(lost)} instance(s) in flight, restarting pool", file=log)
+                crashed(lost)
+
+def run_benchmark(paths: List[Path], options: BenchmarkOptions, jobs: int = 1, on_row=None, log=sys.stdout,
+                  run: InstanceRunner = benchmark_instance) -> List[BenchmarkRow]:
+    rows = []
+    progress = Progress(len(paths), log)
+
+    def collect(row: BenchmarkRow):
+        rows.append(row)
+        progress.report(row)
+        if on_row is not None:
+            on_row(row)
+
+    if jobs == 1:
+        run_serial(paths, options, collect, log, run)
+    else:
+        run_parallel(paths, options, jobs, collect, log, run)
+
+    # results come back in whatever order they finish
+    order = {str(path): i for i, path in enumerate(paths)}
+    rows.sort(key=lambda row: order[row.path])
+    return rows
+
+# linear interpolation between closest ranks
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    if len(ordered) == 0:
+        return 0.0
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+VARIANT_DEFAULTS = {field.name: field.default for field in fields(BenchmarkOptions) if field.name in VARIANT_FIELDS}
+# what a variant's value is of in the summaries ("2 lanes", "activity decisions"), the option's name if it's not here
+VARIANT_NOUNS = {"lanes": "lanes", "decision": "decisions"}
+
+# every variant option of the design this row ran on, as the progress lines show them
+# name:value, and a flag's name only when it's set (wrap_around as wrap-around)
+def variant_label(row: BenchmarkRow) -> str:
+    parts = []
+    for name in VARIANT_FIELDS:
+        value = getattr(row, name)
+        if isinstance(value, bool):
+            if value:
+                parts.append(name.replace("_", "-"))
+        else:
+            parts.append(f"{name}:{value}")
+    return " ".join(parts)
+
+# whatever is different about the design this row ran on from the default one
+def variant_details(row: BenchmarkRow) -> List[str]:
+    details = []
+    for name in VARIANT_FIELDS:
+        value = getattr(row, name)
+        if value == VARIANT_DEFAULTS[name]:
+            continue
+        if isinstance(value, bool):
+            details.append(name.replace("_", "-"))
+        else:
+            details.append(f"{value} {VARIANT_NOUNS.get(name, name)}")
+    return details
+
+def variant_name(row: BenchmarkRow) -> str:
+    return ", ".join(variant_details(row)) or "default"
+
+# rows are summarized per suite, and per variant if they aren't the defaults
+def group_name(row: BenchmarkRow) -> str:
+    details = variant_details(row)
+    return f"{row.suite} ({', '.join(details)})" if details else row.suite
+
+def summarize(rows: List[BenchmarkRow]) -> Dict[str, dict]:
+    suites = {}
+    for suite in sorted({group_name(row) for row in rows}):
+        suite_rows = [row for row in rows if group_name(row) == suite]
+        # only instances that actually ran to completion count towards the timing stats
+        solved = [row for row in suite_rows if row.verdict in ("SAT", "UNSAT")]
+        summary = {
+            "instances": len(suite_rows),
+            "solved": len(solved),
+            "correct": sum(1 for row in suite_rows if row.correct is True),
+            "incorrect": sum(1 for row in suite_rows if row.correct is False),
+            "timeout": sum(1 for row in suite_rows if row.verdict == "TIMEOUT"),
+            "too_large": sum(1 for row in suite_rows if row.verdict == "TOO_LARGE"),
+            "failed": sum(1 for row in suite_rows if row.verdict in ("ERROR", "CRASHED", "MISMATCH")),
+            # how many instances ran on each design size, as clause_bits/var_bits/clause_size
+            "sizes": dict(sorted(Counter(
+                f"{row.clause_bits}/{row.var_bits}/{row.clause_size}" for row in suite_rows if row.clause_bits
+            ).items())),
+        }
+        timed = any(row.max_freq_mhz for row in suite_rows)
+        if timed:
+            summary["max_freq_mhz"] = dict(sorted({
+                f"{row.clause_bits}/{row.var_bits}/{row.clause_size}": row.max_freq_mhz for row in suite_rows if row.max_freq_mhz
+            }.items()))
+        metrics = ("cycles", "decisions", "conflicts", "backtrack_cycles", "sim_seconds")
+        for metric in metrics + ("runtime_us",) if timed else metrics:
+            values = [getattr(row, metric) for row in solved]
+            summary[metric] = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+            summary[metric]["mean"] = sum(values) / len(values) if values else 0.0
+            summary[metric]["max"] = max(values, default=0)
+        conflicts = sum(row.conflicts for row in solved)
+        summary["backtrack_cycles_per_conflict"] = sum(row.backtrack_cycles for row in solved) / conflicts if conflicts else 0.0
+        suites[suite] = summary
+    return suites
+
+# cycles against design variant (lane count, termination, ...) for every suite
+# only instances that were solved by every variant are compared, and speedup is against the first one that ran
+# (None if there's nothing to compare, when no instance was solved by every variant)
+# with timing, the estimated runtimes get compared the same way since a variant can win on cycles and lose on clock
+def variant_sweep(rows: List[BenchmarkRow]) -> Dict[str, dict]:
+    variants = list(dict.fromkeys(variant_name(row) for row in rows))
+    timed = any(row.max_freq_mhz for row in rows)
+    sweep = {}
+    for suite in sorted({row.suite for row in rows}):
+        solved = {}
+        for row in rows:
+            if row.suite == suite and row.verdict in ("SAT", "UNSAT"):
+                solved.setdefault(row.path, {})[variant_name(row)] = row
+        common = [per_variant for per_variant in solved.values() if len(per_variant) == len(variants)]
+        suite_sweep = {}
+        for variant in variants:
+            values = [per_variant[variant].cycles for per_variant in common]
+            mean = sum(values) / len(values) if values else 0.0
+            suite_sweep[variant] = {"instances": len(values), "p50": percentile(values, 50), "mean": mean}
+            for counter in ("decisions", "conflicts", "backtrack_cycles"):
+                counts = [getattr(per_variant[variant], counter) for per_variant in common]
+                suite_sweep[variant]["mean_" + counter] = sum(counts) / len(counts) if counts else 0.0
+            if timed:
+                runtimes = [per_variant[variant].runtime_us for per_variant in common]
+                suite_sweep[variant]["mean_runtime_us"] = sum(runtimes) / len(runtimes) if runtimes else 0.0
+        base = suite_sweep[variants[0]]
+        for variant in variants:
+            stats = suite_sweep[variant]
+            stats["speedup"] = base["mean"] / stats["mean"] if common and stats["mean"] else None
+            if timed:
+                runtime = stats["mean_runtime_us"]
+                stats["runtime_speedup"] = base["mean_runtime_us"] / runtime if common and runtime else None
+        sweep[suite] = suite_sweep
+    return sweep
+
+# rows are written as they come in, so a long sweep that gets killed still leaves its results behind
+class CsvWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=[f.name for f in fields(BenchmarkRow)])
+        self.writer.writeheader()
+
+    def __call__(self, row: BenchmarkRow):
+        self.writer.writerow(asdict(row))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def write_json(rows: List[BenchmarkRow], options: BenchmarkOptions, path: str):
+    report = {
+        "options": asdict(options),
+        "suites": summarize(rows),
+        "instances": [asdict(row) for row in rows],
+    }
+    # a variant option that was given several values lists all of them, in the order they ran
+    for name in VARIANT_FIELDS:
+        values = list(dict.fromkeys(getattr(row, name) for row in rows))
+        if len(values) > 1:
+            report["options"][name] = values
+    if len({variant_name(row) for row in rows}) > 1:
+        report["variants"] = variant_sweep(rows)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+def print_summary(rows: List[BenchmarkRow], log=sys.stdout):
+    for suite, summary in summarize(rows).items():
+        cycles = summary["cycles"]
+        print(
+            f"{suite}: {summary['solved']}/{summary['instances']} solved, "
+            f"{summary['correct']} correct, {summary['incorrect']} incorrect, "
+            f"{summary['timeout']} timeout, {summary['too_large']} too large, {summary['failed']} failed | "
+            f"sizes {' '.join(f'{size}x{count}' for size, count in summary['sizes'].items())} | "
+            f"cycles p50:{cycles['p50']:.0f} p90:{cycles['p90']:.0f} p99:{cycles['p99']:.0f} "
+            f"decisions p50:{summary['decisions']['p50']:.0f} conflicts p50:{summary['conflicts']['p50']:.0f} "
+            f"backtrack cycles per conflict:{summary['backtrack_cycles_per_conflict']:.1f}"
+            + (
+                f" | fmax {' '.join(f'{size}:{fmax:.1f}MHz' for size, fmax in summary['max_freq_mhz'].items())} "
+                f"runtime p50:{summary['runtime_us']['p50']:.0f}us"
+                if "runtime_us" in summary else ""
+            ),
+            file=log
+        )
+
+    if len({variant_name(row) for row in rows}) > 1:
+        for suite, sweep in variant_sweep(rows).items():
+            print(f"{suite} cycles per design variant:", file=log)
+            if not any(stats["instances"] for stats in sweep.values()):
+                print("  n/a, no instance was solved by every variant", file=log)
+                continue
+            width = max(len(variant) for variant in sweep)
+            for variant, stats in sweep.items():
+                print(
+                    f"  {variant:>{width}}: mean {stats['mean']:.0f} p50 {stats['p50']:.0f} "
+                    f"decisions {stats['mean_decisions']:.0f} conflicts {stats['mean_conflicts']:.0f} "
+                    f"backtrack cycles {stats['mean_backtrack_cycles']:.0f} "
+                    f"speedup {stats['speedup']:.2f}x over {stats['instances']} instances"
+                    + (
+                        f" | runtime mean {stats['mean_runtime_us']:.0f}us speedup {stats['runtime_speedup']:.2f}x"
+                        if "runtime_speedup" in stats else ""
+                    ),
+                    file=log
+                )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="run DIMACS instances through the dpll design")
+    parser.add_argument("instances", nargs="+", help="cnf files, directories or globs")
+    # left unset, each of these is picked per instance as the smallest that fits
+    parser.add_argument("--clause-bits", type=int, help="fix the clause address width (default: fit each instance)")
+    parser.add_argument("--var-bits", type=int, help="fix the variable id width (default: fit each instance)")
+    parser.add_argument("--clause-size", type=int, help="fix the literals per clause (default: fit each instance)")
+    parser.add_argument("--lanes", type=int, nargs="+", default=[1],
+                        help="clauses BCP looks at per cycle (powers of 2), give several to compare them")
+    parser.add_argument("--engine", choices=ENGINES, nargs="+", default=["scan"],
+                        help="scan sweeps every clause, occurrence only visits clauses an assignment could affect, "
+                             "pipelined is scan over four pipeline stages. give several to compare them")
+    parser.add_argument("--termination", choices=["restart", "wrap"], nargs="+", default=["restart"],
+                        help="when a scan pass ends: restart from clause 0 after an implication, or wrap around "
+                             "and stop back at the last implication. give both to compare them")
+    parser.add_argument("--backtrack", choices=["chronological", "cdcl"], nargs="+", default=["chronological"],
+                        help="on a contradiction: flip the latest decision, or learn a clause and backjump "
+                             "(learned clauses longer than the clause size fall back to chronological). give both to compare them")
+    parser.add_argument("--decision", choices=DECISIONS, nargs="+", default=["static"],
+                        help="which variable to decide on: the lowest unassigned one, or the most active one "
+                             "(VSIDS style counters bumped on every contradiction). give both to compare them")
+    parser.add_argument("--polarity", choices=POLARITIES, nargs="+", default=["zero"],
+                        help="the value a decision tries first: always 0, always 1, the variable's saved phase "
+                             "or pseudo-random. give several to compare them")
+    parser.add_argument("--undo", choices=UNDOS, nargs="+", default=["scan"],
+                        help="how backtracking finds what to clear: search the variable memory for the current level, "
+                             "pop a trail of assignments in order, or flash clear whole levels at once. "
+                             "give several to compare them")
+    parser.add_argument("--store", choices=STORES, nargs="+", default=["memory"],
+                        help="where the variable words live: a memory read in full every cycle, or a memory with a "
+                             "few ports next to bitvectors of every assigned and val bit (needs --undo trail and "
+                             "no cdcl). give both to compare them")
+    parser.add_argument("--max-cycles", type=int, default=runner.MAX_CYCLES)
+    parser.add_argument("--max-seconds", type=float,
+                        help="also give up on an instance (TIMEOUT) after this much simulation time")
+    parser.add_argument("--checkpoint-dir",
+                        help="save a checkpoint of every instance here as it runs, and carry on from the one already "
+                             "there (so --max-cycles and --max-seconds are for this run)")
+    parser.add_argument("--checkpoint-every", type=int, default=checkpoint.EVERY, help="cycles between checkpoints")
+    parser.add_argument("--backend", choices=list(backends.BACKENDS), default=backends.get_backend())
+    parser.add_argument("--cross-check", choices=list(backends.BACKENDS), metavar="BACKEND",
+                        help="also run every instance on this backend and check done/sat match on every cycle")
+    parser.add_argument("--timing", action="store_true",
+                        help="run static timing on every design and estimate runtime as cycles over max frequency")
+    parser.add_argument("--golden", action="store_true",
+                        help="also solve every instance with the golden model and report a MISMATCH if the verdict "
+                             "differs, or the decision or conflict count does for designs it models exactly")
+    parser.add_argument("--tlm", action="store_true",
+                        help="predict cycles with the transaction level model instead of simulating (scan engine, "
+                             "chronological backtracking, static decisions and polarity zero or one only)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="worker processes, 0 for one per core")
+    parser.add_argument("--csv", help="write per-instance results here")
+    parser.add_argument("--json", help="write per-suite percentiles and per-instance results here")
+    args = parser.parse_args(argv)
+    if args.engine != ["scan"] and args.lanes != [1]:
+        parser.error("--lanes only applies to the scan engine")
+    if "occurrence" in args.engine and args.termination != ["restart"]:
+        parser.error("--termination only applies to the scan and pipelined engines")
+    if "cdcl" in args.backtrack and ("occurrence" in args.engine or args.lanes != [1]):
+        parser.error("--backtrack cdcl needs the scan or pipelined engine with one lane")
+    if "bitmap" in args.store and (args.undo != ["trail"] or "cdcl" in args.backtrack):
+        parser.error("--store bitmap needs --undo trail and chronological backtracking")
+    if args.checkpoint_dir and (args.tlm or args.cross_check):
+        parser.error("--checkpoint-dir doesn't go with --tlm or --cross-check")
+    if args.tlm and (args.engine != ["scan"] or args.backtrack != ["chronological"] or args.decision != ["static"]
+                     or set(args.polarity) - {"zero", "one"} or args.cross_check):
+        parser.error("--tlm only models the scan engine with chronological backtracking, static decisions and "
+                     "polarity zero or one, and there's nothing to cross check")
+
+    paths = [path for pattern in args.instances for path in find_instances(pattern)]
+    if args.checkpoint_dir:
+        Path(args.checkpoint_dir).mkdir(parents=True, exist_ok=True)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+
+    csv_writer = CsvWriter(args.csv) if args.csv else None
+    try:
+        options = BenchmarkOptions(
+            args.clause_bits, args.var_bits, args.clause_size, args.lanes[0], args.engine[0], False, False, args.decision[0],
+            args.polarity[0], args.undo[0], args.store[0], args.max_cycles, args.backend, args.cross_check,
+            args.timing, args.golden, args.tlm, args.max_seconds, args.checkpoint_dir, args.checkpoint_every
+        )
+        rows = []
+        variants = itertools.product(
+            args.engine, args.termination, args.backtrack, args.decision, args.polarity, args.undo, args.store, args.lanes
+        )
+        for engine, termination, backtrack, decision, polarity, undo, store, lanes in variants:
+            options = replace(
+                options, lanes=lanes, engine=engine, wrap_around=termination == "wrap", cdcl=backtrack == "cdcl",
+                decision=decision, polarity=polarity, undo=undo, store=store
+            )
+            rows += run_benchmark(paths, options, jobs, csv_writer)
+    finally:
+        if csv_writer is not None:
+            csv_writer.close()
+
+    print_summary(rows)
+    if args.json:
+        write_json(rows, options, args.json)
+
+    # non-zero exit if we ever got the wrong answer
+    return 1 if any(row.correct is False for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import pyrtl
+from pyrtl import WireVector, Register
+import helpers
+from var_assign_store import VarWords
+
+# a VarAssignStore that doesn't read every word every cycle
+# the words stay in a memory with only a few ports (BCP's reads, one per backtrack port, and two of our own), and the
+# assigned and val bits of every word are mirrored into two packed registers next to it. anything that looks at
+# every variable at once (what to decide on, whether anything's in the bad state, sat) priority encodes those bits
+# (helpers.priority_encode) instead of running trees over whole words
+#
+# same inputs and outputs as VarAssignStore, apart from what needs a level out of every word: there's no
+# has_current_level / current_level_addr (so backtrack off a trail), no latest_pos (so no cdcl) and no flash_clear
+# every write has to go through write, and finish_writes has to be called once the last write port is in
+#
+# the mirror starts out with nothing assigned, and so does the memory (dimacs.initial_var_mem)
+class BitmapVarAssignStore(VarWords):
+    def __init__(self, clause_bits: int, var_bits: int, clause_size: int, name_prefix = "assign_", lanes: int = 1,
+                 reason_bits: int = 0, external_decision: bool = False, polarity: str = "zero", backtrack_ports: int = 1,
+                 flash_clear: bool = False):
+        assert not reason_bits, "cdcl needs every word's level and pos, use a VarAssignStore"
+        assert not flash_clear, "flash clearing needs every word's level, use a VarAssignStore"
+        super().__init__(var_bits, reason_bits, polarity)
+        self.flash_clear = False
+
+        ## inputs ##
+        self.start = WireVector(bitwidth = 1, name = name_prefix+"start")
+        self.level = WireVector(bitwidth = var_bits+1, name = name_prefix+"level")
+        if external_decision:
+            self.decide_var_i = WireVector(bitwidth = var_bits, name = name_prefix+"decide_var_i")
+
+        ## outputs ##
+        self.needs_backtrack = WireVector(bitwidth = 1, name = name_prefix+"needs_backtrack")
+        self.unsat = WireVector(bitwidth = 1, name = name_prefix+"unsat")
+        self.sat = WireVector(bitwidth = 1, name = name_prefix+"sat")
+        self.ready_bcp = WireVector(bitwidth = 1, name = name_prefix+"ready_bcp")
+        self.decision_var = WireVector(bitwidth = var_bits, name = name_prefix+"decision_var")
+        self.decision_val = WireVector(bitwidth = 1, name = name_prefix+"decision_val")
+
+        ## internal variable storage ##
+        self.mem = pyrtl.MemBlock(
+            bitwidth = self.word_bits,
+            addrwidth = var_bits,
+            name = "Variable Memory",
+            # BCP, backtracking, the bad variable's level and the decision's saved phase
+            max_read_ports = clause_size * lanes + backtrack_ports + 2,
+            max_write_ports = 2 + backtrack_ports,
+            asynchronous = True
+        )
+
+        ## internal registers ##
+        # bit i is the assigned / val bit of variable i's word
+        self.assigned = Register(bitwidth = 2 ** var_bits, name = name_prefix+"assigned")
+        self.vals = Register(bitwidth = 2 ** var_bits, name = name_prefix+"vals")
+
+        ## internal wires ##
+        self.new_assign = WireVector(bitwidth = self.word_bits, name = name_prefix+"new_assign")
+        self.enable_write = WireVector(bitwidth = 1, name = name_prefix+"enable_write")
+        has_unassigned = WireVector(bitwidth = 1, name = name_prefix+"has_unassigned")
+        first_unassigned = WireVector(bitwidth = var_bits, name = name_prefix+"first_unassigned")
+        has_bad = WireVector(bitwidth = 1, name = name_prefix+"has_bad")
+        first_bad = WireVector(bitwidth = var_bits, name = name_prefix+"first_bad")
+
+        # {val, assigned} for every variable, the bottom two bits of its word
+        self.every_assignment = [pyrtl.concat(self.vals[i], self.assigned[i]) for i in range(2 ** var_bits)]
+
+        # variable 0 is never anything
+        zero = pyrtl.Const(0, bitwidth = 1)
+        valid, index = helpers.priority_encode([zero] + [~self.assigned[i] & ~self.vals[i] for i in range(1, 2 ** var_bits)])
+        has_unassigned <<= valid
+        first_unassigned <<= index
+        valid, index = helpers.priority_encode([zero] + [~self.assigned[i] & self.vals[i] for i in range(1, 2 ** var_bits)])
+        has_bad <<= valid
+        first_bad <<= index
+        bad_level = self.mem[first_bad][2:3+var_bits]
+
+        # same order as VarAssignStore, everything not set stays 0
+        with pyrtl.conditional_assignment:
+            with self.start:
+                with has_bad:
+                    # a root that's been through both values, unsat if nothing was decided to get there
+                    with bad_level == 0:
+                        self.unsat |= 1
+                    with pyrtl.otherwise:
+                        self.needs_backtrack |= 1
+                with ~has_unassigned:
+                    self.sat |= 1
+                with pyrtl.otherwise:
+                    self.enable_write |= 1
+                    self.ready_bcp |= 1
+
+        self.decision_var <<= self.decide_var_i if external_decision else first_unassigned
+        self._connect_decision_val(name_prefix)
+
+        self.new_assign <<= self.assignment(self.decision_var, self.decision_val, self.level, 1)
+        self.write(self.decision_var, self.new_assign, self.enable_write)
+
+    def read(self, addr):
+        return self.mem[addr]
+
+    # hook the mirror up to every write port there is
+    def finish_writes(self):
+        var_bits = self.var_bits
+        bits = [pyrtl.Const(0, bitwidth = 2)]
+        for i in range(1, 2 ** var_bits):
+            entry = pyrtl.concat(self.vals[i], self.assigned[i])
+            for addr, word, enable in self._writes:
+                entry = pyrtl.select(enable & (addr == i), word[0:2], entry)
+            bits.append(entry)
+        self.assigned.next <<= pyrtl.concat_list([entry[0] for entry in bits])
+        self.vals.next <<= pyrtl.concat_list([entry[1] for entry in bits])
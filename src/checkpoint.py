@@ -0,0 +1,117 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import pyrtl
+
+import backends
+import runner
+from dimacs import CnfInstance
+from dpll import DpllDesign
+
+# snapshots of a running simulation, so a long run can be picked up again after a crash or a timeout, or split across
+# several jobs. a snapshot is everything that changes as the design runs: every register (dpll_state, curr_level,
+# clause_addr...) and every memory (var_assign_store.mem, clause_storage.mem...), by name, plus how many cycles it
+# took to get there. restoring one builds a new simulation starting from exactly that state, on any backend, so the
+# rest of the run takes the same cycles it would have
+
+# cycles between snapshots in run_instance by default
+EVERY = 100000
+
+@dataclass
+class Checkpoint:
+    # everything build_dpll took, in its order
+    design: tuple
+    # the instance's path, so it doesn't get picked up again on a different one
+    instance: str
+    cycles: int
+    registers: Dict[str, int]
+    # only the addresses that aren't 0
+    memories: Dict[str, Dict[int, int]]
+
+def design_key(design: DpllDesign) -> tuple:
+    return (design.clause_bits, design.var_bits, design.clause_size, design.lanes, design.engine, design.wrap_around,
+            design.cdcl, design.decision, design.polarity, design.undo, design.store)
+
+def memories(design: DpllDesign) -> Dict[str, pyrtl.MemBlock]:
+    return {net.op_param[1].name: net.op_param[1] for net in design.block.logic if net.op in "m@"}
+
+def snapshot(sim, design: DpllDesign, instance: CnfInstance, cycles: int) -> Checkpoint:
+    return Checkpoint(
+        design_key(design), str(instance.path), cycles, backends.register_values(sim),
+        {name: {addr: value for addr, value in sim.inspect_mem(mem).items() if value}
+         for name, mem in memories(design).items()}
+    )
+
+# a simulation of design that starts out where the checkpoint left off
+def restore(design: DpllDesign, checkpoint: Checkpoint, backend: str = None):
+    assert checkpoint.design == design_key(design), \
+        f"checkpoint is of a {checkpoint.design} design, not {design_key(design)}"
+    wires = design.block.wirevector_by_name
+    mems = memories(design)
+    return backends.simulation(
+        tracer=None,
+        register_value_map={wires[name]: value for name, value in checkpoint.registers.items()},
+        memory_value_map={mems[name]: dict(values) for name, values in checkpoint.memories.items()},
+        block=design.block, backend=backend, registers=True
+    )
+
+# written to a temporary file first, so a crash while saving leaves the last checkpoint as it was
+def save(checkpoint: Checkpoint, path: Path):
+    path = Path(path)
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "w") as file:
+        json.dump({
+            "design": list(checkpoint.design),
+            "instance": checkpoint.instance,
+            "cycles": checkpoint.cycles,
+            "registers": checkpoint.registers,
+            "memories": checkpoint.memories,
+        }, file)
+    os.replace(temporary, path)
+
+def load(path: Path) -> Checkpoint:
+    with open(path) as file:
+        data = json.load(file)
+    return Checkpoint(
+        tuple(data["design"]), data["instance"], data["cycles"], data["registers"],
+        {name: {int(addr): value for addr, value in values.items()} for name, values in data["memories"].items()}
+    )
+
+# runner.run_instance, saving a checkpoint to path every `every` cycles and carrying on from the one already there
+# if there is one. the budgets are for this call, the cycles in the result count from the start of the run
+def run_instance(design: DpllDesign, instance: CnfInstance, path: Path, every: int = EVERY,
+                 max_cycles: int = runner.MAX_CYCLES, backend: str = None,
+                 max_seconds: Optional[float] = None) -> runner.RunResult:
+    start = time.perf_counter()
+    if Path(path).exists():
+        checkpoint = load(path)
+        assert checkpoint.instance == str(instance.path), f"{path} is a checkpoint of {checkpoint.instance}"
+        sim = restore(design, checkpoint, backend)
+        cycles = checkpoint.cycles
+    else:
+        assert runner.fits(design, instance)
+        sim = backends.simulation(
+            tracer=None, memory_value_map=runner.memory_value_map(design, instance), block=design.block,
+            backend=backend, registers=True
+        )
+        cycles = 0
+
+    ran = 0
+    while True:
+        seconds = None if max_seconds is None else max(0.0, max_seconds - (time.perf_counter() - start))
+        result = runner.run(sim, min(every, max_cycles - ran), seconds)
+        ran += result.cycles
+        cycles += result.cycles
+        if result.finished:
+            break
+        save(snapshot(sim, design, instance, cycles), path)
+        if result.exhausted == "seconds" or ran >= max_cycles:
+            break
+
+    result.cycles = cycles
+    result.sim_seconds = time.perf_counter() - start
+    return runner.certify(result, sim, design, instance)
@@ -15,33 +15,33 @@ from helpers import wirevector_list
 #  - implied_val_o:   implied value (if status = 3)
 
 class ClauseResolver:
-    def __init__(self, clause_bits: int, var_bits:int, clause_size: int):
+    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = ""):
         ## IN ##
-        self.cs_vars_i =      wirevector_list(var_bits, "cs_vars_i", clause_size)
-        self.cs_negated_i =   wirevector_list(1, "cs_negated_i", clause_size)
-        self.var_vals_i =     wirevector_list(1, "var_vals_i", clause_size)
-        self.var_assigned_i = wirevector_list(1, "var_assigned_i", clause_size)
+        self.cs_vars_i =      wirevector_list(var_bits, name_prefix+"cs_vars_i", clause_size)
+        self.cs_negated_i =   wirevector_list(1, name_prefix+"cs_negated_i", clause_size)
+        self.var_vals_i =     wirevector_list(1, name_prefix+"var_vals_i", clause_size)
+        self.var_assigned_i = wirevector_list(1, name_prefix+"var_assigned_i", clause_size)
 
         ## OUT ##
-        self.clause_status_o = WireVector(bitwidth = 2, name = "clause_status_o")
-        self.implied_var_o = WireVector(bitwidth = var_bits, name = "implied_var_o")
-        self.implied_val_o = WireVector(bitwidth = 1, name = "implied_val_o")
+        self.clause_status_o = WireVector(bitwidth = 2, name = name_prefix+"clause_status_o")
+        self.implied_var_o = WireVector(bitwidth = var_bits, name = name_prefix+"implied_var_o")
+        self.implied_val_o = WireVector(bitwidth = 1, name = name_prefix+"implied_val_o")
 
         ## INTERNAL ##
         # values of variables + if they're negated
-        atom_vals = wirevector_list(1, "atom_vals", clause_size)
+        atom_vals = wirevector_list(1, name_prefix+"atom_vals", clause_size)
         # negation of var_assigned_i
-        unassigned = wirevector_list(1, "unassigned", clause_size)
+        unassigned = wirevector_list(1, name_prefix+"unassigned", clause_size)
          # the variable id if it's unassigned and 0 otherwise
-        unassigned_masked_vars = wirevector_list(var_bits, "unassigned_masked_vars", clause_size)
+        unassigned_masked_vars = wirevector_list(var_bits, name_prefix+"unassigned_masked_vars", clause_size)
         # the negation bit if it's unassigned and 0 otherwise
-        unassigned_masked_negs = wirevector_list(1, "unassigned_masked_negs", clause_size)
+        unassigned_masked_negs = wirevector_list(1, name_prefix+"unassigned_masked_negs", clause_size)
 
-        ored_var_addrs = WireVector(bitwidth = var_bits, name = "ored_var_addrs")
-        is_sat = WireVector(bitwidth = 1, name = "is_sat")
-        unassigned_count = WireVector(bitwidth = 2, name = "unassigned_count") # either 0, 1 or 3, see double_saturate
-        unassigned_var = WireVector(bitwidth = var_bits, name = "unassigned_var")
-        unassigned_neg = WireVector(bitwidth = 1, name = "unassigned_neg")
+        ored_var_addrs = WireVector(bitwidth = var_bits, name = name_prefix+"ored_var_addrs")
+        is_sat = WireVector(bitwidth = 1, name = name_prefix+"is_sat")
+        unassigned_count = WireVector(bitwidth = 2, name = name_prefix+"unassigned_count") # either 0, 1 or 3, see saturating_count
+        unassigned_var = WireVector(bitwidth = var_bits, name = name_prefix+"unassigned_var")
+        unassigned_neg = WireVector(bitwidth = 1, name = name_prefix+"unassigned_neg")
 
         ## LOGIC ##
         for i in range(clause_size):
@@ -53,7 +53,7 @@ class ClauseResolver:
 
         ored_var_addrs <<= helpers.create_bin_tree(self.cs_vars_i, lambda a, b: a|b)
         is_sat <<= helpers.create_bin_tree(atom_vals, lambda a, b: a|b)
-        unassigned_count <<= helpers.create_bin_tree(unassigned, helpers.double_saturate)
+        unassigned_count <<= helpers.saturating_count(unassigned)
         # we only care about unassigned_var when there's exactly one unassigned variable, so or works fine to extract it
         unassigned_var <<= helpers.create_bin_tree(unassigned_masked_vars, lambda a, b: a|b)
         unassigned_neg <<= helpers.create_bin_tree(unassigned_masked_negs, lambda a, b: a|b)
@@ -6,30 +6,58 @@ from helpers import wirevector_list
 #  * mem_o : raw output of the memory
 #  * vars_o: array of wires carrying variable ids
 #  * negs_o: array of bits indicating negation
+# with lanes > 1 every word holds that many clauses side by side (clause addr*lanes + i in lane i), so
+# addr_i picks a row of clause_bits - log2(lanes) bits and vars_o/negs_o hold clause_size wires per lane, lane 0 first
+#
+# read_ports > 1 makes room for that many more read() calls on top of addr_i
+# writable adds a write port, one row at a time:
+#  * write_addr_i, write_data_i, write_enable_i
 class ClauseStorage:
-    def __init__(self, clause_bits: int, var_bits:int, clause_size: int):
-        self.addr_width = clause_bits
+    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, lanes: int = 1, read_ports: int = 1,
+                 writable: bool = False):
+        lane_bits = lanes.bit_length() - 1
+        assert lanes == 1 << lane_bits, "lanes has to be a power of 2"
+        assert clause_bits > lane_bits, "need at least two rows of clauses"
+
+        self.addr_width = clause_bits - lane_bits
         self.var_bits = var_bits
         self.clause_size = clause_size
+        self.lanes = lanes
 
-        store_width = (var_bits + 1) * clause_size
+        clause_width = (var_bits + 1) * clause_size
+        store_width = clause_width * lanes
         self.mem = pyrtl.MemBlock(
             bitwidth = store_width,
-            addrwidth = clause_bits,
+            addrwidth = self.addr_width,
             name = "Clause Storage",
-            max_read_ports = 1,
+            max_read_ports = read_ports,
             max_write_ports = 1
         )
 
-        self.addr_i = pyrtl.WireVector(bitwidth = clause_bits, name="cs_addr_i")
+        self.addr_i = pyrtl.WireVector(bitwidth = self.addr_width, name="cs_addr_i")
         self.mem_o = pyrtl.WireVector(bitwidth = store_width, name="cs_mem_o")
         self.mem_o <<= self.mem[self.addr_i]
 
-        self.vars_o = wirevector_list(var_bits, "cs_var_o", clause_size)
-        self.negs_o = wirevector_list(1, "cs_neg_o", clause_size)
-        for i in range(clause_size):
-            var_start = i * (var_bits + 1)
-            self.vars_o[i] <<= self.mem_o[var_start:var_start+var_bits]
-            self.negs_o[i] <<= self.mem_o[var_start+var_bits:var_start+var_bits+1]
+        self.vars_o, self.negs_o = self.split(self.mem_o, "cs_")
+
+        if writable:
+            self.write_addr_i =   pyrtl.WireVector(bitwidth = self.addr_width, name="cs_write_addr_i")
+            self.write_data_i =   pyrtl.WireVector(bitwidth = store_width, name="cs_write_data_i")
+            self.write_enable_i = pyrtl.WireVector(bitwidth = 1, name="cs_write_enable_i")
+            self.mem[self.write_addr_i] <<= pyrtl.MemBlock.EnabledWrite(self.write_data_i, self.write_enable_i)
+
+    # a row split up into variable ids and negation bits, lane major
+    def split(self, row, name_prefix: str):
+        clause_width = (self.var_bits + 1) * self.clause_size
+        vars_o = wirevector_list(self.var_bits, name_prefix+"var_o", self.clause_size * self.lanes)
+        negs_o = wirevector_list(1, name_prefix+"neg_o", self.clause_size * self.lanes)
+        for i in range(self.clause_size * self.lanes):
+            lane, slot = divmod(i, self.clause_size)
+            var_start = lane * clause_width + slot * (self.var_bits + 1)
+            vars_o[i] <<= row[var_start:var_start+self.var_bits]
+            negs_o[i] <<= row[var_start+self.var_bits:var_start+self.var_bits+1]
+        return vars_o, negs_o
 
-        # TODO: implement write i/o
+    # another read port, returns (vars, negs) for the row at addr like vars_o/negs_o
+    def read(self, addr, name_prefix: str):
+        return self.split(self.mem[addr], name_prefix)
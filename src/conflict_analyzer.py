@@ -0,0 +1,192 @@
+import pyrtl
+from pyrtl import WireVector, Register
+import helpers
+from helpers import wirevector_list
+
+from clause_storage import ClauseStorage
+from var_assign_store import VarAssignStore, get_latest
+
+
+# 1-UIP conflict analysis for cdcl
+# works straight off the VarAssignStore (built with reason_bits) and writes learned clauses into the top half of
+# ClauseStorage (the half above the instance's clause_bits), round robin
+#
+# exposed wires:
+# Inputs:
+# - start_i:         send a 1 (for a cycle) when BCP hits a contradiction
+# - conflict_addr_i: address of the clause that fell over
+# - level_i:         the level the contradiction happened at
+# Outputs:
+# - done_o:          high for one cycle once it's finished
+# - learned_o:       (with done_o) a clause was learned, backjump with the assert_* outputs
+#                    if not, the clause didn't fit or its slot is still in use, so backtrack chronologically
+# - assert_level_o:  level to backjump to, the highest level in the learned clause apart from the UIP
+# - assert_var_o, assert_val_o: the UIP and the value it's implied to at that level
+# - assert_reason_o: the learned clause's address
+# - last_addr_o:     last row that's ever had a clause in it, for BCP's last_addr_i
+# the assert_* outputs hold until the next start
+#
+# every variable has a seen bit, the learned clause is whatever ends up seen:
+#  1. mark:  read a clause and mark its variables (apart from the one it was the reason for)
+#  2. pick:  if two or more seen variables are from level_i, unmark the latest of them and go mark its reason
+#            once only one is left, that's the UIP. the clause is it plus the seen ones from lower levels
+#            (level 0 is left out, nothing ever takes it back)
+#  3. pack:  shift the lower level literals into the clause one a cycle, then write it
+# every literal in the clause is false right now, so each one's negation bit is just its variable's value
+
+class ConflictAnalyzer:
+    def __init__(self, clause_bits: int, var_bits: int, clause_size: int, var_assign_store: VarAssignStore,
+                 clause_storage: ClauseStorage, name_prefix = "ca_"):
+        row_bits = clause_bits + 1
+        assert clause_storage.addr_width == row_bits, "clause storage needs a learned half on top of the instance"
+        assert var_assign_store.reason_bits == row_bits, "the VarAssignStore needs a reason per variable"
+        lit_bits = var_bits + 1
+
+        ## inputs ##
+        self.start_i =         WireVector(bitwidth = 1, name = name_prefix+"start_i")
+        self.conflict_addr_i = WireVector(bitwidth = row_bits, name = name_prefix+"conflict_addr_i")
+        self.level_i =         WireVector(bitwidth = var_bits + 1, name = name_prefix+"level_i")
+
+        ## outputs ##
+        self.done_o =          WireVector(bitwidth = 1, name = name_prefix+"done_o")
+        self.learned_o =       WireVector(bitwidth = 1, name = name_prefix+"learned_o")
+        self.assert_level_o =  WireVector(bitwidth = var_bits + 1, name = name_prefix+"assert_level_o")
+        self.assert_var_o =    WireVector(bitwidth = var_bits, name = name_prefix+"assert_var_o")
+        self.assert_val_o =    WireVector(bitwidth = 1, name = name_prefix+"assert_val_o")
+        self.assert_reason_o = WireVector(bitwidth = row_bits, name = name_prefix+"assert_reason_o")
+        self.last_addr_o =     WireVector(bitwidth = row_bits, name = name_prefix+"last_addr_o")
+
+        ## internal registers ##
+        # 0: idle, 1: mark, 2: pick, 3: pack
+        phase =        Register(bitwidth = 2, name = name_prefix+"phase")
+        addr =         Register(bitwidth = row_bits, name = name_prefix+"addr") # clause to mark
+        resolved =     Register(bitwidth = var_bits, name = name_prefix+"resolved") # variable addr was the reason for
+        uip_var =      Register(bitwidth = var_bits, name = name_prefix+"uip_var")
+        uip_val =      Register(bitwidth = 1, name = name_prefix+"uip_val")
+        assert_level = Register(bitwidth = var_bits + 1, name = name_prefix+"assert_level")
+        learned_addr = Register(bitwidth = row_bits, name = name_prefix+"learned_addr")
+        learned_ptr =  Register(bitwidth = clause_bits, name = name_prefix+"learned_ptr") # next slot to write
+        # starts out at the end of the instance's half
+        last_addr =    Register(bitwidth = row_bits, name = name_prefix+"last_addr", reset_value = 2 ** clause_bits - 1)
+        row =          Register(bitwidth = lit_bits * clause_size, name = name_prefix+"row") # clause being packed, from the top
+        # variable 0 is padding, it never gets seen
+        seen = [pyrtl.Const(0, bitwidth = 1)] + [
+            Register(bitwidth = 1, name = f"{name_prefix}seen_{i}") for i in range(1, 2 ** var_bits)
+        ]
+
+        ## internal wires ##
+        slot =          WireVector(bitwidth = row_bits, name = name_prefix+"slot")
+        marking =       WireVector(bitwidth = 1, name = name_prefix+"marking")
+        unset =         WireVector(bitwidth = 1, name = name_prefix+"unset") # unmark unset_var
+        unset_var =     WireVector(bitwidth = var_bits, name = name_prefix+"unset_var")
+        finished =      WireVector(bitwidth = 1, name = name_prefix+"finished") # clear every seen bit
+        locked =        WireVector(bitwidth = 1, name = name_prefix+"locked") # slot is still some variable's reason
+        at_level =      wirevector_list(1, name_prefix+"at_level", 2 ** var_bits)
+        lower =         wirevector_list(1, name_prefix+"lower", 2 ** var_bits) # seen, below level_i and above 0
+        lower_count =   WireVector(bitwidth = (2 ** var_bits).bit_length(), name = name_prefix+"lower_count")
+        at_level_count = WireVector(bitwidth = 2, name = name_prefix+"at_level_count") # 0, 1 or 3, see saturating_count
+
+        ## reading the VarAssignStore ##
+        slot <<= pyrtl.concat(pyrtl.Const(1, bitwidth = 1), learned_ptr)
+        latest_entries = []
+        lower_vals = []
+        lower_levels = []
+        lock_hits = []
+        for i, word in enumerate(var_assign_store.every_memory_value):
+            assigned = word[0]
+            val = word[1]
+            level = word[2:3+var_bits]
+            is_root = word[3+2*var_bits]
+            pos = word[4+2*var_bits:4+3*var_bits]
+            reason = word[4+3*var_bits:4+3*var_bits+row_bits]
+            index = pyrtl.Const(i, bitwidth = var_bits)
+
+            at_level[i] <<= seen[i] & assigned & (level == self.level_i)
+            lower[i] <<= seen[i] & assigned & (level != self.level_i) & (level != 0)
+            # {valid, pos, reason, val, index}, positions are unique so the rest never gets compared
+            latest_entries.append(pyrtl.concat(at_level[i], pos, reason, val, index))
+            lower_vals.append(val)
+            lower_levels.append(pyrtl.select(lower[i], level, pyrtl.Const(0, bitwidth = var_bits + 1)))
+            # level 0 is never analysed, so its reasons can go
+            lock_hits.append(assigned & ~is_root & (level != 0) & (reason == slot))
+
+        latest = helpers.create_bin_tree(latest_entries, get_latest)
+        latest_var = latest[:var_bits]
+        latest_val = latest[var_bits]
+        latest_reason = latest[var_bits+1:var_bits+1+row_bits]
+        at_level_count <<= helpers.saturating_count(at_level)
+
+        # {valid, literal} of the lowest one
+        has_lower, lower_index = helpers.priority_encode(lower)
+        next_lower = pyrtl.concat(has_lower, pyrtl.mux(lower_index, *lower_vals), lower_index)
+        lower_count <<= helpers.popcount(lower)
+        max_lower_level = helpers.create_bin_tree(lower_levels, lambda a, b: pyrtl.select(a > b, a, b))
+        locked <<= helpers.create_bin_tree(lock_hits, lambda a, b: a|b)
+
+        ## marking ##
+        clause_vars, _ = clause_storage.read(addr, name_prefix+"clause_")
+        for i in range(1, 2 ** var_bits):
+            hit = helpers.create_bin_tree([var == i for var in clause_vars], lambda a, b: a|b)
+            seen[i].next <<= (
+                ~finished
+                & (seen[i] | (marking & hit & (resolved != i)))
+                & ~(unset & (unset_var == i))
+            )
+
+        ## control ##
+        uip_lit = pyrtl.concat(latest_val, latest_var)
+        row_start = pyrtl.concat(uip_lit, pyrtl.Const(0, bitwidth = lit_bits * (clause_size - 1))) if clause_size > 1 else uip_lit
+        # with one literal a clause there's never anything to shift in
+        row_shifted = pyrtl.concat(next_lower[:lit_bits], row[lit_bits:]) if clause_size > 1 else row
+        uip_fits = (lower_count < clause_size) & ~locked
+        with pyrtl.conditional_assignment:
+            with self.start_i:
+                phase.next    |= 1
+                addr.next     |= self.conflict_addr_i
+                resolved.next |= 0
+            with phase == 1:
+                marking       |= 1
+                phase.next    |= 2
+            with phase == 2:
+                with at_level_count == 3:
+                    # resolve away the latest one
+                    unset         |= 1
+                    unset_var     |= latest_var
+                    addr.next     |= latest_reason
+                    resolved.next |= latest_var
+                    phase.next    |= 1
+                with (at_level_count == 1) & uip_fits:
+                    uip_var.next      |= latest_var
+                    uip_val.next      |= latest_val
+                    assert_level.next |= max_lower_level
+                    learned_addr.next |= slot
+                    row.next          |= row_start
+                    phase.next        |= 3
+                with pyrtl.otherwise:
+                    # too long (or in use), move on to the next slot for the next one
+                    finished         |= 1
+                    self.done_o      |= 1
+                    learned_ptr.next |= learned_ptr + locked
+                    phase.next       |= 0
+            with phase == 3:
+                with next_lower[-1]:
+                    unset     |= 1
+                    unset_var |= next_lower[:var_bits]
+                    row.next  |= row_shifted
+                with pyrtl.otherwise:
+                    clause_storage.write_enable_i |= 1
+                    finished          |= 1
+                    self.done_o       |= 1
+                    self.learned_o    |= 1
+                    last_addr.next    |= pyrtl.select(slot > last_addr, slot, last_addr)
+                    learned_ptr.next  |= learned_ptr + 1
+                    phase.next        |= 0
+
+        clause_storage.write_addr_i <<= slot
+        clause_storage.write_data_i <<= row
+
+        self.assert_level_o <<= assert_level
+        self.assert_var_o <<= uip_var
+        self.assert_val_o <<= ~uip_val
+        self.assert_reason_o <<= learned_addr
+        self.last_addr_o <<= last_addr
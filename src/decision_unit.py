@@ -0,0 +1,75 @@
+import pyrtl
+from pyrtl import WireVector, Register
+import helpers
+from helpers import wirevector_list
+
+
+# VSIDS style decisions: every variable has an activity counter and we decide on the most active unassigned one
+# hooks onto a VarAssignStore (or BitmapVarAssignStore) built with external_decision, reading its every_assignment
+#
+# exposed wires:
+# Inputs:
+# - bump_i:      send a 1 (for a cycle) when BCP hits a contradiction
+# - bump_vars_i: the variables of the clause that fell over (BCP's conflict_vars_o), each of them gets bumped
+# Outputs:
+# - var_o:       the variable to decide on next, for the store's decide_var_i
+#
+# bumping adds 1 to a counter, saturating at the top. every 2 ** decay_bits contradictions every counter is
+# halved first, so older contradictions count for less and less (halving every 16 is about 0.957 a contradiction,
+# close to the 0.95 software solvers use). a bump that would saturate a counter halves everything early instead,
+# that way the order between variables is kept instead of piling up at the top
+#
+# the pick is a max tree over {unassigned, activity, index}, ties go to the lower variable
+# so before the first contradiction this decides the same way the store does on its own
+
+# the more active of two {valid, activity, index} entries, a on a tie
+def get_most_active(a, b, var_bits):
+    return pyrtl.select(b[var_bits:] > a[var_bits:], b, a)
+
+class ActivityDecider:
+    def __init__(self, var_bits: int, clause_size: int, every_assignment, activity_bits: int = 8, decay_bits: int = 4,
+                 name_prefix = "dec_"):
+        assert activity_bits >= 2, "halving a one bit counter leaves nothing to compare"
+        max_activity = 2 ** activity_bits - 1
+
+        ## inputs ##
+        self.bump_i =      WireVector(bitwidth = 1, name = name_prefix+"bump_i")
+        self.bump_vars_i = wirevector_list(var_bits, name_prefix+"bump_vars_i", clause_size)
+
+        ## outputs ##
+        self.var_o =       WireVector(bitwidth = var_bits, name = name_prefix+"var_o")
+
+        ## internal registers ##
+        conflicts = Register(bitwidth = decay_bits, name = name_prefix+"conflicts") # contradictions since the last decay
+        # variable 0 is padding, it never gets decided on
+        self.activity = [pyrtl.Const(0, bitwidth = activity_bits)] + [
+            Register(bitwidth = activity_bits, name = f"{name_prefix}activity_{i}") for i in range(1, 2 ** var_bits)
+        ]
+
+        ## internal wires ##
+        decay =     WireVector(bitwidth = 1, name = name_prefix+"decay") # halve every counter this cycle
+        saturated = WireVector(bitwidth = 1, name = name_prefix+"saturated") # a bump would go over the top
+        hits =      wirevector_list(1, name_prefix+"hit", 2 ** var_bits)
+
+        ## bumping ##
+        hits[0] <<= 0
+        for i in range(1, 2 ** var_bits):
+            hits[i] <<= self.bump_i & helpers.create_bin_tree([var == i for var in self.bump_vars_i], lambda a, b: a|b)
+        saturated <<= helpers.create_bin_tree(
+            [hits[i] & (self.activity[i] == max_activity) for i in range(1, 2 ** var_bits)], lambda a, b: a|b
+        )
+        decay <<= self.bump_i & ((conflicts == 2 ** decay_bits - 1) | saturated)
+
+        conflicts.next <<= conflicts + self.bump_i
+        for i in range(1, 2 ** var_bits):
+            kept = pyrtl.select(decay, self.activity[i][1:].zero_extended(activity_bits), self.activity[i])
+            # anything that was at the top got halved, so this can't overflow
+            self.activity[i].next <<= (kept + hits[i])[:activity_bits]
+
+        ## picking ##
+        entries = []
+        for i in range(1, 2 ** var_bits):
+            unassigned = every_assignment[i] == 0
+            entries.append(pyrtl.concat(unassigned, self.activity[i], pyrtl.Const(i, bitwidth = var_bits)))
+        most_active = helpers.create_bin_tree(entries, get_most_active, var_bits)
+        self.var_o <<= most_active[:var_bits]
@@ -0,0 +1,244 @@
+import bz2
+import glob
+import gzip
+import itertools
+import lzma
+import re
+import warnings
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# a parsed DIMACS cnf file
+# clauses are kept as lists of signed literals, the same way they're written in the file
+@dataclass
+class CnfInstance:
+    path: str
+    num_vars: int
+    num_clauses: int
+    clauses: List[List[int]] = field(default_factory=list)
+
+    @property
+    def max_clause_len(self) -> int:
+        return max((len(clause) for clause in self.clauses), default=0)
+
+    # does this instance fit into a design of the given size?
+    # variable 0 is reserved for padding so we need strictly less than 2^var_bits variables
+    def fits(self, clause_bits: int, var_bits: int, clause_size: int) -> bool:
+        return (
+            self.num_vars < (1 << var_bits)
+            and len(self.clauses) <= (1 << clause_bits)
+            and self.max_clause_len <= clause_size
+        )
+
+    # the smallest (clause_bits, var_bits, clause_size) that fits() this instance
+    # every field needs at least one bit or the registers end up zero width
+    def design_size(self) -> Tuple[int, int, int]:
+        return (
+            max(1, (len(self.clauses) - 1).bit_length()),
+            max(1, self.num_vars.bit_length()),
+            max(1, self.max_clause_len),
+        )
+
+# cnf files are often shipped compressed, pick the right opener from the extension
+OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+CNF_SUFFIXES = [".cnf"] + [".cnf" + suffix for suffix in OPENERS]
+
+def open_cnf(path):
+    opener = OPENERS.get(Path(path).suffix, open)
+    return opener(path, "rt")
+
+LITERAL = re.compile(r"[+-]?[0-9]+")
+
+# clause lines handed to numpy at a time, so memory use doesn't grow with the file (beyond the clauses themselves)
+CHUNK_LINES = 65536
+
+# splits a chunk of literals into clauses, and returns whatever's left after its last 0 for the next chunk
+# clauses are terminated by 0 rather than by the end of a line, so one can carry on into the next chunk
+def _add_clauses(instance: CnfInstance, literals: np.ndarray, path) -> np.ndarray:
+    if len(literals) == 0:
+        return literals
+    assert np.abs(literals).max() <= instance.num_vars, f"{path}: variable out of range of the header"
+    ends = np.flatnonzero(literals == 0)
+    if len(ends) == 0:
+        return literals
+    values = literals[:ends[-1]].tolist()
+    start = 0
+    for end in ends.tolist():
+        # a bunch of the test cases have empty clauses (a lone 0), we skip them
+        if end > start:
+            instance.clauses.append(values[start:end])
+        start = end + 1
+    return literals[ends[-1] + 1:]
+
+# the file is streamed a line at a time, and the clause lines are handed to numpy chunk_lines at a time
+def parse_dimacs(path, chunk_lines: int = CHUNK_LINES) -> CnfInstance:
+    header = None
+    instance = None
+    chunk = []
+    # the literals of a clause that hasn't had its 0 yet
+    partial = np.zeros(0, dtype=np.int64)
+
+    def add_chunk():
+        nonlocal partial
+        text = "".join(chunk)
+        # numpy reads whitespace separated text much faster than int() one word at a time. but before numpy 2 it stops
+        # at the first word it can't read with only a warning, and it reads some (a lone "-") as part of the next one,
+        # so anything it didn't turn into exactly one literal per word is an error
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                literals = np.fromstring(text, dtype=np.int64, sep=" ")
+        except ValueError:
+            literals = None
+        words = text.split()
+        assert literals is not None and literals.size == len(words), \
+            f"{path}: malformed literal {next((word for word in words if not LITERAL.fullmatch(word)), '')!r}"
+        partial = _add_clauses(instance, np.concatenate([partial, literals]), path)
+        chunk.clear()
+
+    with open_cnf(path) as file:
+        for line in file:
+            first = line.lstrip()[:1]
+            if first == "" or first == "c":
+                continue
+            elif first == "%":
+                # SATLIB files end with a % line and a lone 0
+                break
+            elif first == "p":
+                words = line.split()
+                assert header is None, f"{path}: more than one header"
+                assert words[1] == "cnf", f"{path}: unsupported format {words[1]}"
+                header = (int(words[2]), int(words[3]))
+                instance = CnfInstance(str(path), *header)
+            else:
+                assert header is not None, f"{path}: clause before header"
+                chunk.append(line)
+                if len(chunk) == chunk_lines:
+                    add_chunk()
+
+    assert header is not None, f"{path}: missing header"
+    add_chunk()
+    # a missing 0 after the last clause is fine
+    if len(partial):
+        instance.clauses.append(partial.tolist())
+    return instance
+
+# packs a clause into a ClauseStorage word
+# each literal takes var_bits + 1 bits: the variable id with the negation bit on top
+# the first literal in the clause ends up in the highest slot
+def encode_clause(clause: List[int], var_bits: int) -> int:
+    memval = 0
+    for lit in clause:
+        memval = (memval << (var_bits+1)) + abs(lit)
+        if lit < 0:
+            memval += 1 << var_bits
+    return memval
+
+# memory_value_map entry for ClauseStorage, packs every clause at once
+# same layout as encode_clause: shorter clauses are right aligned and padded out with variable 0
+# with lanes > 1 each word holds that many clauses, clause addr*lanes + i going in lane i (from the bottom)
+def encode_clauses(clauses: List[List[int]], var_bits: int, clause_size: int, lanes: int = 1) -> Dict[int, int]:
+    if len(clauses) == 0:
+        return {}
+    lengths = np.fromiter(map(len, clauses), dtype=np.int64, count=len(clauses))
+    assert lengths.max() <= clause_size
+    literals = np.fromiter(itertools.chain.from_iterable(clauses), dtype=np.int64, count=int(lengths.sum()))
+
+    # each literal becomes its own field, negation bit on top of the variable id
+    lit_fields = np.abs(literals) | ((literals < 0).astype(np.int64) << var_bits)
+
+    # scatter the fields into a [clause, slot] table, slot 0 being the lowest bits of the word
+    rows = np.repeat(np.arange(len(clauses)), lengths)
+    position = np.arange(len(literals)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    slots = np.zeros((len(clauses), clause_size), dtype=np.int64)
+    slots[rows, lengths[rows] - 1 - position] = lit_fields
+
+    # pack as many slots as fit into an int64 at a time
+    # words wider than that are stitched together out of python ints, one chunk at a time
+    chunk_size = max(1, 63 // (var_bits + 1))
+    shifts = np.arange(chunk_size) * (var_bits + 1)
+    words = None
+    for chunk_start in range(0, clause_size, chunk_size):
+        chunk = slots[:, chunk_start:chunk_start + chunk_size]
+        packed = (chunk << shifts[:chunk.shape[1]]).sum(axis=1)
+        if words is None:
+            words = packed
+        else:
+            words = words.astype(object) + (packed.astype(object) << (chunk_start * (var_bits + 1)))
+
+    if lanes > 1:
+        clause_width = (var_bits + 1) * clause_size
+        rows = -(-len(clauses) // lanes)
+        lane_words = np.zeros(rows * lanes, dtype=words.dtype if clause_width * lanes <= 63 else object)
+        lane_words[:len(clauses)] = words
+        lane_words = lane_words.reshape(rows, lanes)
+        words = lane_words[:, 0]
+        for lane in range(1, lanes):
+            words = words + (lane_words[:, lane] << (lane * clause_width))
+    return dict(enumerate(words.tolist()))
+
+# memory_value_map entries for OccurrenceBCP's occurrence index and occurrence list
+# every literal (var*2 + negated) gets the slice [start, end) of the list, packed as {end, start} in its index word
+# literal 0 gets every unit clause
+def encode_occurrences(clauses: List[List[int]], var_bits: int, occ_bits: int) -> Tuple[Dict[int, int], Dict[int, int]]:
+    lengths = np.fromiter(map(len, clauses), dtype=np.int64, count=len(clauses))
+    literals = np.fromiter(itertools.chain.from_iterable(clauses), dtype=np.int64, count=int(lengths.sum()))
+    clause_addrs = np.repeat(np.arange(len(clauses)), lengths)
+    lit_indices = (np.abs(literals) << 1) | (literals < 0)
+
+    units = np.flatnonzero(lengths == 1)
+    lit_indices = np.concatenate((np.zeros(len(units), dtype=np.int64), lit_indices))
+    clause_addrs = np.concatenate((units, clause_addrs))
+    assert len(lit_indices) < (1 << occ_bits), "too many occurrences for the occurrence list"
+
+    # a stable sort keeps each literal's clauses in clause order
+    order = np.argsort(lit_indices, kind="stable")
+    counts = np.bincount(lit_indices, minlength=1 << (var_bits + 1))
+    assert len(counts) == 1 << (var_bits + 1), "variable out of range of var_bits"
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    index = dict(enumerate(((ends << occ_bits) | starts).tolist()))
+    occurrences = dict(enumerate(clause_addrs[order].tolist()))
+    return index, occurrences
+
+# memory_value_map entry for VarAssignStore: every variable unassigned, tagged with its own address
+def initial_var_mem(var_bits: int) -> Dict[int, int]:
+    addrs = np.arange(1 << var_bits, dtype=np.int64)
+    return dict(enumerate((addrs << (3+var_bits)).tolist()))
+
+# the clauses a model leaves false, by index, checked with numpy over every literal at once
+# values[var] is 0 or 1, or None for unassigned (which makes no literal true), index 0 unused
+def unsatisfied_clauses(clauses: List[List[int]], values: List[Optional[int]]) -> List[int]:
+    if len(clauses) == 0:
+        return []
+    lengths = np.fromiter(map(len, clauses), dtype=np.int64, count=len(clauses))
+    literals = np.fromiter(itertools.chain.from_iterable(clauses), dtype=np.int64, count=int(lengths.sum()))
+    vals = np.array([-1 if val is None else val for val in values], dtype=np.int64)
+    true = vals[np.abs(literals)] == (literals > 0)
+    # any true literal in each clause, empty clauses (if there are any) can't be satisfied
+    starts = np.cumsum(lengths) - lengths
+    satisfied = np.zeros(len(clauses), dtype=bool)
+    nonempty = lengths > 0
+    satisfied[nonempty] = np.logical_or.reduceat(true, starts[nonempty])
+    return np.flatnonzero(~satisfied).tolist()
+
+# a model as a DIMACS solution line: every variable up to num_vars, negated if it's false, then 0
+def model_line(values: List[Optional[int]], num_vars: int) -> str:
+    return " ".join(["v"] + [str(var if values[var] else -var) for var in range(1, num_vars + 1)] + ["0"])
+
+# finds every cnf file in a directory, or matching a glob
+def find_instances(pattern: str) -> List[Path]:
+    path = Path(pattern)
+    if path.is_dir():
+        return sorted(match for suffix in CNF_SUFFIXES for match in path.rglob("*" + suffix))
+    if path.is_file():
+        return [path]
+    return sorted(Path(match) for match in glob.glob(pattern, recursive=True))
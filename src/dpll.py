@@ -1,11 +1,18 @@
 import pyrtl
+import backends
 import helpers
 from pyrtl import WireVector, Register
 from helpers import wirevector_list, connect_wire_lists, map_wires
 from clause_resolver import ClauseResolver
 from clause_storage import ClauseStorage
 from bcp import BCP
+from occurrence_bcp import OccurrenceBCP
+from pipelined_bcp import PipelinedBCP
 from var_assign_store import VarAssignStore
+from bitmap_store import BitmapVarAssignStore
+from conflict_analyzer import ConflictAnalyzer
+from decision_unit import ActivityDecider
+from trail import TrailStack
 from consts import CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE
 import io
 
@@ -20,161 +27,513 @@ def get_assigned_bit(a):
     ans <<= a[0]
     return ans
 
+# handle to an elaborated design
+# everything lives in its own block, so several designs (of different sizes) can exist side by side
+# exposed:
+#  * block:            the pyrtl block holding the design, pass it to the simulation
+#  * var_mem:          variable memory (VarAssignStore.mem), with flash undo a word only counts while the store's
+#                      live bit for it is set. the bitmap store mirrors part of every word in registers, so it
+#                      can only be loaded from a memory where nothing's assigned
+#  * clause_mem:       clause memory (ClauseStorage.mem)
+#  * sat, done:        outputs
+#  * decisions:        output, how many decisions have been made so far
+#  * conflicts:        output, how many contradictions BCP has hit so far
+#  * backtrack_cycles: output, how many cycles have gone on backtracking and backjumping
+#  * occ_index_mem, occ_list_mem: occurrence lists, only with the occurrence engine (None otherwise)
+#  * var_assign_store, bcp: the submodules themselves (var_assign_store is a BitmapVarAssignStore with the bitmap store)
+#  * analyzer:         the ConflictAnalyzer, only with cdcl (None otherwise)
+#  * decider:          the ActivityDecider, only with activity decisions (None otherwise)
+#  * trail:            the TrailStack, only when undoing off the trail (None otherwise)
+# clause_bits is the size of the instance, with cdcl the clause memory is twice that for the learned clauses
+class DpllDesign:
+    def __init__(self, block: pyrtl.Block, clause_bits: int, var_bits: int, clause_size: int, lanes: int, engine: str,
+                 wrap_around: bool, cdcl: bool, decision: str, polarity: str, undo: str, store: str, var_assign_store: VarAssignStore,
+                 bcp, analyzer, decider, trail, sat: pyrtl.Output, done: pyrtl.Output, decisions: pyrtl.Output, conflicts: pyrtl.Output,
+                 backtrack_cycles: pyrtl.Output):
+        self.block = block
+        self.clause_bits = clause_bits
+        self.var_bits = var_bits
+        self.clause_size = clause_size
+        self.lanes = lanes
+        self.engine = engine
+        self.wrap_around = wrap_around
+        self.cdcl = cdcl
+        self.decision = decision
+        self.polarity = polarity
+        self.undo = undo
+        self.store = store
+
+        self.var_assign_store = var_assign_store
+        self.bcp = bcp
+        self.analyzer = analyzer
+        self.decider = decider
+        self.trail = trail
+        self.var_mem = var_assign_store.mem
+        self.clause_mem = bcp.clause_storage.mem
+        self.occ_index_mem = getattr(bcp, "occ_index_mem", None)
+        self.occ_list_mem = getattr(bcp, "occ_list_mem", None)
+
+        self.sat = sat
+        self.done = done
+        self.decisions = decisions
+        self.conflicts = conflicts
+        self.backtrack_cycles = backtrack_cycles
+
 ##################### DPLL starts here #####################
-sat = pyrtl.Output(bitwidth=1, name='sat')
-done = pyrtl.Output(bitwidth=1, name='done')
-
-# STATES
-# 00: Assign/Start
-# 01: BCP
-# 10: Backtrack
-# 11: Done
-dpll_state = pyrtl.Register(bitwidth=2, name="dpll_state")
-prev_state = pyrtl.Register(bitwidth=2, name="prev_state")
-new_dpll_state = pyrtl.WireVector(bitwidth=2, name="new_dpll_state")
-curr_level = pyrtl.Register(bitwidth=VAR_BITS+1, name="curr_level")
-next_level = pyrtl.WireVector(bitwidth=VAR_BITS+1, name="next_level")
-
-sat_state = pyrtl.Register(bitwidth=1, name="sat_state")
-next_sat_state = pyrtl.WireVector(bitwidth=1, name="next_sat_state")
-
-backtrack_write_val = pyrtl.WireVector(bitwidth = 4 + 2*VAR_BITS, name="backtrack_write_val")
-backtrack_write_enable = pyrtl.WireVector(bitwidth=1, name="backtrack_write_enable")
-
-var_assign_store = VarAssignStore(CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE)
-
-# hi jon i didn't want to write this
-every_assigned_bit = map_wires(var_assign_store.every_memory_value, get_assigned_bit)
-every_assigned_bit_with_names = wirevector_list(1, "every_assigned_bit_with_names", 2 ** VAR_BITS)
-connect_wire_lists(every_assigned_bit_with_names, every_assigned_bit)
-
-every_val_bit = map_wires(var_assign_store.every_memory_value, get_val_bit)
-every_val_bit_with_names = wirevector_list(1, "every_val_bit_with_names", 2 ** VAR_BITS)
-connect_wire_lists(every_val_bit_with_names, every_val_bit)
-
-# set up BCP to default values
-bcp = BCP(CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE)
-# connect the bcp up to var assign store
-raw_bcp_varassigns = wirevector_list(4 + VAR_BITS * 2, "raw_bcp_varassigns", CLAUSE_SIZE)
-bcp_to_write = WireVector(4 + VAR_BITS * 2, "bcp_to_write")
-connect_wire_lists(
-    raw_bcp_varassigns,
-    map_wires(bcp.va_addrs_o, lambda x: var_assign_store.mem[x])
-)
-connect_wire_lists(
-    bcp.var_vals_i,
-    map_wires(raw_bcp_varassigns, lambda x: x[1])
-)
-connect_wire_lists(
-    bcp.var_assigned_i,
-    map_wires(raw_bcp_varassigns, lambda x: x[0])
-)
-bcp_to_write <<= pyrtl.concat(bcp.va_write_addr_o, curr_level, bcp.va_write_val_o, pyrtl.Const(1, bitwidth=1))
-var_assign_store.mem[bcp.va_write_addr_o] <<= pyrtl.MemBlock.EnabledWrite(
-    bcp_to_write, enable=bcp.va_write_enable_o
-)
-
-with pyrtl.conditional_assignment:
-    with dpll_state == 0:
-        # assign/start
-        var_assign_store.start |= 1
-        var_assign_store.level |= 0
-
-        #see what we get
-        with var_assign_store.sat:
-            new_dpll_state |= 3
-            next_sat_state |= 1
-            sat |= 1
-            done |= 1
-        with var_assign_store.ready_bcp:
-            new_dpll_state |= 1
-            next_sat_state |= 0
-            sat |= 0
-            done |= 0
-            next_level |= curr_level
-        with var_assign_store.needs_backtrack:
-            new_dpll_state |= 2
-            next_sat_state |= 0
-            sat |= 0
-            done |= 0
-            next_level |= curr_level
-        with var_assign_store.unsat:
-            new_dpll_state |= 3
-            next_sat_state |= 0
-            sat |= 0
-            done |= 1
-
-    with dpll_state == 1:
-        with ~bcp.active_o & (prev_state != 1):
-            # first cycle, start it up
-            bcp.start_i |= 1
-            new_dpll_state |= 1
-            next_level |= curr_level
-        with bcp.active_o:
-            # still running
-            new_dpll_state |= 1
-            next_level |= curr_level
-        with ~bcp.active_o & (prev_state == 1):
-            # finished
-            with bcp.status_o:
-                # failed
-                new_dpll_state |= 2
-                next_level |= curr_level
-            with pyrtl.otherwise:
-                # suceeded
-                new_dpll_state |= 0
-                next_level |= curr_level + 1
-
-        next_sat_state |= 0
-        sat |= 0
-        done |= 0
-    with dpll_state == 2:
-        # backtrack
-        with var_assign_store.has_current_level:
-            backtrack_write_enable |= 1
-            next_level |= curr_level
-            with ~var_assign_store.currlevel_check[3+VAR_BITS * 2]:
-                # it's not the root
-                backtrack_write_val |= pyrtl.concat(var_assign_store.current_level_addr, pyrtl.Const(0, bitwidth=3+VAR_BITS))
-                new_dpll_state |= 2
-            with pyrtl.otherwise:
-                # it's the root
-                with ~var_assign_store.currlevel_check[1]:
-                    # it was a 0, set it to 1 and bcp again
-                    backtrack_write_val |= pyrtl.concat(pyrtl.Const(1, bitwidth=1), var_assign_store.current_level_addr, curr_level, pyrtl.Const(0b11, bitwidth=2))
+# propagation engines:
+#  * scan:       BCP, sweeps every clause until nothing changes. lanes is how many clauses it looks at per cycle
+#  * occurrence: OccurrenceBCP, only visits the clauses containing a literal that was just made false
+#  * pipelined:  PipelinedBCP, the same sweep as scan (one lane) split over four stages for a shorter clock period
+ENGINES = ["scan", "occurrence", "pipelined"]
+
+# decision heuristics:
+#  * static:   the lowest unassigned variable, out of the VarAssignStore
+#  * activity: ActivityDecider, the unassigned variable that's been in the most contradictions lately
+DECISIONS = ["static", "activity"]
+
+# the value a decision tries first (the other one comes from backtracking), see var_assign_store.py:
+#  * zero, one: always that
+#  * saved:     whatever the variable had last, phase saving
+#  * random:    from an LFSR
+POLARITIES = ["zero", "one", "saved", "random"]
+
+# how backtracking (and backjumping) finds what to undo:
+#  * scan:  the VarAssignStore's currlevel_check, a tree over every variable for something at the current level,
+#           one cleared a cycle and a cycle to step down each level
+#  * trail: TrailStack, every assignment pushed in order along with where each level starts. backtracking pops
+#           straight off the top, up to pop_width (2) a cycle, and a backjump pops straight down to the assert level
+#           the first entry on a level is its decision, so the root comes from where it sits rather than its is_root bit
+#  * flash: the VarAssignStore flash clears a whole level (and everything above it) in one cycle, while the root of
+#           the level (kept per level as decisions are made) gets its next value. a backjump is one cycle to clear
+#           everything above the assert level and one for the UIP
+UNDOS = ["scan", "trail", "flash"]
+
+# where the variable words live:
+#  * memory: VarAssignStore, every decision and check is a tree over every word, so the memory has a read port
+#            per variable on top of everything else
+#  * bitmap: BitmapVarAssignStore, the assigned and val bits of every word are mirrored into two registers and the
+#            checks work off those, leaving the memory a few ports. there's no level in the mirror, so it can only
+#            undo off the trail and can't do cdcl (the analyzer reads every word)
+STORES = ["memory", "bitmap"]
+
+# wrap_around only applies to scan and pipelined, see bcp.py
+#
+# cdcl swaps chronological backtracking for conflict driven clause learning:
+#  * level 0 only holds what BCP gets out of the instance before any decision, a contradiction there is unsat
+#  * any other contradiction goes to the ConflictAnalyzer, which writes a 1-UIP clause into the learned half
+#    of the clause memory (BCP sweeps both halves)
+#  * then we backjump: clear every level above the clause's assert level and imply the UIP there, reason and all
+#  * if the clause couldn't be learned (too long for clause_size, or its slot is some variable's reason) we fall
+#    back to the usual chronological backtrack for that contradiction
+# a decision only ever gets its first value, a backjump is what gets the other one
+def build_dpll(clause_bits: int = CLAUSE_BITS, var_bits: int = VAR_BITS, clause_size: int = CLAUSE_SIZE, lanes: int = 1,
+               engine: str = "scan", wrap_around: bool = False, cdcl: bool = False, decision: str = "static",
+               polarity: str = "zero", undo: str = "scan", store: str = "memory") -> DpllDesign:
+    assert engine in ENGINES, f"unknown engine {engine}, expected one of {ENGINES}"
+    assert decision in DECISIONS, f"unknown decision heuristic {decision}, expected one of {DECISIONS}"
+    assert polarity in POLARITIES, f"unknown polarity {polarity}, expected one of {POLARITIES}"
+    assert undo in UNDOS, f"unknown undo {undo}, expected one of {UNDOS}"
+    assert store in STORES, f"unknown store {store}, expected one of {STORES}"
+    assert store == "memory" or (undo == "trail" and not cdcl), "the bitmap store needs trail undo and no cdcl"
+    assert engine == "scan" or lanes == 1, "only the scan engine has lanes"
+    assert engine != "occurrence" or not wrap_around, "the occurrence engine doesn't scan, so it can't wrap around"
+    assert not cdcl or (engine != "occurrence" and lanes == 1), "cdcl needs a scanning engine with one lane"
+    bcp_bits = clause_bits + 1 if cdcl else clause_bits
+    block = pyrtl.Block()
+    with pyrtl.set_working_block(block, no_sanity_check=True):
+        sat = pyrtl.Output(bitwidth=1, name='sat')
+        done = pyrtl.Output(bitwidth=1, name='done')
+        decisions = pyrtl.Output(bitwidth=32, name='decisions')
+        conflicts = pyrtl.Output(bitwidth=32, name='conflicts')
+        backtrack_cycles = pyrtl.Output(bitwidth=32, name='backtrack_cycles')
+
+        # STATES
+        # 00: Assign/Start
+        # 01: BCP
+        # 10: Backtrack
+        # 11: Done
+        # cdcl only (and it starts in BCP, level 0 doesn't get a decision):
+        # 100: Learn
+        # 101: Backjump
+        state_bits = 3 if cdcl else 2
+        dpll_state = pyrtl.Register(bitwidth=state_bits, name="dpll_state", reset_value=1 if cdcl else 0)
+        prev_state = pyrtl.Register(bitwidth=state_bits, name="prev_state")
+        new_dpll_state = pyrtl.WireVector(bitwidth=state_bits, name="new_dpll_state")
+        curr_level = pyrtl.Register(bitwidth=var_bits+1, name="curr_level")
+        next_level = pyrtl.WireVector(bitwidth=var_bits+1, name="next_level")
+
+        sat_state = pyrtl.Register(bitwidth=1, name="sat_state")
+        next_sat_state = pyrtl.WireVector(bitwidth=1, name="next_sat_state")
+
+        store_class = BitmapVarAssignStore if store == "bitmap" else VarAssignStore
+        var_assign_store = store_class(
+            clause_bits, var_bits, clause_size, lanes=lanes, reason_bits=bcp_bits if cdcl else 0,
+            external_decision=decision != "static", polarity=polarity,
+            backtrack_ports=TrailStack.POP_WIDTH if undo == "trail" else 1, flash_clear=undo == "flash"
+        )
+
+        backtrack_write_addr = pyrtl.WireVector(bitwidth = var_bits, name="backtrack_write_addr")
+        backtrack_write_val = pyrtl.WireVector(bitwidth = var_assign_store.word_bits, name="backtrack_write_val")
+        backtrack_write_enable = pyrtl.WireVector(bitwidth=1, name="backtrack_write_enable")
+
+        # hi jon i didn't want to write this
+        every_assigned_bit = map_wires(var_assign_store.every_assignment, get_assigned_bit)
+        every_assigned_bit_with_names = wirevector_list(1, "every_assigned_bit_with_names", 2 ** var_bits)
+        connect_wire_lists(every_assigned_bit_with_names, every_assigned_bit)
+
+        every_val_bit = map_wires(var_assign_store.every_assignment, get_val_bit)
+        every_val_bit_with_names = wirevector_list(1, "every_val_bit_with_names", 2 ** var_bits)
+        connect_wire_lists(every_val_bit_with_names, every_val_bit)
+
+        # set up BCP to default values
+        if engine == "scan":
+            bcp = BCP(bcp_bits, var_bits, clause_size, lanes=lanes, wrap_around=wrap_around, learned=cdcl)
+        elif engine == "pipelined":
+            bcp = PipelinedBCP(bcp_bits, var_bits, clause_size, wrap_around=wrap_around, learned=cdcl)
+        else:
+            bcp = OccurrenceBCP(clause_bits, var_bits, clause_size)
+        # connect the bcp up to var assign store
+        raw_bcp_varassigns = wirevector_list(var_assign_store.word_bits, "raw_bcp_varassigns", clause_size * lanes)
+        bcp_to_write = WireVector(var_assign_store.word_bits, "bcp_to_write")
+        connect_wire_lists(
+            raw_bcp_varassigns,
+            map_wires(bcp.va_addrs_o, var_assign_store.read)
+        )
+        connect_wire_lists(
+            bcp.var_vals_i,
+            map_wires(raw_bcp_varassigns, lambda x: x[1])
+        )
+        connect_wire_lists(
+            bcp.var_assigned_i,
+            map_wires(raw_bcp_varassigns, lambda x: x[0])
+        )
+        if cdcl:
+            # where the next thing BCP implies goes on the trail
+            next_pos = pyrtl.Register(bitwidth=var_bits, name="next_pos", reset_value=1)
+            bcp_to_write <<= var_assign_store.assignment(
+                bcp.va_write_addr_o, bcp.va_write_val_o, curr_level, 0, next_pos, bcp.reason_o
+            )
+
+            analyzer = ConflictAnalyzer(clause_bits, var_bits, clause_size, var_assign_store, bcp.clause_storage)
+            analyzer.conflict_addr_i <<= bcp.reason_o
+            analyzer.level_i <<= curr_level
+            bcp.last_addr_i <<= analyzer.last_addr_o
+            # UIP goes back in at the assert level, straight after everything that's left
+            assert_write_val = var_assign_store.assignment(
+                analyzer.assert_var_o, analyzer.assert_val_o, analyzer.assert_level_o, 0,
+                (var_assign_store.latest_pos + 1)[:var_bits], analyzer.assert_reason_o
+            )
+        else:
+            analyzer = None
+            bcp_to_write <<= var_assign_store.assignment(bcp.va_write_addr_o, bcp.va_write_val_o, curr_level, 0)
+        var_assign_store.write(bcp.va_write_addr_o, bcp_to_write, bcp.va_write_enable_o)
+
+        if decision == "activity":
+            # every contradiction bumps the clause that fell over, cdcl or not
+            decider = ActivityDecider(var_bits, clause_size, var_assign_store.every_assignment)
+            decider.bump_i <<= bcp.status_o
+            connect_wire_lists(decider.bump_vars_i, bcp.conflict_vars_o)
+            var_assign_store.decide_var_i <<= decider.var_o
+        else:
+            decider = None
+
+        # the thing at the current level to undo next
+        if undo == "trail":
+            trail = TrailStack(var_bits)
+            # words for the top of the trail, the first one is the next to go
+            trail_words = map_wires(trail.top_vars_o, var_assign_store.read)
+            # entries from the start of trail.level_i up: curr_level, or above the assert level in a backjump
+            trail_above = WireVector(bitwidth=var_bits, name="trail_above")
+            trail_above <<= trail.ptr_o - trail.level_start_o
+            # extra write ports, for clearing whatever's under the top entry
+            undo_write_addrs = wirevector_list(var_bits, "undo_write_addr", trail.pop_width - 1)
+            undo_write_enables = wirevector_list(1, "undo_write_enable", trail.pop_width - 1)
+
+            # take up to pop_width of the n entries on top off (only inside the conditional below)
+            def pop_trail(n):
+                trail.pop_i |= pyrtl.select(n > trail.pop_width, pyrtl.Const(trail.pop_width), n)[:trail.pop_i.bitwidth]
+                for k in range(1, trail.pop_width):
+                    undo_write_enables[k - 1] |= n > k
+            has_current_level = trail_above != 0
+            currlevel_addr = trail.top_vars_o[0]
+            currlevel_word = trail_words[0]
+            currlevel_root = trail_above == 1
+        elif undo == "flash":
+            trail = None
+            # the decision that started each level, the only thing on a level that ever needs to be looked at
+            level_roots = pyrtl.MemBlock(
+                bitwidth=var_bits, addrwidth=var_bits+1, name="Level Roots", max_read_ports=1, max_write_ports=1,
+                asynchronous=True
+            )
+            level_roots[curr_level] <<= pyrtl.MemBlock.EnabledWrite(
+                var_assign_store.decision_var, (dpll_state == 0) & var_assign_store.ready_bcp
+            )
+            currlevel_addr = level_roots[curr_level]
+            currlevel_word = var_assign_store.read(currlevel_addr)
+            has_current_level = (currlevel_word[2:3+var_bits] == curr_level) & (currlevel_word[0] | currlevel_word[1])
+            currlevel_root = pyrtl.Const(1, bitwidth=1)
+        else:
+            trail = None
+            has_current_level = var_assign_store.has_current_level
+            currlevel_addr = var_assign_store.current_level_addr
+            currlevel_word = var_assign_store.currlevel_check
+            currlevel_root = currlevel_word[3+var_bits * 2]
+        currlevel_assigned = currlevel_word[0]
+        currlevel_flipped = var_assign_store.flipped_root(currlevel_word)
+        currlevel_cleared = var_assign_store.cleared(currlevel_word)
+        if cdcl:
+            # the UIP goes in once everything above the assert level is gone
+            if undo == "trail":
+                uip_write = (dpll_state == 5) & (trail_above == 0)
+            elif undo == "flash":
+                # after the cycle that cleared everything
+                uip_write = (dpll_state == 5) & (prev_state == 5)
+            else:
+                uip_write = (dpll_state == 5) & (curr_level == analyzer.assert_level_o)
+
+        with pyrtl.conditional_assignment:
+            with dpll_state == 0:
+                # assign/start
+                var_assign_store.start |= 1
+                var_assign_store.level |= curr_level
+
+                #see what we get
+                with var_assign_store.sat:
+                    new_dpll_state |= 3
+                    next_sat_state |= 1
+                    sat |= 1
+                    done |= 1
+                with var_assign_store.ready_bcp:
+                    new_dpll_state |= 1
+                    next_sat_state |= 0
+                    sat |= 0
+                    done |= 0
+                    next_level |= curr_level
+                with var_assign_store.needs_backtrack:
+                    new_dpll_state |= 2
+                    next_sat_state |= 0
+                    sat |= 0
+                    done |= 0
+                    next_level |= curr_level
+                with var_assign_store.unsat:
+                    new_dpll_state |= 3
+                    next_sat_state |= 0
+                    sat |= 0
+                    done |= 1
+
+            with dpll_state == 1:
+                with ~bcp.active_o & (prev_state != 1):
+                    # first cycle, start it up
+                    bcp.start_i |= 1
                     new_dpll_state |= 1
+                    next_level |= curr_level
+                with bcp.active_o:
+                    # still running
+                    new_dpll_state |= 1
+                    next_level |= curr_level
+                with ~bcp.active_o & (prev_state == 1):
+                    # finished
+                    with bcp.status_o:
+                        # failed
+                        if cdcl:
+                            with curr_level == 0:
+                                # nothing was decided to get here
+                                new_dpll_state |= 3
+                            with pyrtl.otherwise:
+                                analyzer.start_i |= 1
+                                new_dpll_state |= 4
+                                next_level |= curr_level
+                        else:
+                            new_dpll_state |= 2
+                            next_level |= curr_level
+                    with pyrtl.otherwise:
+                        # suceeded
+                        new_dpll_state |= 0
+                        next_level |= curr_level + 1
+
+                next_sat_state |= 0
+                sat |= 0
+                done |= 0
+            with dpll_state == 2:
+                # backtrack
+                # the store (or the trail) hands us everything there is at this level, implications before the root
+                var_assign_store.level |= curr_level
+                with pyrtl.Const(int(cdcl)) & (curr_level == 0):
+                    # cdcl has no root at level 0, we've run out of decisions to flip
+                    new_dpll_state |= 3
+                with has_current_level:
+                    backtrack_write_enable |= 1
+                    backtrack_write_addr |= currlevel_addr
+                    if undo == "flash":
+                        # the rest of the level goes all at once, whatever the root gets written with wins
+                        var_assign_store.flash_i |= 1
+                        var_assign_store.flash_level_i |= curr_level
+                    with ~currlevel_root:
+                        # it's not the root
+                        backtrack_write_val |= currlevel_cleared
+                        new_dpll_state |= 2
+                        next_level |= curr_level
+                        if undo == "trail":
+                            # along with whatever else is above the root, up to pop_width of them
+                            pop_trail(trail_above - 1)
+                    with currlevel_assigned & ~currlevel_flipped:
+                        # it's the root on its first value, give it the other one and bcp again
+                        # (keeping the rest of the word, cdcl needs its pos)
+                        backtrack_write_val |= var_assign_store.flip(currlevel_word)
+                        new_dpll_state |= 1
+                        next_level |= curr_level
+                    with currlevel_assigned:
+                        # it's the root on its second value, set it to bad state and go to assign
+                        # assign will send us back here (or report unsat at level 0)
+                        backtrack_write_val |= pyrtl.concat(currlevel_word[2:], pyrtl.Const(0b10, bitwidth=2))
+                        new_dpll_state |= 0
+                        next_level |= curr_level
+                    with pyrtl.otherwise:
+                        # it's a root in bad state, both values failed so clear it and keep going one level up
+                        backtrack_write_val |= currlevel_cleared
+                        new_dpll_state |= 2
+                        next_level |= curr_level - 1
+                        if undo == "trail":
+                            trail.pop_i |= 1
+
                 with pyrtl.otherwise:
-                    # it was a 1, set it to bad state and go to assign
-                    backtrack_write_val |= pyrtl.concat(pyrtl.Const(1, bitwidth=1), var_assign_store.current_level_addr, curr_level, pyrtl.Const(0b10, bitwidth=2))
                     new_dpll_state |= 0
+                    next_level |= curr_level - 1
+                next_sat_state |= 0
+                sat |= 0
+                done |= 0
+            with dpll_state == 3:
+                # done, stay in this state
+                new_dpll_state |= 3
+                next_sat_state |= sat_state
+                sat |= sat_state
+                done |= 1
+            if cdcl:
+                with dpll_state == 4:
+                    # learn, wait for the analyzer
+                    with analyzer.done_o & analyzer.learned_o:
+                        new_dpll_state |= 5
+                    with analyzer.done_o:
+                        new_dpll_state |= 2
+                    with pyrtl.otherwise:
+                        new_dpll_state |= 4
+                    next_level |= curr_level
+                    next_sat_state |= 0
+                with dpll_state == 5:
+                    # backjump, clear out everything above the assert level then imply the UIP
+                    var_assign_store.level |= curr_level
+                    with uip_write:
+                        backtrack_write_enable |= 1
+                        backtrack_write_addr |= analyzer.assert_var_o
+                        backtrack_write_val |= assert_write_val
+                        new_dpll_state |= 1
+                        next_level |= analyzer.assert_level_o
+                    if undo == "flash":
+                        with pyrtl.otherwise:
+                            var_assign_store.flash_i |= 1
+                            var_assign_store.flash_level_i |= analyzer.assert_level_o + 1
+                            new_dpll_state |= 5
+                            next_level |= curr_level
+                    else:
+                        with has_current_level:
+                            backtrack_write_enable |= 1
+                            backtrack_write_addr |= currlevel_addr
+                            backtrack_write_val |= currlevel_cleared
+                            new_dpll_state |= 5
+                            next_level |= curr_level
+                            if undo == "trail":
+                                # everything down to the assert level comes off, no matter which level it's on
+                                pop_trail(trail_above)
+                        with pyrtl.otherwise:
+                            new_dpll_state |= 5
+                            next_level |= curr_level - 1
+                    next_sat_state |= 0
+
+        var_assign_store.write(backtrack_write_addr, backtrack_write_val, backtrack_write_enable)
 
-        with pyrtl.otherwise:
-            new_dpll_state |= 0
-            next_level |= curr_level - 1
-        next_sat_state |= 0
-        sat |= 0
-        done |= 0
-    with dpll_state == 3:
-        # done, stay in this state
-        new_dpll_state |= 3
-        next_sat_state |= sat_state
-        sat |= sat_state
-        done |= 1
-
-var_assign_store.mem[var_assign_store.current_level_addr] <<= pyrtl.MemBlock.EnabledWrite(
-    backtrack_write_val,
-    backtrack_write_enable
-)
-
-dpll_state.next <<= new_dpll_state
-prev_state.next <<= dpll_state
-curr_level.next <<= next_level
-sat_state.next <<= next_sat_state
+        if undo == "trail":
+            # the top entry goes through the backtrack port above, the rest get cleared here
+            for k in range(1, trail.pop_width):
+                undo_write_addrs[k - 1] <<= trail.top_vars_o[k]
+                var_assign_store.write(
+                    undo_write_addrs[k - 1], var_assign_store.cleared(trail_words[k]), undo_write_enables[k - 1]
+                )
+            # everything assigned goes on top: decisions (starting their level), implications and UIPs
+            if cdcl:
+                trail.level_i <<= pyrtl.select(dpll_state == 5, analyzer.assert_level_o + 1, curr_level)
+            else:
+                trail.level_i <<= curr_level
+            with pyrtl.conditional_assignment:
+                with bcp.va_write_enable_o:
+                    trail.push_i |= 1
+                    trail.push_var_i |= bcp.va_write_addr_o
+                with (dpll_state == 0) & var_assign_store.ready_bcp:
+                    trail.push_i |= 1
+                    trail.push_var_i |= var_assign_store.decision_var
+                    trail.mark_i |= 1
+                if cdcl:
+                    with uip_write:
+                        trail.push_i |= 1
+                        trail.push_var_i |= analyzer.assert_var_o
+
+        if engine == "occurrence":
+            # the occurrence engine needs to know what was assigned right before it starts:
+            # either the decision from assign or the root that backtrack just flipped
+            trigger_var = pyrtl.Register(bitwidth=var_bits, name="trigger_var")
+            trigger_val = pyrtl.Register(bitwidth=1, name="trigger_val")
+            with pyrtl.conditional_assignment:
+                with (dpll_state == 0) & var_assign_store.ready_bcp:
+                    trigger_var.next |= var_assign_store.decision_var
+                    trigger_val.next |= var_assign_store.decision_val
+                with (dpll_state == 2) & has_current_level & currlevel_root & currlevel_assigned & ~currlevel_flipped:
+                    trigger_var.next |= currlevel_addr
+                    trigger_val.next |= ~currlevel_word[1]
+            bcp.trigger_var_i <<= trigger_var
+            bcp.trigger_val_i <<= trigger_val
+
+        dpll_state.next <<= new_dpll_state
+        prev_state.next <<= dpll_state
+        curr_level.next <<= next_level
+        sat_state.next <<= next_sat_state
+
+        decision_count = pyrtl.Register(bitwidth=32, name="decision_count")
+        decision_count.next <<= decision_count + ((dpll_state == 0) & var_assign_store.ready_bcp)
+        decisions <<= decision_count
+        conflict_count = pyrtl.Register(bitwidth=32, name="conflict_count")
+        conflict_count.next <<= conflict_count + bcp.status_o
+        conflicts <<= conflict_count
+        backtrack_count = pyrtl.Register(bitwidth=32, name="backtrack_count")
+        undoing = (dpll_state == 2) | (dpll_state == 5) if cdcl else dpll_state == 2
+        backtrack_count.next <<= backtrack_count + undoing
+        backtrack_cycles <<= backtrack_count
+
+        if cdcl:
+            with pyrtl.conditional_assignment:
+                with (dpll_state == 1) & (prev_state != 1):
+                    # BCP hasn't started writing yet, and anything cleared the cycle before is gone by now
+                    # (a flash clear goes along with the write that flips a root)
+                    next_pos.next |= var_assign_store.latest_pos + 1
+                with dpll_state == 1:
+                    next_pos.next |= next_pos + bcp.va_write_enable_o
+                with pyrtl.otherwise:
+                    # a decision or the UIP going in this cycle takes up a spot
+                    took_spot = ((dpll_state == 0) & var_assign_store.ready_bcp) | uip_write
+                    next_pos.next |= var_assign_store.latest_pos + 1 + took_spot
+
+        var_assign_store.finish_writes()
+
+    return DpllDesign(
+        block, clause_bits, var_bits, clause_size, lanes, engine, wrap_around, cdcl, decision, polarity, undo, store, var_assign_store,
+        bcp, analyzer, decider, trail, sat, done, decisions, conflicts, backtrack_cycles
+    )
 
 
 ##################### SIMULATION #####################
 
 if __name__ == '__main__':
+    # the hand written clauses below use 8 bit variable ids
+    design = build_dpll(CLAUSE_BITS, 8, CLAUSE_SIZE)
+
     memory = {
         0x01: 0b000000000000000000000000000000000001,
         0x02: 0b000000000000000000100000001000000010,
@@ -184,31 +543,37 @@ if __name__ == '__main__':
     }
 
     var_mem = {0x00: 0b00000000000000000}
-    for i in range(1<<VAR_BITS):
-        val = (i << (3+VAR_BITS))
+    for i in range(1<<design.var_bits):
+        val = (i << (3+design.var_bits))
         var_mem[i] = val
 
     # for i in range(256):
     #     print("{:019b}".format(var_mem[i]))
 
-    sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={var_assign_store.mem: var_mem, bcp.clause_storage.mem: memory})
-    #sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
+    with pyrtl.set_working_block(design.block):
+        sim_trace = pyrtl.SimulationTrace()
+        sim = backends.simulation(tracer=sim_trace, memory_value_map={design.var_mem: var_mem, design.clause_mem: memory}, block=design.block)
+        #sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={design.clause_mem: memory})
 
-    for cycle in range(18):
-        sim.step({})
+        for cycle in range(18):
+            sim.step({})
 
-    sim_trace.render_trace(symbol_len = 7)
+        sim_trace.render_trace(symbol_len = 7)
 
-    print('mem',sim.inspect_mem(var_assign_store.mem))
+        # the clauses above are unsat, but if they weren't this is the assignment it found, as literals
+        import runner
+        print('done', sim.inspect('done'), 'sat', sim.inspect('sat'))
+        if sim.inspect('done') and sim.inspect('sat'):
+            model = runner.read_model(sim, design, (1 << design.var_bits) - 1)
+            print('model', ' '.join(str(var if val else -var) for var, val in enumerate(model) if val is not None))
 
-    # with io.StringIO() as vfile:
-    #     pyrtl.output_to_graphviz(vfile)
-    #     f = open("dpll_graph.gv", "a")
-    #     f.write(vfile.getvalue())
-    #     f.close()
+        # with io.StringIO() as vfile:
+        #     pyrtl.output_to_graphviz(vfile)
+        #     f = open("dpll_graph.gv", "a")
+        #     f.write(vfile.getvalue())
+        #     f.close()
 
-    print("optimizing and running timing analysis")
-    pyrtl.optimize()
-    analyser = pyrtl.analysis.TimingAnalysis()
-    print("max freq MHz:", analyser.max_freq())
+        print("optimizing and running timing analysis")
+        pyrtl.optimize()
+        analyser = pyrtl.analysis.TimingAnalysis()
+        print("max freq MHz:", analyser.max_freq())
@@ -0,0 +1,195 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List
+
+from benchmark import BenchmarkOptions
+from dimacs import CnfInstance
+from dpll import DECISIONS, ENGINES, POLARITIES, STORES, UNDOS
+import backends
+import golden
+import runner
+
+# differential fuzzing: random instances sized to a design, solved on the RTL and on the golden model, any difference
+# shrunk down to a small DIMACS file that still shows it
+# the instances go out of their way to have what ClauseResolver treats specially: clauses shorter than clause_size
+# (padded out with variable 0), the same literal more than once, a variable both ways round (tautologies) and units
+# designs the golden model searches the same way as get their decision and conflict counts checked too
+
+# odds of a clause getting each of the special cases
+REPEAT_ODDS = 0.15
+TAUTOLOGY_ODDS = 0.1
+UNIT_ODDS = 0.1
+
+# the outcome of one instance
+@dataclass
+class FuzzCase:
+    seed: int
+    num_vars: int
+    num_clauses: int
+    # verdict on the RTL (TIMEOUT if it ran out of cycles)
+    verdict: str
+    # what the RTL got differently to the golden model (golden.differences) on the shrunk instance, empty if nothing
+    differences: List[str] = field(default_factory=list)
+    # the shrunk instance, when there were differences
+    clauses: List[List[int]] = field(default_factory=list)
+
+# a random instance that fits clause_bits/var_bits/clause_size
+def random_instance(rng: random.Random, clause_bits: int, var_bits: int, clause_size: int) -> CnfInstance:
+    num_vars = rng.randint(1, 2 ** var_bits - 1)
+    num_clauses = rng.randint(1, 2 ** clause_bits)
+    clauses = []
+    for _ in range(num_clauses):
+        if rng.random() < UNIT_ODDS:
+            length = 1
+        else:
+            length = rng.randint(1, clause_size)
+        clause = [rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(length)]
+        if length > 1 and rng.random() < REPEAT_ODDS:
+            clause[rng.randrange(1, length)] = clause[0]
+        if length > 1 and rng.random() < TAUTOLOGY_ODDS:
+            clause[rng.randrange(1, length)] = -clause[0]
+        clauses.append(clause)
+    return CnfInstance(f"random-{num_vars}-{num_clauses}", num_vars, num_clauses, clauses)
+
+# everything the RTL got differently to the golden model on these clauses, the design is options' fixed size
+def compare(clauses: List[List[int]], num_vars: int, options: BenchmarkOptions):
+    instance = CnfInstance("fuzz", num_vars, len(clauses), clauses)
+    size = (options.clause_bits, options.var_bits, options.clause_size)
+    design, _ = runner.get_design(*size, *options.design_variant())
+    result = runner.run_instance(design, instance, options.max_cycles, options.backend)
+    # (the golden model can't follow phase saving or random polarity, but they still need the right verdict)
+    polarity = options.polarity if options.polarity in golden.POLARITIES else "zero"
+    return result, golden.differences(design, result, golden.solve(instance, options.var_bits, polarity))
+
+# delta debugging: drop clauses (halves, then quarters and so on down to single clauses), then single literals, for as
+# long as fails still holds, and go round again until neither gets anywhere. every clause keeps at least one
+# literal, an empty clause would just get skipped
+def shrink(clauses: List[List[int]], fails: Callable[[List[List[int]]], bool]) -> List[List[int]]:
+    while True:
+        before = clauses
+        chunk = max(1, len(clauses) // 2)
+        while True:
+            start = 0
+            while start < len(clauses) and len(clauses) > 1:
+                smaller = clauses[:start] + clauses[start + chunk:]
+                if fails(smaller):
+                    clauses = smaller
+                else:
+                    start += chunk
+            if chunk == 1:
+                break
+            chunk //= 2
+
+        for i in range(len(clauses)):
+            j = 0
+            while j < len(clauses[i]) and len(clauses[i]) > 1:
+                smaller = clauses[:i] + [clauses[i][:j] + clauses[i][j + 1:]] + clauses[i + 1:]
+                if fails(smaller):
+                    clauses = smaller
+                else:
+                    j += 1
+        if clauses == before:
+            return clauses
+
+# generate, run and (if it differs) shrink the instance for one seed
+def fuzz_case(seed: int, options: BenchmarkOptions) -> FuzzCase:
+    instance = random_instance(random.Random(seed), options.clause_bits, options.var_bits, options.clause_size)
+    result, found = compare(instance.clauses, instance.num_vars, options)
+    case = FuzzCase(seed, instance.num_vars, len(instance.clauses), result.verdict, found)
+    if found:
+        # any difference will do, it doesn't have to stay the same one
+        case.clauses = shrink(instance.clauses, lambda clauses: bool(compare(clauses, instance.num_vars, options)[1]))
+        case.differences = compare(case.clauses, instance.num_vars, options)[1]
+    return case
+
+# the reproducer, with where it came from in the comments
+def write_dimacs(path: Path, clauses: List[List[int]], num_vars: int, comments: List[str] = []):
+    with open(path, "w") as file:
+        for comment in comments:
+            file.write(f"c {comment}\n")
+        file.write(f"p cnf {num_vars} {len(clauses)}\n")
+        for clause in clauses:
+            file.write(" ".join(map(str, clause)) + " 0\n")
+
+# every seed in seeds, spread over jobs worker processes, in order
+# each worker elaborates the design once and keeps it for every case it gets
+def run_fuzz(seeds: List[int], options: BenchmarkOptions, jobs: int = 1, on_case=None) -> List[FuzzCase]:
+    cases = []
+    if jobs == 1:
+        results = (fuzz_case(seed, options) for seed in seeds)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(fuzz_case, seeds, [options] * len(seeds), chunksize=max(1, len(seeds) // (jobs * 8)))
+    try:
+        for case in results:
+            cases.append(case)
+            if on_case is not None:
+                on_case(case)
+    finally:
+        if jobs != 1:
+            pool.shutdown()
+    return cases
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="fuzz the dpll design against the golden model with random instances")
+    parser.add_argument("--clause-bits", type=int, default=4)
+    parser.add_argument("--var-bits", type=int, default=3)
+    parser.add_argument("--clause-size", type=int, default=4)
+    parser.add_argument("--lanes", type=int, default=1)
+    parser.add_argument("--engine", choices=ENGINES, default="scan")
+    parser.add_argument("--termination", choices=["restart", "wrap"], default="restart")
+    parser.add_argument("--backtrack", choices=["chronological", "cdcl"], default="chronological")
+    parser.add_argument("--decision", choices=DECISIONS, default="static")
+    parser.add_argument("--polarity", choices=POLARITIES, default="zero")
+    parser.add_argument("--undo", choices=UNDOS, default="scan")
+    parser.add_argument("--store", choices=STORES, default="memory")
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="first seed, case i uses seed + i")
+    parser.add_argument("--max-cycles", type=int, default=runner.MAX_CYCLES)
+    parser.add_argument("--backend", choices=list(backends.BACKENDS), default=backends.get_backend())
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="worker processes, 0 for one per core")
+    parser.add_argument("--out", default="fuzz-failures", help="directory for the shrunk reproducers")
+    args = parser.parse_args(argv)
+
+    options = BenchmarkOptions(
+        args.clause_bits, args.var_bits, args.clause_size, args.lanes, args.engine, args.termination == "wrap",
+        args.backtrack == "cdcl", args.decision, args.polarity, args.undo, args.store, args.max_cycles, args.backend
+    )
+    # elaborate it here first, so a bad combination fails once rather than in every worker
+    runner.get_design(args.clause_bits, args.var_bits, args.clause_size, *options.design_variant())
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+
+    start = time.perf_counter()
+    verdicts = {}
+    failures = []
+
+    def report(case: FuzzCase):
+        verdicts[case.verdict] = verdicts.get(case.verdict, 0) + 1
+        if case.differences:
+            Path(args.out).mkdir(parents=True, exist_ok=True)
+            path = Path(args.out) / f"fuzz-{case.seed}.cnf"
+            write_dimacs(path, case.clauses, case.num_vars, [
+                f"seed {case.seed}, {case.num_clauses} clauses shrunk to {len(case.clauses)}",
+                f"design {args.clause_bits}/{args.var_bits}/{args.clause_size} {options.design_variant()}",
+                f"differences: {', '.join(case.differences)}",
+            ])
+            failures.append(path)
+            print(f"seed {case.seed}: {', '.join(case.differences)}, shrunk to {len(case.clauses)} clauses in {path}", flush=True)
+
+    run_fuzz(list(range(args.seed, args.seed + args.cases)), options, jobs, report)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.cases} cases in {elapsed:.1f}s ({args.cases / elapsed * 3600:.0f} an hour), "
+        + ", ".join(f"{count} {verdict}" for verdict, count in sorted(verdicts.items()))
+        + f", {len(failures)} differed from the golden model"
+    )
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
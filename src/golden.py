@@ -0,0 +1,158 @@
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from dimacs import CnfInstance
+
+# software DPLL that makes exactly the same search as the dpll.py state machine with static decisions and
+# chronological backtracking, at polarity zero or one. every engine, lane count, undo and store makes that same
+# search, they only take different numbers of cycles over it. it's plain python, no simulation, so it's a reference
+# to check the RTL against, instance for instance (benchmark.py --golden)
+#
+# the hardware's rules, down to the odd ones:
+#  * every variable the design has gets decided, not just the instance's: 1 to 2 ** var_bits - 1, lowest unassigned
+#    first. so the decision count depends on var_bits
+#  * decisions start at level 0, and whatever BCP implies goes on the level of the decision (or flip) that set it off
+#  * a clause is unit when exactly one of its literal slots is unassigned. a repeated literal never gets implied
+#    (x x y with y false stays as it is) and x -x does nothing until x is assigned
+#  * a contradiction undoes the level it happened at and gives the level's decision its other value. once both have
+#    failed the decision goes too and the level below gets the same treatment. the first decision failing on both
+#    values is unsat
+# the order BCP looks at clauses in doesn't matter to any of that: unit propagation gets to the same assignment (or
+# to a contradiction) in whatever order it goes, so the decisions and contradictions come out the same as the RTL's
+
+@dataclass
+class GoldenResult:
+    sat: bool
+    decisions: int
+    # contradictions BCP hit
+    conflicts: int
+    # every decision as (variable, value), in order. a backtrack giving a decision its other value isn't a decision
+    decision_trace: List[Tuple[int, int]] = field(default_factory=list)
+    # the level every contradiction happened at, in order
+    conflict_levels: List[int] = field(default_factory=list)
+    # value of every variable, index 0 unused, when sat
+    model: Optional[List[int]] = None
+
+    @property
+    def verdict(self) -> str:
+        return "SAT" if self.sat else "UNSAT"
+
+POLARITIES = ["zero", "one"]
+
+def solve(instance: CnfInstance, var_bits: int, polarity: str = "zero") -> GoldenResult:
+    assert polarity in POLARITIES, f"the golden model only does polarity {POLARITIES}"
+    assert instance.num_vars < 2 ** var_bits, "variable 0 is reserved, var_bits has to fit num_vars + 1"
+    first_value = int(polarity == "one")
+    num_vars = 2 ** var_bits - 1
+    clauses = instance.clauses
+    # clauses every variable is in, and the unit clauses, which get looked at on every BCP run
+    occurrences = [[] for _ in range(num_vars + 1)]
+    for index, clause in enumerate(clauses):
+        for var in set(abs(lit) for lit in clause):
+            occurrences[var].append(index)
+    units = [index for index, clause in enumerate(clauses) if len(clause) == 1]
+
+    value = [None] * (num_vars + 1)
+    trail = []
+    # [where the level starts on the trail, its decision, on its second value]
+    levels = []
+    result = GoldenResult(False, 0, 0)
+
+    def assign(var, val):
+        value[var] = val
+        trail.append(var)
+
+    # BCP after var was assigned, False on a contradiction
+    def propagate(var):
+        pending = units + occurrences[var]
+        while pending:
+            clause = clauses[pending.pop()]
+            unassigned = 0
+            for lit in clause:
+                val = value[abs(lit)]
+                if val is None:
+                    unassigned += 1
+                    implied = lit
+                elif val == (lit > 0):
+                    break
+            else:
+                if unassigned == 0:
+                    return False
+                if unassigned == 1:
+                    assign(abs(implied), int(implied > 0))
+                    pending += occurrences[abs(implied)]
+        return True
+
+    def undo(start):
+        for var in trail[start:]:
+            value[var] = None
+        del trail[start:]
+
+    while True:
+        var = next((var for var in range(1, num_vars + 1) if value[var] is None), None)
+        if var is None:
+            result.sat = True
+            result.model = [val or 0 for val in value]
+            return result
+        result.decisions += 1
+        result.decision_trace.append((var, first_value))
+        levels.append([len(trail), var, False])
+        assign(var, first_value)
+        ok = propagate(var)
+        while not ok:
+            result.conflicts += 1
+            result.conflict_levels.append(len(levels) - 1)
+            # decisions that have been through both values come off along with their levels
+            while levels and levels[-1][2]:
+                undo(levels.pop()[0])
+            if not levels:
+                return result
+            start, root, _ = levels[-1]
+            flipped = 1 - value[root]
+            undo(start)
+            levels[-1][2] = True
+            assign(root, flipped)
+            ok = propagate(root)
+
+# can this design's search be checked against the golden model? (anything else is only checked on its verdict)
+# takes anything with the design's decision, cdcl and polarity, a DpllDesign or benchmark's BenchmarkOptions
+def matches_search(design) -> bool:
+    return design.decision == "static" and not design.cdcl and design.polarity in POLARITIES
+
+# everything an RTL run (a runner.RunResult) got differently to the golden model, empty if nothing did
+# a run that didn't finish can't be wrong yet
+def differences(design, result, golden: GoldenResult) -> List[str]:
+    if not result.finished:
+        return []
+    found = []
+    if result.sat != golden.sat:
+        found.append(f"verdict {result.verdict}, golden {golden.verdict}")
+    if matches_search(design):
+        for name in ["decisions", "conflicts"]:
+            if getattr(result, name) != getattr(golden, name):
+                found.append(f"{name} {getattr(result, name)}, golden {getattr(golden, name)}")
+    return found
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from benchmark import expected_verdict
+    from dimacs import find_instances, parse_dimacs
+
+    parser = argparse.ArgumentParser(description="solve instances with the golden model")
+    parser.add_argument("instances", nargs="+", help="cnf files, directories or globs")
+    parser.add_argument("--var-bits", type=int, help="design size to model, the smallest that fits by default")
+    parser.add_argument("--polarity", choices=POLARITIES, default="zero")
+    args = parser.parse_args()
+
+    wrong = 0
+    for path in [path for pattern in args.instances for path in find_instances(pattern)]:
+        instance = parse_dimacs(path)
+        start = time.perf_counter()
+        golden = solve(instance, args.var_bits or instance.design_size()[1], args.polarity)
+        expected = expected_verdict(path)
+        wrong += expected in ("SAT", "UNSAT") and expected != golden.verdict
+        print(f"{path}: {golden.verdict} (expected {expected}) decisions:{golden.decisions} "
+              f"conflicts:{golden.conflicts} time:{time.perf_counter() - start:.4f}s")
+    sys.exit(1 if wrong else 0)
@@ -1,6 +1,6 @@
 import pyrtl
 from pyrtl import WireVector
-from typing import Callable, Sequence
+from typing import Callable, Sequence, Tuple
 
 ## LIST HELPERS ##
 def wirevector_list(bitwidth:int, name:str, length:int, wirevector_class=WireVector):
@@ -25,6 +25,7 @@ def map_wires(wire_list: Sequence[WireVector], op: Callable[[WireVector], WireVe
 ## BCP HELPERS ##
 # adds two values to a max of 2 levels
 # 00 -> 01 -> 11
+# the design counts with saturating_count now, this is left as the baseline helpers_bench.py measures it against
 def double_saturate(in1: WireVector, in2: WireVector) -> WireVector:
     assert in1.bitwidth == 1 or in1.bitwidth == 2
     assert in1.bitwidth == 1 or in1.bitwidth == 2
@@ -82,3 +83,82 @@ def create_bin_tree_modified(inputs: Sequence[WireVector], op: Callable[[WireVec
         curr_wires = new_wires
 
     return curr_wires[0]
+
+
+## LOG DEPTH HELPERS ##
+# everything here takes a list of 1 bit wires, bits[0] first, and is about log2(len(bits)) levels deep
+# the wires passed up a tree are only as wide as that level needs: an index into 2 ** k bits is k bits wide and
+# a count of them k + 1, rather than every node carrying the full width from the bottom up
+# helpers_bench.py compares them against create_bin_tree versions of the same thing
+
+# outs[i] = op(bits[0], ..., bits[i]) for an associative op (a Sklansky parallel prefix, n/2 ops a level)
+def parallel_prefix(bits: Sequence[WireVector], op: Callable) -> list:
+    outs = list(bits)
+    span = 1
+    while span < len(outs):
+        for i in range(len(outs)):
+            # the top half of every block of 2 * span takes in everything below the block's middle
+            if i & span:
+                outs[i] = op(outs[(i & ~(span - 1)) - 1], outs[i])
+        span *= 2
+    return outs
+
+# one-hot of the lowest set bit, 0 if none are
+def find_first_set(bits: Sequence[WireVector]) -> WireVector:
+    below = parallel_prefix(bits, lambda a, b: a | b)
+    return pyrtl.concat_list([bits[0]] + [bits[i] & ~below[i - 1] for i in range(1, len(bits))])
+
+# (valid, index) of the lowest set bit, or the highest with highest, index 0 if none are set
+# every node says which of its halves the bit is in, so its index is one bit wider than its children's
+# index is ceil(log2(len(bits))) bits wide (at least 1)
+def priority_encode(bits: Sequence[WireVector], highest: bool = False) -> Tuple[WireVector, WireVector]:
+    padded = 1 << (len(bits) - 1).bit_length()
+    zero = pyrtl.Const(0, bitwidth = 1)
+    nodes = [(bit, None) for bit in bits] + [(zero, None)] * (padded - len(bits))
+    while len(nodes) > 1:
+        parents = []
+        for (valid_a, index_a), (valid_b, index_b) in zip(nodes[0::2], nodes[1::2]):
+            upper = valid_b if highest else valid_b & ~valid_a
+            index = upper if index_a is None else pyrtl.concat(upper, pyrtl.select(upper, index_b, index_a))
+            parents.append((valid_a | valid_b, index))
+        nodes = parents
+    valid, index = nodes[0]
+    return valid, zero if index is None else index
+
+# how many bits are set, len(bits).bit_length() wide
+# a carry save tree: full adders take three bits of a column down to one there and a carry into the next, until no
+# column has more than two (about log1.5 n levels), then one add for the two rows that are left
+# (a kogge-stone add there comes out slower than a ripple under pyrtl's delay model at these widths)
+def popcount(bits: Sequence[WireVector]) -> WireVector:
+    width = len(bits).bit_length()
+    zero = pyrtl.Const(0, bitwidth = 1)
+    columns = [list(bits)] + [[] for _ in range(width)]
+    while any(len(column) > 2 for column in columns):
+        reduced = [[] for _ in columns]
+        for k, column in enumerate(columns):
+            while len(column) >= 3:
+                a, b, c = column[:3]
+                column = column[3:]
+                reduced[k].append(a ^ b ^ c)
+                # (nothing ever carries out of the top column, there aren't enough bits to count that high)
+                if k + 1 < len(columns):
+                    reduced[k + 1].append((a & b) | (c & (a ^ b)))
+            reduced[k] += column
+        columns = reduced
+    rows = [pyrtl.concat_list([column[r] if r < len(column) else zero for column in columns]) for r in range(2)]
+    return (rows[0] + rows[1])[:width]
+
+# how many bits are set, saturating at limit, as a thermometer code: bit k is set when more than k are
+# with the default limit that's 0, 1 or 3, the same as a tree of double_saturate
+# a node's code is only as wide as the bits under it could count (up to limit)
+def saturating_count(bits: Sequence[WireVector], limit: int = 2) -> WireVector:
+    def add(a, b):
+        out = []
+        for k in range(min(limit, len(a) + len(b))):
+            # more than k in one of them, or more than i in a and more than k - 1 - i in b
+            terms = [code[k] for code in (a, b) if k < len(code)]
+            terms += [a[i] & b[k - 1 - i] for i in range(k) if i < len(a) and k - 1 - i < len(b)]
+            out.append(create_bin_tree(terms, lambda x, y: x | y))
+        return out
+    code = create_bin_tree([[bit] for bit in bits], add)
+    return pyrtl.concat_list(code).zero_extended(limit)
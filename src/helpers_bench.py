@@ -0,0 +1,112 @@
+import argparse
+import contextlib
+import csv
+import io
+import sys
+from dataclasses import dataclass, asdict, fields
+from typing import Callable, List
+
+import pyrtl
+
+import helpers
+from bcp import first_valid
+from timing import GATE_OPS
+
+# micro-benchmark of the log depth helpers against the create_bin_tree versions of the same thing
+# every circuit gets a block of its own with width 1 bit inputs, and gets synthesized down to 1 bit gates before
+# pyrtl.optimize() and TimingAnalysis (130nm estimates). unlike timing.py, where an adder or a select of any width
+# is one gate, gates here are 1 bit gates, so a wide node costs what it should
+
+@dataclass
+class PrimitiveRow:
+    primitive: str
+    width: int
+    tree_gates: int
+    new_gates: int
+    tree_delay_ps: float
+    new_delay_ps: float
+
+# each primitive as (name, create_bin_tree version, helpers version), all of them take the list of input bits
+# and return a list of wires to hook up to outputs
+
+def tree_priority_encode(bits):
+    index_bits = max(len(bits) - 1, 1).bit_length()
+    found = helpers.create_bin_tree(
+        [pyrtl.concat(bit, pyrtl.Const(i, bitwidth = index_bits)) for i, bit in enumerate(bits)], first_valid
+    )
+    return [found[-1], found[:-1]]
+
+# the index out of the tree, then compared against every position
+def tree_find_first_set(bits):
+    valid, index = tree_priority_encode(bits)
+    return [pyrtl.concat_list([valid & (index == i) for i in range(len(bits))])]
+
+# the same full width adds all the way up, like the ConflictAnalyzer's counts
+def tree_popcount(bits):
+    width = len(bits).bit_length()
+    return [helpers.create_bin_tree([bit.zero_extended(width) for bit in bits], lambda a, b: (a + b)[:width])]
+
+def tree_saturating_count(bits):
+    return [helpers.create_bin_tree(bits, helpers.double_saturate)]
+
+PRIMITIVES = {
+    "priority_encode": (tree_priority_encode, lambda bits: list(helpers.priority_encode(bits))),
+    "find_first_set": (tree_find_first_set, lambda bits: [helpers.find_first_set(bits)]),
+    "popcount": (tree_popcount, lambda bits: [helpers.popcount(bits)]),
+    "saturating_count": (tree_saturating_count, lambda bits: [helpers.saturating_count(bits)]),
+}
+
+# (gates, longest path in ps) of build on width input bits
+def measure(build: Callable, width: int):
+    block = pyrtl.Block()
+    with pyrtl.set_working_block(block, no_sanity_check=True):
+        bits = [pyrtl.Input(bitwidth=1, name=f"bit_{i}") for i in range(width)]
+        for k, wire in enumerate(build(bits)):
+            output = pyrtl.Output(bitwidth=wire.bitwidth, name=f"out_{k}")
+            output <<= wire
+        # (synthesize swaps in a new working block)
+        pyrtl.synthesize()
+        pyrtl.optimize()
+        block = pyrtl.working_block()
+        # (pyrtl prints about anything it can't time on stdout)
+        with contextlib.redirect_stdout(io.StringIO()):
+            analysis = pyrtl.TimingAnalysis()
+        gates = sum(1 for net in block.logic if net.op in GATE_OPS)
+        return gates, analysis.max_length()
+
+def run(primitives: List[str], widths: List[int]) -> List[PrimitiveRow]:
+    rows = []
+    for name in primitives:
+        tree, new = PRIMITIVES[name]
+        for width in widths:
+            tree_gates, tree_delay = measure(tree, width)
+            new_gates, new_delay = measure(new, width)
+            rows.append(PrimitiveRow(name, width, tree_gates, new_gates, tree_delay, new_delay))
+    return rows
+
+def print_rows(rows: List[PrimitiveRow], log=sys.stdout):
+    print(f"{'primitive':>16} {'width':>5} {'tree gates':>10} {'new gates':>9} {'tree ps':>8} {'new ps':>8} {'speedup':>7}", file=log)
+    for row in rows:
+        print(
+            f"{row.primitive:>16} {row.width:>5} {row.tree_gates:>10} {row.new_gates:>9} "
+            f"{row.tree_delay_ps:>8.0f} {row.new_delay_ps:>8.0f} {row.tree_delay_ps / row.new_delay_ps:>6.2f}x",
+            file=log
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="compare the log depth helpers against create_bin_tree versions")
+    parser.add_argument("--primitives", choices=list(PRIMITIVES), nargs="+", default=list(PRIMITIVES))
+    parser.add_argument("--widths", type=int, nargs="+", default=[8, 16, 32, 64, 128, 256])
+    parser.add_argument("--csv", help="write every row here")
+    args = parser.parse_args(argv)
+
+    rows = run(args.primitives, args.widths)
+    print_rows(rows)
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=[field.name for field in fields(PrimitiveRow)])
+            writer.writeheader()
+            writer.writerows(asdict(row) for row in rows)
+
+if __name__ == "__main__":
+    sys.exit(main())
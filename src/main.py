@@ -1,72 +1,69 @@
+import argparse
 import pyrtl
-import dpll
-from consts import CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE
+import backends
+import runner
+import tracing
+from dpll import build_dpll
+from dimacs import parse_dimacs, encode_clauses, initial_var_mem, model_line
 
 MAX_ITERS = 1000
 
-instance_path = "instances/example/unsat-1.cnf"
+# smaller designs don't have all of these wires
+trace_list = [
+    "done", "sat", "curr_level", "dpll_state", "clause_addr", "clause_status_o", "is_sat", "contradiction", "update_made", "unassigned_count", "bcp_va_write_addr_o", "bcp_va_write_enable_o", "bcp_status_o",
+    # "cs_negated_i_0", "cs_negated_i_1", "cs_negated_i_2", "cs_negated_i_3",
+    "cs_vars_i_0", "cs_vars_i_1", "cs_vars_i_2", "cs_vars_i_3",
+    # "unassigned_0", "unassigned_1", "unassigned_2", "unassigned_3",
+    "every_memory_value_1","every_memory_value_2","every_memory_value_3","every_memory_value_4","every_memory_value_5","every_memory_value_6","every_memory_value_7"
+]
+
+parser = argparse.ArgumentParser(description="run one instance and show its waveform")
+parser.add_argument("instance", nargs="?", default="instances/example/unsat-1.cnf")
+parser.add_argument("--max-iters", type=int, default=MAX_ITERS)
+parser.add_argument("--trace", choices=tracing.TRACE_MODES, default="watch",
+                    help="none, render the watch list's last --window cycles, or stream the watch list to --vcd")
+parser.add_argument("--watch", help="comma separated wires to trace, the usual waveform by default")
+parser.add_argument("--window", type=int, default=tracing.WINDOW, help="cycles to keep and render with --trace watch")
+parser.add_argument("--vcd", default="dpll.vcd", help="file to stream to with --trace vcd")
+args = parser.parse_args()
+instance_path = args.instance
 # instance_path = "instances/uuf50-218/uuf50-01.cnf"
 
 # parse instance
-memory = {}
-clause_counter = 0
-
-with open(instance_path, "r") as instance:
-    for line in instance.readlines():
-        if len(line) == 0:
-            continue
-        elif line[0] == "c" or line[0] == "%":
-            continue
-        elif line[0] == "p":
-            words = line.split()
-            print(f"header: {line}")
-            assert words[1] == "cnf"
-            assert int(words[2]) < (1<<VAR_BITS)
-            assert int(words[3]) < (1<<CLAUSE_BITS)
-        else:
-            vars = line.split()
-            assert len(vars)-1 <= CLAUSE_SIZE
-            memval = 0
-            for var in vars:
-                if var[0] == "-":
-                    memval = (memval<<(VAR_BITS+1)) + (1<<(VAR_BITS)) + int(var[1:])
-                elif var != "0":
-                    memval = (memval<<(VAR_BITS+1)) + int(var)
+instance = parse_dimacs(instance_path)
+print(f"header: p cnf {instance.num_vars} {instance.num_clauses}")
 
-            if memval == 0:
-                # a bunch of the test cases are just a singular 0
-                continue
-            memory[clause_counter] = memval
-            clause_counter+=1
+# build the smallest design that fits it
+clause_bits, var_bits, clause_size = instance.design_size()
+print(f"design: clause_bits={clause_bits} var_bits={var_bits} clause_size={clause_size}")
+design = build_dpll(clause_bits, var_bits, clause_size)
+memory = encode_clauses(instance.clauses, var_bits, clause_size)
 
 # setup
-var_mem = {}
-for i in range(1<<VAR_BITS):
-    val = (i << (3+VAR_BITS))
-    var_mem[i] = val
+var_mem = initial_var_mem(var_bits)
 
-sim_trace = pyrtl.SimulationTrace()
-sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={dpll.var_assign_store.mem: var_mem, dpll.bcp.clause_storage.mem: memory})
+if args.watch:
+    watch = args.watch.split(",")
+else:
+    watch = [name for name in trace_list if name in design.block.wirevector_by_name]
+if args.trace != "none" and backends.get_backend() == "compiled":
+    # the compiled backend can only read back what it traces
+    watch += [name for name in runner.RESULT_WIRES if name not in watch]
+sim_trace = tracing.make_tracer(
+    args.trace, design.block, watch, open(args.vcd, "w") if args.trace == "vcd" else None, args.window
+)
+sim = backends.simulation(tracer=sim_trace, memory_value_map={design.var_mem: var_mem, design.clause_mem: memory}, block=design.block)
 
 # run
-counter = 1
-sim.step()
-while counter < MAX_ITERS and sim_trace.trace["done"][-1] != 1:
-    sim.step()
-    counter += 1
-
-finished = sim_trace.trace["done"][-1] == 1
-is_sat = sim_trace.trace["sat"][-1] == 1
+result = runner.certify(runner.run(sim, args.max_iters), sim, design, instance)
 print(f"file: {instance_path}")
-print(f"finished:{finished} sat:{is_sat} cycles:{counter}")
+print(f"finished:{result.finished} sat:{result.sat} cycles:{result.cycles}")
+if result.sat:
+    print(model_line(result.model, instance.num_vars))
+    print(f"model satisfies every clause: {result.verified}")
 
-#"""
-sim_trace.render_trace(
-    trace_list = ["done", "sat", "curr_level", "dpll_state", "clause_addr", "clause_status_o", "is_sat", "contradiction", "update_made", "unassigned_count", "bcp_va_write_addr_o", "bcp_va_write_enable_o", "bcp_status_o",
-        # "cs_negated_i_0", "cs_negated_i_1", "cs_negated_i_2", "cs_negated_i_3",
-        "cs_vars_i_0", "cs_vars_i_1", "cs_vars_i_2", "cs_vars_i_3",
-        # "unassigned_0", "unassigned_1", "unassigned_2", "unassigned_3",
-        "every_memory_value_1","every_memory_value_2","every_memory_value_3","every_memory_value_4","every_memory_value_5","every_memory_value_6","every_memory_value_7"],
-    symbol_len=6
-)
-#"""
+if args.trace == "watch":
+    sim_trace.render_trace(trace_list = watch, symbol_len=6)
+elif args.trace == "vcd":
+    sim_trace.close()
+    print(f"wrote {args.vcd}")
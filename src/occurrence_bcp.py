@@ -0,0 +1,167 @@
+import pyrtl
+from pyrtl import WireVector, Register
+from helpers import wirevector_list, connect_wire_lists
+
+from clause_resolver import ClauseResolver
+from clause_storage import ClauseStorage
+
+
+# a drop in replacement for BCP that only looks at the clauses an assignment could have affected
+#
+# exposed wires, on top of everything BCP has (apart from reason_o):
+# Inputs:
+# - trigger_var_i: the variable that was just assigned before start_i (the decision or the flipped root)
+# - trigger_val_i: the value it was given
+#
+# memories:
+# - occ_index_mem: one word per literal (var*2 + negated), {end, start} of its slice of occ_list_mem
+# - occ_list_mem:  clause addresses, grouped by literal
+# the list for literal 0 (which can't show up in a clause, variable 0 is padding) holds every unit clause,
+# it gets visited at the start of every run since nothing else would ever look at them
+#
+# assigning x = v can only make clauses with the literal that just went false unit or unsat, so that's
+# the list we walk: x for v = 0 and ~x for v = 1. every implication gets queued up and walked the same way
+#
+# it's a two stage pipeline, clause addresses come out of occ_list_mem in the first stage and get
+# resolved in the second. the first stage doesn't care about variable values so there are no hazards
+# between them, the only thing to look out for is not finishing while the second stage could still queue something
+
+# how many bits it takes to address every occurrence of a design of this size
+# each clause shows up once per literal, plus once more in the unit clause list
+def occurrence_bits(clause_bits: int, clause_size: int) -> int:
+    return clause_bits + (clause_size + 1).bit_length()
+
+class OccurrenceBCP:
+    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = "bcp_"):
+        self.occ_bits = occ_bits = occurrence_bits(clause_bits, clause_size)
+
+        ## inputs ##
+        self.start_i =        WireVector(bitwidth = 1, name = name_prefix+"start_i")
+        self.trigger_var_i =  WireVector(bitwidth = var_bits, name = name_prefix+"trigger_var_i")
+        self.trigger_val_i =  WireVector(bitwidth = 1, name = name_prefix+"trigger_val_i")
+        self.var_vals_i =     wirevector_list(1, name_prefix+"var_vals_i", clause_size)
+        self.var_assigned_i = wirevector_list(1, name_prefix+"var_assigned_i", clause_size)
+
+        ## outputs ##
+        self.active_o =          WireVector(bitwidth = 1, name = name_prefix+"active_o")
+        self.status_o =          WireVector(bitwidth = 1, name = name_prefix+"status_o")
+        self.va_addrs_o =        wirevector_list(var_bits, name_prefix+"va_addrs_o", clause_size)
+        self.va_write_addr_o =   WireVector(bitwidth = var_bits, name = name_prefix+"va_write_addr_o")
+        self.va_write_val_o =    WireVector(bitwidth = 1, name = name_prefix+"va_write_val_o")
+        self.va_write_enable_o = WireVector(bitwidth = 1, name = name_prefix+"va_write_enable_o")
+        self.conflict_vars_o =   wirevector_list(var_bits, name_prefix+"conflict_vars_o", clause_size)
+
+        ## memories ##
+        self.occ_index_mem = pyrtl.MemBlock(
+            bitwidth = 2 * occ_bits,
+            addrwidth = var_bits + 1,
+            name = "Occurrence Index",
+            max_read_ports = 2,
+            max_write_ports = 0,
+            asynchronous = True
+        )
+        self.occ_list_mem = pyrtl.MemBlock(
+            bitwidth = clause_bits,
+            addrwidth = occ_bits,
+            name = "Occurrence List",
+            max_read_ports = 1,
+            max_write_ports = 0
+        )
+        # literals waiting to be walked, {var, val}
+        # every variable gets assigned at most once per run, so it never needs to wrap around
+        queue = pyrtl.MemBlock(
+            bitwidth = var_bits + 1,
+            addrwidth = var_bits + 1,
+            name = "Propagation Queue",
+            max_read_ports = 1,
+            max_write_ports = 2
+        )
+
+        ## substructures ##
+        clause_resolver = ClauseResolver(clause_bits, var_bits, clause_size)
+        self.clause_storage = ClauseStorage(clause_bits, var_bits, clause_size)
+
+        ## internal registers ##
+        active =       Register(bitwidth = 1, name = "occ_active")
+        occ_ptr =      Register(bitwidth = occ_bits, name = "occ_ptr")    # next occurrence to fetch
+        occ_end =      Register(bitwidth = occ_bits, name = "occ_end")    # end of the current literal's list
+        queue_head =   Register(bitwidth = var_bits + 1, name = "queue_head")
+        queue_tail =   Register(bitwidth = var_bits + 1, name = "queue_tail")
+        clause_valid = Register(bitwidth = 1, name = "occ_clause_valid") # is there a clause in the second stage
+        clause_addr =  Register(bitwidth = clause_bits, name = "occ_clause_addr")
+
+        ## internal wires ##
+        contradiction = WireVector(bitwidth = 1, name = "contradiction")
+        writing =       WireVector(bitwidth = 1, name = "writing")
+        list_done =     WireVector(bitwidth = 1, name = "occ_list_done")
+        queue_empty =   WireVector(bitwidth = 1, name = "queue_empty")
+        popped =        WireVector(bitwidth = var_bits + 1, name = "queue_popped")
+        popped_range =  WireVector(bitwidth = 2 * occ_bits, name = "occ_popped_range")
+        units_range =   WireVector(bitwidth = 2 * occ_bits, name = "occ_units_range")
+
+        ## second stage: resolve the clause ##
+        self.clause_storage.addr_i <<= clause_addr
+        connect_wire_lists(clause_resolver.cs_vars_i, self.clause_storage.vars_o)
+        connect_wire_lists(clause_resolver.cs_negated_i, self.clause_storage.negs_o)
+        connect_wire_lists(self.va_addrs_o, self.clause_storage.vars_o)
+        connect_wire_lists(self.conflict_vars_o, self.clause_storage.vars_o)
+        connect_wire_lists(clause_resolver.var_vals_i, self.var_vals_i)
+        connect_wire_lists(clause_resolver.var_assigned_i, self.var_assigned_i)
+
+        contradiction <<= active & clause_valid & (clause_resolver.clause_status_o == 1)
+        writing <<= active & clause_valid & (clause_resolver.clause_status_o == 3)
+
+        with pyrtl.conditional_assignment:
+            with writing:
+                self.va_write_addr_o   |= clause_resolver.implied_var_o
+                self.va_write_val_o    |= clause_resolver.implied_val_o
+                self.va_write_enable_o |= 1
+
+        # the implication goes on the back of the queue
+        queue[queue_tail] <<= pyrtl.MemBlock.EnabledWrite(
+            pyrtl.concat(clause_resolver.implied_var_o, clause_resolver.implied_val_o), writing
+        )
+        # and the trigger goes on the front when we start
+        queue[pyrtl.Const(0, bitwidth = var_bits + 1)] <<= pyrtl.MemBlock.EnabledWrite(
+            pyrtl.concat(self.trigger_var_i, self.trigger_val_i), self.start_i
+        )
+
+        ## first stage: fetch the next clause address, or move on to the next literal ##
+        list_done <<= occ_ptr == occ_end
+        queue_empty <<= queue_head == queue_tail
+        popped <<= queue[queue_head]
+        popped_range <<= self.occ_index_mem[popped]
+        units_range <<= self.occ_index_mem[pyrtl.Const(0, bitwidth = var_bits + 1)]
+
+        with pyrtl.conditional_assignment:
+            with self.start_i:
+                # walk the unit clauses first, the trigger is already waiting in the queue
+                active.next       |= 1
+                occ_ptr.next      |= units_range[0:occ_bits]
+                occ_end.next      |= units_range[occ_bits:]
+                queue_head.next   |= 0
+                queue_tail.next   |= 1
+                clause_valid.next |= 0
+            with ~active | contradiction:
+                active.next       |= 0
+                clause_valid.next |= 0
+            with ~list_done:
+                clause_addr.next  |= self.occ_list_mem[occ_ptr]
+                clause_valid.next |= 1
+                occ_ptr.next      |= occ_ptr + 1
+                queue_tail.next   |= queue_tail + writing
+            with ~queue_empty:
+                occ_ptr.next      |= popped_range[0:occ_bits]
+                occ_end.next      |= popped_range[occ_bits:]
+                queue_head.next   |= queue_head + 1
+                clause_valid.next |= 0
+                queue_tail.next   |= queue_tail + writing
+            with pyrtl.otherwise:
+                # nothing left to fetch, we're done unless the last clause queued something
+                active.next       |= writing
+                clause_valid.next |= 0
+                queue_tail.next   |= queue_tail + writing
+
+        # same forwarding as BCP, a contradiction drops active straight away
+        self.active_o <<= active & ~contradiction
+        self.status_o <<= contradiction
@@ -0,0 +1,168 @@
+import pyrtl
+from pyrtl import WireVector, Register
+from helpers import wirevector_list, connect_wire_lists
+
+from clause_resolver import ClauseResolver
+from clause_storage import ClauseStorage
+
+
+# a drop in replacement for BCP (single lane) that splits the clause path over four stages:
+#  1. fetch:      read the clause at fetch_addr out of ClauseStorage
+#  2. read vars:  look up its variables in the VarAssignStore (va_addrs_o / var_vals_i / var_assigned_i)
+#  3. resolve:    run the ClauseResolver
+#  4. write back: write the implication or report the contradiction
+# BCP does all of that in one cycle, so the clock has to fit every memory read and the resolver back to back
+#
+# hazards: the only thing written is the variable memory, in stage 4, and it's only visible to reads on the
+# next cycle. so the clause in stage 3 read its variables before that write and the one in stage 2 is reading
+# them right now, both of them get the write forwarded in. anything further back reads it from the memory
+#
+# fetch never stalls, it just keeps going round the clauses. a pass is judged in stage 4 with the same rules as BCP:
+# - normally it ends once the last clause gets through with nothing written since the previous time it did
+# - with wrap_around it ends once we get back to the clause before the last implication
+# either way the clauses already in flight behind it are thrown away, as they are on a contradiction
+#
+# reason_o, conflict_vars_o, learned and last_addr_i are the same as BCP's, for the clause in stage 4
+
+# the value/assigned pair for var as it would be with the write back stage's write already done
+def forward(var, val, assigned, write_var, write_val, writing):
+    hit = writing & (var == write_var)
+    return pyrtl.select(hit, write_val, val), assigned | hit
+
+class PipelinedBCP:
+    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = "bcp_", wrap_around: bool = False,
+                 learned: bool = False):
+        ## inputs ##
+        self.start_i =        WireVector(bitwidth = 1, name = name_prefix+"start_i")
+        self.var_vals_i =     wirevector_list(1, name_prefix+"var_vals_i", clause_size)
+        self.var_assigned_i = wirevector_list(1, name_prefix+"var_assigned_i", clause_size)
+
+        ## outputs ##
+        self.active_o =          WireVector(bitwidth = 1, name = name_prefix+"active_o")
+        self.status_o =          WireVector(bitwidth = 1, name = name_prefix+"status_o")
+        self.va_addrs_o =        wirevector_list(var_bits, name_prefix+"va_addrs_o", clause_size)
+        self.va_write_addr_o =   WireVector(bitwidth = var_bits, name = name_prefix+"va_write_addr_o")
+        self.va_write_val_o =    WireVector(bitwidth = 1, name = name_prefix+"va_write_val_o")
+        self.va_write_enable_o = WireVector(bitwidth = 1, name = name_prefix+"va_write_enable_o")
+        self.reason_o =          WireVector(bitwidth = clause_bits, name = name_prefix+"reason_o")
+        self.conflict_vars_o =   wirevector_list(var_bits, name_prefix+"conflict_vars_o", clause_size)
+
+        ## substructures ##
+        clause_resolver = ClauseResolver(clause_bits, var_bits, clause_size)
+        self.clause_storage = ClauseStorage(clause_bits, var_bits, clause_size, read_ports = 2 if learned else 1,
+                                            writable = learned)
+
+        ## internal registers ##
+        if learned:
+            self.last_addr_i = WireVector(bitwidth = clause_bits, name = name_prefix+"last_addr_i")
+            max_addr = self.last_addr_i
+        else:
+            max_addr = pyrtl.Const(-1, bitwidth = clause_bits)
+        active =      Register(bitwidth = 1, name = "active")
+        fetch_addr =  Register(bitwidth = clause_bits, name = "fetch_addr")
+        update_made = Register(bitwidth = 1, name = "update_made") # has a variable been written this pass
+        stop_addr =   Register(bitwidth = clause_bits, name = "stop_addr") # last clause to look at (wrap_around)
+
+        # stage 2: the clause as it came out of storage
+        read_valid = Register(bitwidth = 1, name = "read_valid")
+        read_addr =  Register(bitwidth = clause_bits, name = "read_addr")
+        read_vars =  wirevector_list(var_bits, "read_vars", clause_size, Register)
+        read_negs =  wirevector_list(1, "read_negs", clause_size, Register)
+        # stage 3: the clause and its variables
+        resolve_valid =    Register(bitwidth = 1, name = "resolve_valid")
+        resolve_addr =     Register(bitwidth = clause_bits, name = "resolve_addr")
+        resolve_vars =     wirevector_list(var_bits, "resolve_vars", clause_size, Register)
+        resolve_negs =     wirevector_list(1, "resolve_negs", clause_size, Register)
+        resolve_vals =     wirevector_list(1, "resolve_vals", clause_size, Register)
+        resolve_assigned = wirevector_list(1, "resolve_assigned", clause_size, Register)
+        # stage 4: what the resolver made of it
+        wb_valid =  Register(bitwidth = 1, name = "wb_valid")
+        wb_addr =   Register(bitwidth = clause_bits, name = "wb_addr")
+        wb_status = Register(bitwidth = 2, name = "wb_status")
+        wb_var =    Register(bitwidth = var_bits, name = "wb_var")
+        wb_val =    Register(bitwidth = 1, name = "wb_val")
+        wb_vars =   wirevector_list(var_bits, "wb_vars", clause_size, Register)
+
+        ## internal wires ##
+        pass_finished = WireVector(bitwidth = 1, name = "pass_finished")
+        flush =         WireVector(bitwidth = 1, name = "flush") # throw away everything in flight
+        writing =       WireVector(bitwidth = 1, name = "writing")
+        contradiction = WireVector(bitwidth = 1, name = "contradiction")
+
+        ## stage 4: write back ##
+        writing <<= active & wb_valid & (wb_status == 3)
+        self.reason_o <<= wb_addr
+        connect_wire_lists(self.conflict_vars_o, wb_vars)
+        contradiction <<= active & wb_valid & (wb_status == 1)
+
+        with pyrtl.conditional_assignment:
+            with writing:
+                self.va_write_addr_o   |= wb_var
+                self.va_write_val_o    |= wb_val
+                self.va_write_enable_o |= 1
+
+        ## stage 1: fetch ##
+        self.clause_storage.addr_i <<= fetch_addr
+        for i in range(clause_size):
+            read_vars[i].next <<= self.clause_storage.vars_o[i]
+            read_negs[i].next <<= self.clause_storage.negs_o[i]
+        read_addr.next <<= fetch_addr
+
+        ## stage 2: read the variables ##
+        connect_wire_lists(self.va_addrs_o, read_vars)
+        for i in range(clause_size):
+            val, assigned = forward(read_vars[i], self.var_vals_i[i], self.var_assigned_i[i], wb_var, wb_val, writing)
+            resolve_vals[i].next <<= val
+            resolve_assigned[i].next <<= assigned
+            resolve_vars[i].next <<= read_vars[i]
+            resolve_negs[i].next <<= read_negs[i]
+        resolve_addr.next <<= read_addr
+
+        ## stage 3: resolve ##
+        connect_wire_lists(clause_resolver.cs_vars_i, resolve_vars)
+        connect_wire_lists(clause_resolver.cs_negated_i, resolve_negs)
+        for i in range(clause_size):
+            val, assigned = forward(resolve_vars[i], resolve_vals[i], resolve_assigned[i], wb_var, wb_val, writing)
+            clause_resolver.var_vals_i[i] <<= val
+            clause_resolver.var_assigned_i[i] <<= assigned
+        wb_addr.next <<= resolve_addr
+        wb_status.next <<= clause_resolver.clause_status_o
+        wb_var.next <<= clause_resolver.implied_var_o
+        wb_val.next <<= clause_resolver.implied_val_o
+        for i in range(clause_size):
+            wb_vars[i].next <<= resolve_vars[i]
+
+        ## control ##
+        if wrap_around:
+            pass_finished <<= active & wb_valid & (wb_addr == stop_addr) & ~writing
+        else:
+            pass_finished <<= active & wb_valid & (wb_addr == max_addr) & ~writing & ~update_made
+        flush <<= self.start_i | pass_finished | contradiction
+
+        with pyrtl.conditional_assignment:
+            with flush:
+                active.next        |= self.start_i
+                fetch_addr.next    |= 0
+                read_valid.next    |= 0
+                resolve_valid.next |= 0
+                wb_valid.next      |= 0
+            with pyrtl.otherwise:
+                fetch_addr.next    |= pyrtl.select(fetch_addr == max_addr, 0, fetch_addr + active)
+                read_valid.next    |= active
+                resolve_valid.next |= read_valid
+                wb_valid.next      |= resolve_valid
+
+        with pyrtl.conditional_assignment:
+            with self.start_i:
+                update_made.next |= 0
+                stop_addr.next   |= max_addr
+            with writing:
+                update_made.next |= wb_addr != max_addr
+                stop_addr.next   |= pyrtl.select(wb_addr == 0, max_addr, wb_addr - 1)
+            with wb_valid & (wb_addr == max_addr):
+                # every pass gets judged on its own
+                update_made.next |= 0
+
+        # a contradiction drops active straight away, same as BCP
+        self.active_o <<= active & ~contradiction
+        self.status_o <<= contradiction
@@ -0,0 +1,160 @@
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import backends
+from consts import CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE
+from dpll import build_dpll, DpllDesign
+from dimacs import CnfInstance, encode_clauses, encode_occurrences, initial_var_mem, unsatisfied_clauses
+
+MAX_CYCLES = 10 ** 7
+# cycles run() goes between looks at the clock
+CLOCK_CYCLES = 1024
+
+@dataclass
+class RunResult:
+    finished: bool
+    sat: bool
+    cycles: int
+    sim_seconds: float
+    decisions: int = 0
+    conflicts: int = 0
+    backtrack_cycles: int = 0
+    # the budget that ran out before done went high, "cycles" or "seconds" (None if it finished)
+    exhausted: Optional[str] = None
+    # on SAT, what the design assigned each of the instance's variables (index 0 unused, None if it's unassigned),
+    # and whether that satisfies every clause. left as None by anything that doesn't read the var memory back
+    model: Optional[List[Optional[int]]] = None
+    verified: Optional[bool] = None
+
+    @property
+    def verdict(self) -> str:
+        if not self.finished:
+            return "TIMEOUT"
+        return "SAT" if self.sat else "UNSAT"
+
+# builds a design, returns it and how long building it took
+def elaborate(clause_bits: int = CLAUSE_BITS, var_bits: int = VAR_BITS, clause_size: int = CLAUSE_SIZE, lanes: int = 1,
+              engine: str = "scan", wrap_around: bool = False, cdcl: bool = False, decision: str = "static",
+              polarity: str = "zero", undo: str = "scan", store: str = "memory"):
+    start = time.perf_counter()
+    design = build_dpll(clause_bits, var_bits, clause_size, lanes, engine, wrap_around, cdcl, decision, polarity, undo, store)
+    return design, time.perf_counter() - start
+
+# every design we've elaborated in this process, keyed by everything build_dpll takes
+_designs = {}
+
+# elaborate a design of this size, or hand back the one we already built
+# returns the design and how long it took to build the first time round
+def get_design(clause_bits: int, var_bits: int, clause_size: int, lanes: int = 1, engine: str = "scan",
+               wrap_around: bool = False, cdcl: bool = False, decision: str = "static", polarity: str = "zero",
+               undo: str = "scan", store: str = "memory"):
+    key = (clause_bits, var_bits, clause_size, lanes, engine, wrap_around, cdcl, decision, polarity, undo, store)
+    if key not in _designs:
+        _designs[key] = elaborate(*key)
+    return _designs[key]
+
+# the smallest design that can hold this instance
+# every lane needs the clause memory to still have at least two rows
+def design_for(instance: CnfInstance, lanes: int = 1, engine: str = "scan", wrap_around: bool = False,
+               cdcl: bool = False, decision: str = "static", polarity: str = "zero", undo: str = "scan", store: str = "memory"):
+    clause_bits, var_bits, clause_size = instance.design_size()
+    clause_bits = max(clause_bits, lanes.bit_length())
+    return get_design(clause_bits, var_bits, clause_size, lanes, engine, wrap_around, cdcl, decision, polarity, undo, store)
+
+def fits(design: DpllDesign, instance: CnfInstance) -> bool:
+    return instance.fits(design.clause_bits, design.var_bits, design.clause_size)
+
+def memory_value_map(design: DpllDesign, instance: CnfInstance):
+    memories = {
+        design.var_mem: initial_var_mem(design.var_bits),
+        design.clause_mem: encode_clauses(instance.clauses, design.var_bits, design.clause_size, design.lanes),
+    }
+    if design.engine == "occurrence":
+        index, occurrences = encode_occurrences(instance.clauses, design.var_bits, design.bcp.occ_bits)
+        memories[design.occ_index_mem] = index
+        memories[design.occ_list_mem] = occurrences
+    return memories
+
+def new_simulation(design: DpllDesign, instance: CnfInstance, backend: str = None):
+    assert fits(design, instance)
+    return backends.simulation(
+        tracer=None, memory_value_map=memory_value_map(design, instance), block=design.block, backend=backend
+    )
+
+# the outputs run() reads, so a tracer for the compiled backend has to include them
+RESULT_WIRES = ["done", "sat", "decisions", "conflicts", "backtrack_cycles"]
+
+# step a simulation until done goes high or a budget runs out: max_cycles more cycles, or max_seconds of wall clock
+# (looked at every CLOCK_CYCLES cycles, so it can run over by up to that many)
+# reads done and the counters straight from the simulator, no tracer needed, and does as little as it can per cycle
+def run(sim, max_cycles: int = MAX_CYCLES, max_seconds: Optional[float] = None) -> RunResult:
+    start = time.perf_counter()
+    deadline = None if max_seconds is None else start + max_seconds
+    step = sim.step
+    inspect = sim.inspect
+    inputs = {}
+    cycles = 0
+    done = 0
+    while cycles < max_cycles and done != 1:
+        step(inputs)
+        cycles += 1
+        done = inspect("done")
+        if deadline is not None and cycles % CLOCK_CYCLES == 0 and time.perf_counter() > deadline:
+            break
+    sim_seconds = time.perf_counter() - start
+
+    exhausted = None
+    if done != 1:
+        exhausted = "cycles" if cycles >= max_cycles else "seconds"
+    return RunResult(done == 1, done == 1 and inspect("sat") == 1, cycles, sim_seconds, inspect("decisions"),
+                     inspect("conflicts"), inspect("backtrack_cycles"), exhausted)
+
+# the value bit of every variable in the var memory, None where the assigned bit isn't set (index 0 unused)
+# at SAT every variable has just been written, so nothing a flash undo left behind is still in there
+def read_model(sim, design: DpllDesign, num_vars: int) -> List[Optional[int]]:
+    mem = sim.inspect_mem(design.var_mem)
+    words = [mem.get(var, 0) for var in range(num_vars + 1)]
+    return [None] + [(word >> 1) & 1 if word & 1 else None for word in words[1:]]
+
+# reads the model back into a SAT result and checks it against the instance's clauses
+def certify(result: RunResult, sim, design: DpllDesign, instance: CnfInstance) -> RunResult:
+    if result.sat:
+        result.model = read_model(sim, design, instance.num_vars)
+        result.verified = not unsatisfied_clauses(instance.clauses, result.model)
+    return result
+
+# simulate an instance until done goes high or we run out of cycles (or seconds)
+def run_instance(design: DpllDesign, instance: CnfInstance, max_cycles: int = MAX_CYCLES, backend: str = None,
+                 max_seconds: Optional[float] = None) -> RunResult:
+    sim = new_simulation(design, instance, backend)
+    return certify(run(sim, max_cycles, max_seconds), sim, design, instance)
+
+class BackendMismatch(AssertionError):
+    pass
+
+# run the same instance on two backends in lockstep and check that done and sat agree on every cycle
+# returns the result from the first backend
+def cross_check(design: DpllDesign, instance: CnfInstance, backend: str, reference: str, max_cycles: int = MAX_CYCLES) -> RunResult:
+    sim = new_simulation(design, instance, backend)
+    ref_sim = new_simulation(design, instance, reference)
+
+    start = time.perf_counter()
+    cycles = 0
+    done = 0
+    while cycles < max_cycles and done != 1:
+        sim.step({})
+        ref_sim.step({})
+        cycles += 1
+        for wire in ("done", "sat"):
+            if sim.inspect(wire) != ref_sim.inspect(wire):
+                raise BackendMismatch(
+                    f"{instance.path}: {wire} differs on cycle {cycles}: "
+                    f"{backend}={sim.inspect(wire)} {reference}={ref_sim.inspect(wire)}"
+                )
+        done = sim.inspect("done")
+    sim_seconds = time.perf_counter() - start
+
+    result = RunResult(done == 1, done == 1 and sim.inspect("sat") == 1, cycles, sim_seconds, sim.inspect("decisions"),
+                       sim.inspect("conflicts"), sim.inspect("backtrack_cycles"))
+    return certify(result, sim, design, instance)
@@ -0,0 +1,169 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, List
+
+from benchmark import BenchmarkOptions, run_benchmark
+from dimacs import find_instances
+from dpll import ENGINES
+import backends
+import runner
+import timing
+
+# design space exploration: build the design at every point of a grid of sizes (and engines / lane counts),
+# run static timing and area on it and push a benchmark set through it
+# every point gets an estimated time to solution (mean cycles over the max frequency) and the ones that
+# nothing else beats on both time and area make up the pareto front
+#
+# cycles only mean something compared over the same instances, so time to solution is taken over the instances
+# every point solved. bigger designs fit more instances, `solved` says how many each point managed on its own
+
+@dataclass
+class SweepPoint:
+    clause_bits: int
+    var_bits: int
+    clause_size: int
+    lanes: int
+    engine: str
+    max_freq_mhz: float
+    critical_path_ps: float
+    gates: int
+    # read ports on the variable memory, the thing that sets the clock at the moment
+    var_mem_read_ports: int
+    clause_mem_read_ports: int
+    area_mm2: float
+    # instances that ran on this point / got an answer
+    instances: int
+    solved: int
+    # over the instances every point solved
+    mean_cycles: float
+    time_to_solution_us: float
+    pareto: bool = False
+
+    @property
+    def name(self) -> str:
+        details = "".join([
+            f" {self.lanes} lanes" if self.lanes != 1 else "",
+            f" {self.engine}" if self.engine != "scan" else "",
+        ])
+        return f"{self.clause_bits}/{self.var_bits}/{self.clause_size}{details}"
+
+# a point is on the front if no other point is at least as fast and at least as small, and better at one of them
+# points that have no time to solution (nothing in common was solved) are left out
+def pareto_front(points: List[SweepPoint]) -> List[SweepPoint]:
+    timed = [point for point in points if point.time_to_solution_us > 0]
+    def dominates(a: SweepPoint, b: SweepPoint) -> bool:
+        return (
+            a.time_to_solution_us <= b.time_to_solution_us and a.area_mm2 <= b.area_mm2
+            and (a.time_to_solution_us < b.time_to_solution_us or a.area_mm2 < b.area_mm2)
+        )
+    return [point for point in timed if not any(dominates(other, point) for other in timed)]
+
+# every combination that's buildable, engines other than scan don't have lanes
+# and every lane needs the clause memory to still have at least two rows
+# anything else in options (backend, max_cycles...) is the same for every point
+def grid(clause_bits: List[int], var_bits: List[int], clause_size: List[int], lanes: List[int], engines: List[str],
+         **options) -> List[BenchmarkOptions]:
+    return [
+        BenchmarkOptions(cb, vb, cs, lane_count, engine, **options)
+        for cb, vb, cs, lane_count, engine in itertools.product(clause_bits, var_bits, clause_size, lanes, engines)
+        if (engine == "scan" or lane_count == 1) and cb >= lane_count.bit_length()
+    ]
+
+def run_sweep(paths, points: List[BenchmarkOptions], jobs: int = 1, on_row=None, log=sys.stdout) -> Dict[str, list]:
+    all_rows = []
+    reports = []
+    for options in points:
+        size = (options.clause_bits, options.var_bits, options.clause_size)
+        print(f"== {size[0]}/{size[1]}/{size[2]} lanes:{options.lanes} engine:{options.engine}", file=log, flush=True)
+        reports.append(timing.timing_report(*size, options.lanes, options.engine))
+        all_rows.append(run_benchmark(paths, options, jobs, on_row, log))
+
+    solved = [
+        {row.path: row for row in rows if row.verdict in ("SAT", "UNSAT")}
+        for rows in all_rows
+    ]
+    common = set.intersection(*(set(by_path) for by_path in solved)) if solved else set()
+
+    sweep = []
+    for options, report, rows, by_path in zip(points, reports, all_rows, solved):
+        cycles = [by_path[path].cycles for path in common]
+        mean_cycles = sum(cycles) / len(cycles) if cycles else 0.0
+        sweep.append(SweepPoint(
+            options.clause_bits, options.var_bits, options.clause_size, options.lanes, options.engine,
+            report.max_freq_mhz, report.critical_path_ps, report.gates,
+            report.memory_ports.get("Variable Memory", (0, 0))[0], report.memory_ports.get("Clause Storage", (0, 0))[0],
+            report.area_mm2,
+            sum(1 for row in rows if row.verdict != "TOO_LARGE"), len(by_path),
+            mean_cycles, report.runtime_us(mean_cycles),
+        ))
+    for point in pareto_front(sweep):
+        point.pareto = True
+    return {"points": sweep, "common": sorted(common), "rows": [row for rows in all_rows for row in rows]}
+
+def print_sweep(points: List[SweepPoint], common: int, log=sys.stdout):
+    print(f"time to solution is the mean over the {common} instances every point solved, * marks the pareto front", file=log)
+    header = ["point", "fmax MHz", "crit ns", "gates", "var ports", "area mm2", "solved", "mean cycles", "tts us"]
+    table = [
+        [
+            ("* " if point.pareto else "  ") + point.name,
+            f"{point.max_freq_mhz:.1f}", f"{point.critical_path_ps / 1e3:.1f}", str(point.gates),
+            str(point.var_mem_read_ports), f"{point.area_mm2:.3f}", f"{point.solved}/{point.instances}",
+            f"{point.mean_cycles:.0f}", f"{point.time_to_solution_us:.0f}",
+        ]
+        # fastest first, anything without a time to solution at the bottom
+        for point in sorted(points, key=lambda point: (point.time_to_solution_us <= 0, point.time_to_solution_us))
+    ]
+    widths = [max(len(line[i]) for line in [header] + table) for i in range(len(header))]
+    for line in [header] + table:
+        print("  ".join(cell.rjust(width) if i else cell.ljust(width) for i, (cell, width) in enumerate(zip(line, widths))), file=log)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="sweep the dpll design over a grid of sizes")
+    parser.add_argument("instances", nargs="+", help="cnf files, directories or globs to benchmark every point on")
+    parser.add_argument("--clause-bits", type=int, nargs="+", required=True)
+    parser.add_argument("--var-bits", type=int, nargs="+", required=True)
+    parser.add_argument("--clause-size", type=int, nargs="+", required=True)
+    parser.add_argument("--lanes", type=int, nargs="+", default=[1])
+    parser.add_argument("--engine", choices=ENGINES, nargs="+", default=["scan"])
+    parser.add_argument("--max-cycles", type=int, default=runner.MAX_CYCLES)
+    parser.add_argument("--backend", choices=list(backends.BACKENDS), default=backends.get_backend())
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="worker processes, 0 for one per core")
+    parser.add_argument("--csv", help="write one row per point here")
+    parser.add_argument("--json", help="write the points, the pareto front and every instance result here")
+    args = parser.parse_args(argv)
+
+    paths = [path for pattern in args.instances for path in find_instances(pattern)]
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    points = grid(
+        args.clause_bits, args.var_bits, args.clause_size, args.lanes, args.engine,
+        max_cycles=args.max_cycles, backend=args.backend, timing=True
+    )
+
+    result = run_sweep(paths, points, jobs)
+    print_sweep(result["points"], len(result["common"]))
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=[f.name for f in fields(SweepPoint)])
+            writer.writeheader()
+            for point in result["points"]:
+                writer.writerow(asdict(point))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "points": [asdict(point) for point in result["points"]],
+                "pareto": [point.name for point in result["points"] if point.pareto],
+                "common_instances": result["common"],
+                "instances": [asdict(row) for row in result["rows"]],
+            }, file, indent=2)
+
+    # non-zero exit if we ever got the wrong answer
+    return 1 if any(row.correct is False for row in result["rows"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ import random
 directory = pathlib.Path(__file__)
 sys.path.append(str(directory.parents[1]))
 
+import backends
 import helpers
 
 def double_saturate_one_bit_test():
@@ -21,7 +22,7 @@ def double_saturate_one_bit_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
 
     test_vals = [
         [0,0,0],
@@ -46,7 +47,7 @@ def double_saturate_two_bit_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
 
     test_vals = [
         [0,0,0],
@@ -78,7 +79,7 @@ def create_bin_tree_add_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
 
     random.seed(77777)
     for i in range(100):
@@ -91,10 +92,49 @@ def create_bin_tree_add_test():
         sim.step(in_state)
         assert sim_trace.trace["create_bin_tree_add_test_out"][-1] == expected
 
+# every log depth helper on in_count input bits, random inputs with a few bits set and with about half set
+def log_depth_helpers_test():
+    for in_count in [1, 2, 5, 8, 13]:
+        pyrtl.reset_working_block()
+        pyrtl.set_debug_mode(False)
+
+        # setup
+        ins = helpers.wirevector_list(1, "log_depth_in", in_count, pyrtl.Input)
+        lowest_valid, lowest = helpers.priority_encode(ins)
+        highest_valid, highest = helpers.priority_encode(ins, highest=True)
+        wires = {
+            "lowest_valid": lowest_valid, "lowest": lowest, "highest_valid": highest_valid, "highest": highest,
+            "first_set": helpers.find_first_set(ins), "popcount": helpers.popcount(ins),
+            "saturated_2": helpers.saturating_count(ins), "saturated_3": helpers.saturating_count(ins, 3),
+        }
+        for name, wire in wires.items():
+            out = pyrtl.Output(bitwidth=wire.bitwidth, name=f"log_depth_{name}")
+            out <<= wire
+
+        # test
+        sim = backends.simulation(tracer=None)
+
+        random.seed(in_count)
+        for i in range(100):
+            bits = [int(random.random() < (0.1 if i % 2 else 0.5)) for _ in range(in_count)]
+            sim.step({f"log_depth_in_{k}": bits[k] for k in range(in_count)})
+            set_bits = [k for k in range(in_count) if bits[k]]
+            count = len(set_bits)
+            expected = {
+                "lowest_valid": count > 0, "lowest": set_bits[0] if set_bits else 0,
+                "highest_valid": count > 0, "highest": set_bits[-1] if set_bits else 0,
+                "first_set": 1 << set_bits[0] if set_bits else 0, "popcount": count,
+                # thermometer codes
+                "saturated_2": (1 << min(count, 2)) - 1, "saturated_3": (1 << min(count, 3)) - 1,
+            }
+            for name, value in expected.items():
+                assert sim.inspect(f"log_depth_{name}") == value, (in_count, bits, name)
+
 tests = [
     double_saturate_one_bit_test,
     double_saturate_two_bit_test,
-    create_bin_tree_add_test
+    create_bin_tree_add_test,
+    log_depth_helpers_test,
 ]
 
 if __name__ == "__main__":
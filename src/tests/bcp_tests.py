@@ -9,11 +9,12 @@ import itertools
 directory = pathlib.Path(__file__)
 sys.path.append(str(directory.parents[1]))
 
+import backends
 from bcp import BCP
 from helpers import connect_wire_lists, wirevector_list
 
-def basic_setup():
-    bcp = BCP(8, 8, 4)
+def basic_setup(wrap_around = False):
+    bcp = BCP(8, 8, 4, wrap_around = wrap_around)
     bcp.start_i <<= Input(bitwidth = 1, name = "start")
 
     connect_wire_lists(bcp.var_vals_i,     wirevector_list(1, "var_vals", 4, Input))
@@ -56,7 +57,7 @@ def bcp_inactive_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
 
     for bitstring in itertools.product(range(2), repeat=8): # all length 8 bit strings
         inputs = {
@@ -94,7 +95,7 @@ def bcp_write_loop_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
 
     input = copy.deepcopy(DEFAULT_INPUT)
     input["start"] = 1
@@ -140,6 +141,53 @@ def bcp_write_loop_test():
     sim.step(DEFAULT_INPUT)
     assert sim_trace.trace["test_active"][-1] == 0
 
+# same clauses as bcp_write_loop_test, but instead of going again from 0 the scan carries on round
+# and stops just before the clause that implied
+def bcp_wrap_around_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(True)
+
+    bcp = basic_setup(wrap_around = True)
+    memory = {
+        0xAA: 0b100000100000000011100000010000000001
+    }
+
+    sim_trace = pyrtl.SimulationTrace()
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
+
+    input = copy.deepcopy(DEFAULT_INPUT)
+    input["start"] = 1
+    sim.step(input)
+    for i in range(170):
+        sim.step(DEFAULT_INPUT)
+        assert sim_trace.trace["test_active"][-1] == 1
+
+    input = copy.deepcopy(DEFAULT_INPUT)
+    input["var_vals_0"] = 0
+    input["var_assigned_0"] = 1
+    input["var_assigned_2"] = 1
+    input["var_vals_3"] = 1
+    input["var_assigned_3"] = 1
+    sim.step(input)
+    assert sim_trace.trace["va_write_enable"][-1] == 1
+    assert sim_trace.trace["va_write_addr"][-1] == 2
+
+    # 0xAB up to 0xFF, then 0x00 up to 0xA9
+    for i in range(255):
+        sim.step(DEFAULT_INPUT)
+        assert sim_trace.trace["test_active"][-1] == 1
+    assert sim_trace.trace["va_addrs_0"][-1] == 0
+    sim.step(DEFAULT_INPUT)
+    assert sim_trace.trace["test_active"][-1] == 0
+
+    # with nothing to imply it's a single pass, same as without wrap_around
+    sim.step({**DEFAULT_INPUT, "start": 1})
+    for i in range(256):
+        sim.step(DEFAULT_INPUT)
+        assert sim_trace.trace["test_active"][-1] == 1
+    sim.step(DEFAULT_INPUT)
+    assert sim_trace.trace["test_active"][-1] == 0
+
 def bcp_chain_implication_test():
     pyrtl.reset_working_block()
     pyrtl.set_debug_mode(True)
@@ -158,7 +206,7 @@ def bcp_chain_implication_test():
     }
 
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
 
     input = copy.deepcopy(DEFAULT_INPUT)
     input["start"] = 1
@@ -253,10 +301,66 @@ def bcp_chain_implication_test():
     assert sim_trace.trace["va_write_addr"][-1] == 4
     assert sim_trace.trace["va_write_val"][-1] == 1
 
+# two lanes that both imply in the same cycle: the lower lane writes first and the row is looked at again
+def bcp_lanes_arbitration_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(True)
+
+    bcp = BCP(3, 3, 2, lanes=2)
+    bcp.start_i <<= Input(bitwidth = 1, name = "start")
+    connect_wire_lists(bcp.var_vals_i,     wirevector_list(1, "var_vals", 4, Input))
+    connect_wire_lists(bcp.var_assigned_i, wirevector_list(1, "var_assigned", 4, Input))
+
+    active = Output(bitwidth = 1, name = "test_active")
+    status = Output(bitwidth = 1, name = "status")
+    va_write_addr = Output(bitwidth = 3, name = "va_write_addr")
+    va_write_val = Output(bitwidth = 1, name = "va_write_val")
+    va_write_enable = Output(bitwidth = 1, name = "va_write_enable")
+    va_addrs = wirevector_list(3, "va_addrs", 4, Output)
+    active <<= bcp.active_o
+    status <<= bcp.status_o
+    connect_wire_lists(va_addrs, bcp.va_addrs_o)
+    va_write_addr <<= bcp.va_write_addr_o
+    va_write_val <<= bcp.va_write_val_o
+    va_write_enable <<= bcp.va_write_enable_o
+
+    # row 0: x1 | x2
+    # row 1: x4 | x3
+    memory = {
+        0: 0b0001 | 0b0010 << 8,
+        1: 0b0100 | 0b0011 << 8,
+    }
+
+    sim_trace = pyrtl.SimulationTrace()
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={bcp.clause_storage.mem: memory})
+
+    nothing_assigned = {"start": 0, **{f"var_vals_{i}": 0 for i in range(4)}, **{f"var_assigned_{i}": 0 for i in range(4)}}
+    sim.step({**nothing_assigned, "start": 1})
+
+    # both lanes imply, lane 0 wins
+    sim.step(nothing_assigned)
+    assert sim_trace.trace["va_write_enable"][-1] == 1
+    assert sim_trace.trace["va_write_addr"][-1] == 1
+    assert sim_trace.trace["va_write_val"][-1] == 1
+
+    # same row again, now that x1 is set only lane 1 implies
+    sim.step({**nothing_assigned, "var_vals_0": 1, "var_assigned_0": 1})
+    assert sim_trace.trace["va_write_enable"][-1] == 1
+    assert sim_trace.trace["va_write_addr"][-1] == 2
+    assert sim_trace.trace["va_write_val"][-1] == 1
+
+    # row 1: x4 is implied in lane 0 but x3 is already false so lane 1 conflicts, the conflict wins
+    sim.step({**nothing_assigned, "var_assigned_2": 1})
+    assert sim_trace.trace["va_write_enable"][-1] == 0
+    assert sim_trace.trace["status"][-1] == 1
+    assert sim_trace.trace["test_active"][-1] == 0
+
 tests = [
     bcp_inactive_test,
     bcp_write_loop_test,
-    bcp_chain_implication_test
+    bcp_wrap_around_test,
+    bcp_chain_implication_test,
+    bcp_lanes_arbitration_test,
 ]
 
 if __name__ == "__main__":
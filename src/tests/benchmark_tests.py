@@ -0,0 +1,80 @@
+import contextlib
+import dataclasses
+import io
+import os
+import pathlib
+import sys
+import time
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import benchmark
+from benchmark import BenchmarkOptions
+
+# stands in for benchmark_instance in the workers: crash.cnf takes its worker down straight away, everything
+# else takes long enough to still be in flight when it does. it gets handed to run_parallel, so it's what the workers
+# run however they're started (fork, spawn or forkserver), and it says which process it ran in
+def crash_or_finish(path, options):
+    if path.name == "crash.cnf":
+        os._exit(1)
+    time.sleep(0.5)
+    return benchmark.failed_row(path, "SAT", options), [f"{path}: done in {os.getpid()}"]
+
+def mismatch(path, options):
+    return benchmark.failed_row(path, "MISMATCH", options), [f"{path}: differs"]
+
+def crashed_worker_test():
+    paths = [pathlib.Path("instances") / name for name in ["a.cnf", "crash.cnf", "b.cnf", "c.cnf"]]
+    rows = []
+    log = io.StringIO()
+    benchmark.run_parallel(paths, BenchmarkOptions(), 4, rows.append, log, crash_or_finish)
+
+    # the ones that shared a pool with it get retried on their own rather than going down with it
+    verdicts = {pathlib.Path(row.path).name: row.verdict for row in rows}
+    assert verdicts == {"a.cnf": "SAT", "crash.cnf": "CRASHED", "b.cnf": "SAT", "c.cnf": "SAT"}, verdicts
+    assert f"crashed {benchmark.MAX_CRASHES} times" in log.getvalue()
+    # what each instance had to say goes to the log, not stdout, and it was said by a worker
+    done = [line for line in log.getvalue().splitlines() if ": done in " in line]
+    assert len(done) == 3 and all(int(line.rsplit(" ", 1)[1]) != os.getpid() for line in done)
+
+def serial_messages_test():
+    paths = [pathlib.Path("instances") / name for name in ["a.cnf", "b.cnf"]]
+    log = io.StringIO()
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        rows = benchmark.run_benchmark(paths, BenchmarkOptions(), 1, log=log, run=mismatch)
+
+    assert [row.verdict for row in rows] == ["MISMATCH", "MISMATCH"]
+    assert all(f"{path}: differs" in log.getvalue() for path in paths)
+    assert stdout.getvalue() == ""
+
+def variant_sweep_test():
+    options = BenchmarkOptions()
+    solved = dataclasses.replace(
+        benchmark.failed_row(pathlib.Path("uuf50-218") / "a.cnf", "UNSAT", options), cycles=100, max_freq_mhz=10.0, runtime_us=10.0
+    )
+    timed_out = dataclasses.replace(solved, engine="pipelined", verdict="TIMEOUT")
+
+    # nothing was solved by both, so there's no speedup to speak of rather than a speedup of 0
+    sweep = benchmark.variant_sweep([solved, timed_out])["uuf50-218"]
+    assert all(stats["speedup"] is None and stats["runtime_speedup"] is None for stats in sweep.values())
+    log = io.StringIO()
+    benchmark.print_summary([solved, timed_out], log)
+    assert "n/a, no instance was solved by every variant" in log.getvalue() and "0.00x" not in log.getvalue()
+
+    faster = dataclasses.replace(solved, engine="pipelined", cycles=50, runtime_us=4.0)
+    sweep = benchmark.variant_sweep([solved, faster])["uuf50-218"]
+    assert sweep["pipelined engine"]["speedup"] == 2.0 and sweep["pipelined engine"]["runtime_speedup"] == 2.5
+
+tests = [
+    crashed_worker_test,
+    serial_messages_test,
+    variant_sweep_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
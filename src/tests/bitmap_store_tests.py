@@ -0,0 +1,128 @@
+import pyrtl
+from pyrtl import Input, Output
+import pathlib
+import random
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+from bitmap_store import BitmapVarAssignStore
+from dimacs import initial_var_mem
+from var_assign_store import VarAssignStore
+
+VAR_BITS = 2
+OUTPUTS = ["needs_backtrack", "unsat", "sat", "ready_bcp", "decision_var"]
+NAMES = OUTPUTS + [f"assignment_{i}" for i in range(1, 2 ** VAR_BITS)]
+
+# a store with start, level and one write port driven from inputs, everything it decides on as outputs
+def basic_setup(store_class):
+    store = store_class(2, VAR_BITS, 3)
+    store.start <<= Input(bitwidth = 1, name = "start")
+    store.level <<= Input(bitwidth = VAR_BITS + 1, name = "level")
+    store.write(
+        Input(bitwidth = VAR_BITS, name = "write_addr"), Input(bitwidth = store.word_bits, name = "write_word"),
+        Input(bitwidth = 1, name = "write")
+    )
+    store.finish_writes()
+    for name in OUTPUTS:
+        wire = getattr(store, name)
+        output = Output(bitwidth = wire.bitwidth, name = name)
+        output <<= wire
+    for i in range(1, 2 ** VAR_BITS):
+        output = Output(bitwidth = 2, name = f"assignment_{i}")
+        output <<= store.every_assignment[i]
+    return store
+
+def step(sim, start = 0, level = 0, write = 0, write_addr = 0, write_word = 0):
+    sim.step({"start": start, "level": level, "write": write, "write_addr": write_addr, "write_word": write_word})
+
+# word for var, the same layout VarAssignStore uses
+def word(var, assigned = 0, val = 0, level = 0, root = 0):
+    return assigned | (val << 1) | (level << 2) | (var << (3 + VAR_BITS)) | (root << (3 + 2 * VAR_BITS))
+
+def bitmap_store_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(False)
+
+    store = basic_setup(BitmapVarAssignStore)
+    sim = backends.simulation(tracer = None, memory_value_map = {store.mem: initial_var_mem(VAR_BITS)})
+
+    # decisions go to the lowest unassigned variable, and the mirror follows the memory
+    for level in range(1, 4):
+        step(sim, start = 1, level = level)
+        assert sim.inspect("ready_bcp") == 1 and sim.inspect("decision_var") == level
+    step(sim, start = 1, level = 3)
+    assert sim.inspect("sat") == 1 and sim.inspect("ready_bcp") == 0
+    assert [sim.inspect(f"assignment_{i}") for i in range(1, 4)] == [0b01, 0b01, 0b01]
+    assert sim.inspect_mem(store.mem)[2] == word(2, assigned = 1, level = 2, root = 1)
+
+    # x3 through both values at level 3 needs a backtrack
+    step(sim, write = 1, write_addr = 3, write_word = word(3, val = 1, level = 3, root = 1))
+    step(sim, start = 1, level = 3)
+    assert sim.inspect("needs_backtrack") == 1 and sim.inspect("unsat") == 0
+    assert sim.inspect("assignment_3") == 0b10
+
+    # clearing x2 leaves it next to decide
+    step(sim, write = 1, write_addr = 2, write_word = word(2))
+    step(sim, write = 1, write_addr = 3, write_word = word(3))
+    step(sim, start = 1, level = 2)
+    assert sim.inspect("ready_bcp") == 1 and sim.inspect("decision_var") == 2
+
+    # the same at level 0 is unsat
+    step(sim, write = 1, write_addr = 1, write_word = word(1, val = 1))
+    step(sim, start = 1, level = 3)
+    assert sim.inspect("unsat") == 1 and sim.inspect("needs_backtrack") == 0
+
+    # nothing happens without start
+    step(sim, level = 1)
+    assert [sim.inspect(name) for name in OUTPUTS[:4]] == [0, 0, 0, 0]
+
+# random writes and decisions on both stores, everything they decide on has to match
+def bitmap_matches_memory_test():
+    pyrtl.set_debug_mode(False)
+
+    sims = []
+    for store_class in [VarAssignStore, BitmapVarAssignStore]:
+        block = pyrtl.Block()
+        with pyrtl.set_working_block(block, no_sanity_check = True):
+            store = basic_setup(store_class)
+        sims.append(backends.simulation(
+            tracer = None, memory_value_map = {store.mem: initial_var_mem(VAR_BITS)}, block = block
+        ))
+
+    # the stores pick different variables out of several in the bad state, so there's only ever one
+    bad = set()
+    rng = random.Random(254)
+    for _ in range(300):
+        var = rng.randrange(1, 2 ** VAR_BITS)
+        assigned, val = rng.randrange(2), rng.randrange(2)
+        if not assigned and bad - {var}:
+            val = 0
+        # a write alongside a decision could be to the same variable, the decision would lose
+        start, write = rng.choice([(1, 0), (0, 1), (0, 0)])
+        inputs = {
+            "start": start, "level": rng.randrange(1, 2 ** (VAR_BITS + 1)), "write": write, "write_addr": var,
+            "write_word": word(var, assigned, val, rng.randrange(4), rng.randrange(2)),
+        }
+        if write:
+            bad = (bad - {var}) | ({var} if val and not assigned else set())
+        for sim in sims:
+            step(sim, **inputs)
+        memory, bitmap = ([sim.inspect(name) for name in NAMES] for sim in sims)
+        # (what would be decided on only means anything when something is)
+        if not sims[0].inspect("ready_bcp"):
+            memory[4] = bitmap[4]
+        assert memory == bitmap, (inputs, memory, bitmap)
+
+tests = [
+    bitmap_store_test,
+    bitmap_matches_memory_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
@@ -0,0 +1,85 @@
+import pyrtl
+import pathlib
+import sys
+import tempfile
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+import checkpoint
+import runner
+from dimacs import parse_dimacs
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+def checkpoint_resume_test():
+    pyrtl.set_debug_mode(False)
+
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    for variant in [(), (1, "scan", True, False, "static", "zero", "trail", "bitmap"), (1, "occurrence")]:
+        design, _ = runner.get_design(4, 3, 4, *variant)
+        expected = runner.run_instance(design, instance, 5000)
+        with tempfile.TemporaryDirectory() as folder:
+            path = pathlib.Path(folder) / "unsat-2.json"
+            # 7 cycles a go, with a checkpoint every 3, until it's done
+            runs = 0
+            while True:
+                result = checkpoint.run_instance(design, instance, path, every=3, max_cycles=7)
+                runs += 1
+                if result.finished:
+                    break
+                assert result.exhausted == "cycles" and result.cycles == 7 * runs
+                assert checkpoint.load(path).cycles == result.cycles
+            # cycle for cycle the same as running it in one go
+            assert (result.sat, result.cycles, result.decisions, result.conflicts, result.backtrack_cycles) == (
+                expected.sat, expected.cycles, expected.decisions, expected.conflicts, expected.backtrack_cycles
+            ), variant
+            assert runs == (expected.cycles + 6) // 7
+
+def checkpoint_snapshot_test():
+    pyrtl.set_debug_mode(False)
+
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    design, _ = runner.get_design(4, 3, 4)
+    sim = backends.simulation(tracer=None, memory_value_map=runner.memory_value_map(design, instance),
+                              block=design.block, registers=True)
+    runner.run(sim, 12)
+    snapshot = checkpoint.snapshot(sim, design, instance, 12)
+    assert set(snapshot.memories) == {design.var_mem.name, design.clause_mem.name}
+    assert snapshot.memories[design.var_mem.name] == {
+        addr: value for addr, value in sim.inspect_mem(design.var_mem).items() if value
+    }
+    assert "dpll_state" in snapshot.registers and "curr_level" in snapshot.registers
+    # the outputs compiled reads its registers through don't stay behind in the shared design
+    assert not any(name.startswith("probe_next_") for name in design.block.wirevector_by_name)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = pathlib.Path(folder) / "unsat-2.json"
+        checkpoint.save(snapshot, path)
+        assert checkpoint.load(path) == snapshot
+
+    # picked up on another backend, it carries on the same
+    other_backend = "fast" if backends.get_backend() == "sim" else "sim"
+    rest = runner.run(checkpoint.restore(design, snapshot, other_backend), 5000)
+    expected = runner.run_instance(design, instance, 5000)
+    assert rest.finished and not rest.sat and rest.cycles + 12 == expected.cycles
+
+    # but not on another design
+    other, _ = runner.get_design(4, 3, 4, 2)
+    try:
+        checkpoint.restore(other, snapshot)
+        assert False, "should have refused it"
+    except AssertionError as error:
+        assert "design" in str(error)
+
+tests = [
+    checkpoint_resume_test,
+    checkpoint_snapshot_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
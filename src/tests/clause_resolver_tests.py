@@ -8,6 +8,7 @@ import copy
 directory = pathlib.Path(__file__)
 sys.path.append(str(directory.parents[1]))
 
+import backends
 from clause_resolver import ClauseResolver
 from helpers import connect_wire_lists, wirevector_list
 
@@ -55,7 +56,7 @@ def clause_resolver_sat_unsat_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
     inputs = copy.deepcopy(DEFAULT_INPUT)
 
     inputs["var_assigned_0"] = 1
@@ -110,7 +111,7 @@ def clause_resolver_unknown_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
     inputs = copy.deepcopy(DEFAULT_INPUT)
 
     # all unassigned test
@@ -136,7 +137,7 @@ def clause_resolver_implied_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
     inputs = copy.deepcopy(DEFAULT_INPUT)
 
     # var 2 implied true
@@ -184,7 +185,7 @@ def clause_resolver_small_implied_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
     inputs = copy.deepcopy(DEFAULT_INPUT)
 
     # var 1 implied true
@@ -218,7 +219,7 @@ def clause_resolver_empty_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
     inputs = copy.deepcopy(DEFAULT_INPUT)
 
     # var 1 implied true
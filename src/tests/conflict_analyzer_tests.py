@@ -0,0 +1,147 @@
+import pyrtl
+from pyrtl import Input, Output
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+from clause_storage import ClauseStorage
+from conflict_analyzer import ConflictAnalyzer
+from dimacs import encode_clause, encode_clauses
+from var_assign_store import VarAssignStore
+
+CLAUSE_BITS = 2
+VAR_BITS = 3
+CLAUSE_SIZE = 3
+
+# an analyzer hooked up to a store and a clause memory of its own, with 4 instance clauses and 4 learned slots
+def basic_setup(var_bits = VAR_BITS, clause_size = CLAUSE_SIZE):
+    row_bits = CLAUSE_BITS + 1
+    store = VarAssignStore(CLAUSE_BITS, var_bits, clause_size, reason_bits = row_bits)
+    store.start <<= 0
+    store.level <<= 0
+    clause_storage = ClauseStorage(row_bits, var_bits, clause_size, read_ports = 2, writable = True)
+    clause_storage.addr_i <<= 0
+
+    analyzer = ConflictAnalyzer(CLAUSE_BITS, var_bits, clause_size, store, clause_storage)
+    analyzer.start_i <<= Input(bitwidth = 1, name = "start")
+    analyzer.conflict_addr_i <<= Input(bitwidth = row_bits, name = "conflict_addr")
+    analyzer.level_i <<= Input(bitwidth = var_bits + 1, name = "level")
+
+    for name in ["done", "learned", "assert_level", "assert_var", "assert_val", "assert_reason"]:
+        wire = getattr(analyzer, name + "_o")
+        output = Output(bitwidth = wire.bitwidth, name = name)
+        output <<= wire
+    return store, clause_storage
+
+# a VarAssignStore word, see var_assign_store.py
+def word(var, val, level, pos, reason = 0, root = False, var_bits = VAR_BITS):
+    fields = [(1, 1), (val, 1), (level, var_bits + 1), (var, var_bits), (int(root), 1), (pos, var_bits), (reason, CLAUSE_BITS + 1)]
+    value, shift = 0, 0
+    for field, bits in fields:
+        value |= field << shift
+        shift += bits
+    return value
+
+# runs from start until done, returns the outputs on that cycle and how long it took
+def analyze(sim, conflict_addr, level):
+    sim.step({"start": 1, "conflict_addr": conflict_addr, "level": level})
+    for cycle in range(50):
+        sim.step({"start": 0, "conflict_addr": 0, "level": level})
+        if sim.inspect("done"):
+            names = ["learned", "assert_level", "assert_var", "assert_val", "assert_reason"]
+            return {name: sim.inspect(name) for name in names}, cycle + 1
+    assert False, "never finished"
+
+# x4 decided at level 1, x1 at level 2, which implies x2 and x3 and they fall over together
+CLAUSES = [
+    [-1, 2],
+    [-1, 3],
+    [-2, -3, -4],
+]
+def trail(var_bits = VAR_BITS):
+    return {
+        4: word(4, 1, 1, 1, root = True, var_bits = var_bits),
+        1: word(1, 1, 2, 2, root = True, var_bits = var_bits),
+        2: word(2, 1, 2, 3, reason = 0, var_bits = var_bits),
+        3: word(3, 1, 2, 4, reason = 1, var_bits = var_bits),
+    }
+TRAIL = trail()
+
+def analyzer_uip_test():
+    pyrtl.set_debug_mode(False)
+
+    # the second size has 65 bit rows, with the UIP's literal going over the 64 bit mark
+    for var_bits, clause_size in [(VAR_BITS, CLAUSE_SIZE), (4, 13)]:
+        pyrtl.reset_working_block()
+        store, clause_storage = basic_setup(var_bits, clause_size)
+        sim = backends.simulation(tracer = None, memory_value_map = {
+            store.mem: trail(var_bits),
+            clause_storage.mem: encode_clauses(CLAUSES, var_bits, clause_size),
+        })
+
+        # x3 then x2 get resolved away, leaving x1 as the only one from level 2
+        result, cycles = analyze(sim, 2, 2)
+        assert result == {"learned": 1, "assert_level": 1, "assert_var": 1, "assert_val": 0, "assert_reason": 0b100}
+        # mark, pick twice each, then a last mark and pick, then shift x4 in and write
+        assert cycles == 2 * 2 + 2 + 2
+        # (-x4 | -x1) goes in the first learned slot, left aligned
+        learned = sim.inspect_mem(clause_storage.mem)[0b100]
+        assert learned == encode_clause([-4, -1], var_bits) << ((var_bits + 1) * (clause_size - 2))
+
+        # a second conflict on the same trail goes in the next slot, so nothing got left seen from the first one
+        result, _ = analyze(sim, 2, 2)
+        assert result["learned"] == 1 and result["assert_reason"] == 0b101
+        assert sim.inspect_mem(clause_storage.mem)[0b101] == learned
+
+def analyzer_fallback_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(False)
+
+    store, clause_storage = basic_setup()
+    # x5 is at level 1 and implied by the first learned slot, so it can't be written over
+    trail = dict(TRAIL)
+    trail[5] = word(5, 0, 1, 5, reason = 0b100)
+    sim = backends.simulation(tracer = None, memory_value_map = {
+        store.mem: trail,
+        clause_storage.mem: encode_clauses(CLAUSES, VAR_BITS, CLAUSE_SIZE),
+    })
+
+    result, _ = analyze(sim, 2, 2)
+    assert result["learned"] == 0
+    assert sim.inspect_mem(clause_storage.mem).get(0b100, 0) == 0
+    # it moves past the locked slot for the next one
+    result, _ = analyze(sim, 2, 2)
+    assert result["learned"] == 1 and result["assert_reason"] == 0b101
+
+    # x3 is implied by one decision each from levels 2 and 3 instead, which makes the clause 3 literals
+    # from lower levels on top of the UIP (x2 this time), one more than fits
+    pyrtl.reset_working_block()
+    store, clause_storage = basic_setup()
+    sim = backends.simulation(tracer = None, memory_value_map = {
+        store.mem: {
+            4: word(4, 1, 1, 1, root = True),
+            5: word(5, 1, 2, 2, root = True),
+            6: word(6, 1, 3, 3, root = True),
+            1: word(1, 1, 4, 4, root = True),
+            2: word(2, 1, 4, 5, reason = 0),
+            3: word(3, 1, 4, 6, reason = 3),
+        },
+        clause_storage.mem: encode_clauses(CLAUSES + [[-5, -6, 3]], VAR_BITS, CLAUSE_SIZE),
+    })
+    result, _ = analyze(sim, 2, 4)
+    assert result["learned"] == 0
+    assert sim.inspect_mem(clause_storage.mem).get(0b100, 0) == 0
+
+tests = [
+    analyzer_uip_test,
+    analyzer_fallback_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
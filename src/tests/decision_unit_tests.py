@@ -0,0 +1,105 @@
+import pyrtl
+from pyrtl import Input, Output
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+from decision_unit import ActivityDecider
+from var_assign_store import VarAssignStore
+
+CLAUSE_BITS = 2
+VAR_BITS = 3
+CLAUSE_SIZE = 3
+
+# a decider reading a store of its own, with the activity of every variable as an output
+def basic_setup(**decider_options):
+    store = VarAssignStore(CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE, external_decision = True)
+    store.start <<= 0
+    store.level <<= 0
+    decider = ActivityDecider(VAR_BITS, CLAUSE_SIZE, store.every_assignment, **decider_options)
+    store.decide_var_i <<= decider.var_o
+
+    decider.bump_i <<= Input(bitwidth = 1, name = "bump")
+    for i, var in enumerate(decider.bump_vars_i):
+        var <<= Input(bitwidth = VAR_BITS, name = f"bump_var_{i}")
+    decision = Output(bitwidth = VAR_BITS, name = "decision")
+    decision <<= store.decision_var
+    for i in range(1, 2 ** VAR_BITS):
+        activity = Output(bitwidth = decider.activity[i].bitwidth, name = f"activity_{i}")
+        activity <<= decider.activity[i]
+    return store
+
+def bump(sim, *variables):
+    inputs = {"bump": 1}
+    for i in range(CLAUSE_SIZE):
+        inputs[f"bump_var_{i}"] = variables[i] if i < len(variables) else 0
+    sim.step(inputs)
+
+def idle(sim):
+    sim.step({"bump": 0, **{f"bump_var_{i}": 0 for i in range(CLAUSE_SIZE)}})
+
+def activities(sim):
+    return [sim.inspect(f"activity_{i}") for i in range(1, 2 ** VAR_BITS)]
+
+def decider_pick_test():
+    pyrtl.reset_working_block()
+
+    store = basic_setup()
+    # x1 is assigned and x2 is in the bad state, neither can be picked
+    sim = backends.simulation(tracer = None, memory_value_map = {store.mem: {1: 0b11, 2: 0b10}})
+
+    # nothing's been bumped, so it's the same as the store's own choice
+    idle(sim)
+    assert sim.inspect("decision") == 3
+
+    # a tie between x5 and x6 goes to the lower one, x1 is more active than either but it's assigned
+    bump(sim, 6, 5, 1)
+    bump(sim, 1)
+    idle(sim)
+    assert activities(sim)[:6] == [2, 0, 0, 0, 1, 1]
+    assert sim.inspect("decision") == 5
+
+    bump(sim, 6)
+    idle(sim)
+    assert sim.inspect("decision") == 6
+
+def decider_decay_test():
+    pyrtl.reset_working_block()
+
+    # halve on every fourth contradiction
+    store = basic_setup(decay_bits = 2)
+    sim = backends.simulation(tracer = None, memory_value_map = {store.mem: {}})
+    for _ in range(3):
+        bump(sim, 3)
+    bump(sim, 4)
+    idle(sim)
+    # x3 went 3 -> 1 before x4 got its bump
+    assert activities(sim)[2:4] == [1, 1]
+
+    # a counter about to go over the top halves everything early, here on the 6th contradiction of 8
+    pyrtl.reset_working_block()
+    store = basic_setup(activity_bits = 2, decay_bits = 3)
+    sim = backends.simulation(tracer = None, memory_value_map = {store.mem: {}})
+    for _ in range(3):
+        bump(sim, 7)
+    bump(sim, 6)
+    bump(sim, 6)
+    idle(sim)
+    assert activities(sim)[5:7] == [2, 3]
+    bump(sim, 7)
+    idle(sim)
+    assert activities(sim)[5:7] == [1, 2]
+
+tests = [
+    decider_pick_test,
+    decider_decay_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
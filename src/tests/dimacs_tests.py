@@ -0,0 +1,218 @@
+import bz2
+import gzip
+import lzma
+import pathlib
+import random
+import sys
+import tempfile
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+from dimacs import (
+    CnfInstance, find_instances, parse_dimacs, encode_clause, encode_clauses, encode_occurrences, initial_var_mem,
+    unsatisfied_clauses, model_line
+)
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+def parse_example_test():
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-1.cnf")
+
+    assert instance.num_vars == 5
+    assert instance.num_clauses == 6
+    assert instance.clauses == [
+        [1],
+        [-1, 2],
+        [-1, -2, 3],
+        [-1, -2, -3, 4],
+        [-2, -3, -4, 5],
+        [-5],
+    ]
+    assert instance.max_clause_len == 4
+    assert instance.fits(3, 3, 4)
+    assert not instance.fits(2, 3, 4)
+    assert not instance.fits(3, 2, 4)
+    assert not instance.fits(3, 3, 3)
+
+def parse_satlib_test():
+    # SATLIB files end with a "%" line followed by a lone 0
+    instance = parse_dimacs(INSTANCE_DIR / "uf50-218" / "uf50-01.cnf")
+
+    assert instance.num_vars == 50
+    assert instance.num_clauses == 218
+    assert len(instance.clauses) == 218
+    assert instance.clauses[0] == [-3, 36, 7]
+
+def encode_test():
+    # same words as the hand built memories in bcp_tests.py
+    assert encode_clause([1], 8) == 0b000000001
+    assert encode_clause([-1, 2], 8) == 0b100000001000000010
+    assert encode_clause([-1, -2, -3, 4], 8) == 0b100000001100000010100000011000000100
+
+    memory = encode_clauses([[1], [2, -1]], 3, 4)
+    assert memory == {0: 0b0001, 1: 0b00101001}
+
+    var_mem = initial_var_mem(3)
+    assert len(var_mem) == 8
+    assert var_mem[5] == 5 << 6
+
+def wrapped_clauses_test():
+    text = (
+        "c clauses don't have to end with the line\n"
+        "p cnf 4 4\n"
+        "1 -2\n"
+        "  3 0 -4 0\n"
+        "0\n"
+        "2 4 0 -1 -3\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix, opener in [("", open), (".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)]:
+            path = pathlib.Path(tmp) / f"wrapped.cnf{suffix}"
+            with opener(path, "wt") as file:
+                file.write(text)
+
+            instance = parse_dimacs(path)
+            assert instance.num_vars == 4
+            assert instance.num_clauses == 4
+            # the lone 0 is skipped and the last clause is missing its 0
+            assert instance.clauses == [[1, -2, 3], [-4], [2, 4], [-1, -3]]
+
+        assert len(find_instances(tmp)) == 4
+
+def chunked_parse_test():
+    # [1, -2, 3] spans the first chunk boundary at every chunk size below 3 lines, [5, -6, 7, 8] spans several chunks
+    text = (
+        "p cnf 8 4\n"
+        "1 -2\n"
+        "3 0 -4\n"
+        "0 5\n"
+        "-6\n"
+        "7\n"
+        "8 0\n"
+        "2 0\n"
+    )
+    expected = [[1, -2, 3], [-4], [5, -6, 7, 8], [2]]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "chunked.cnf"
+        path.write_text(text)
+        for chunk_lines in range(1, 9):
+            assert parse_dimacs(path, chunk_lines).clauses == expected, chunk_lines
+
+    # and the same clauses as one big chunk on a real file
+    path = INSTANCE_DIR / "uf50-218" / "uf50-01.cnf"
+    assert parse_dimacs(path, 7).clauses == parse_dimacs(path).clauses
+
+def malformed_literal_test():
+    # numpy's text parsing would stop at the first of these (or read "- 2" as -2) rather than fail outright
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "malformed.cnf"
+        for line, bad in [("1 x 0", "x"), ("1 2.5 0", "2.5"), ("1 - 2 0", "-"), ("1 -2a 0", "-2a")]:
+            path.write_text(f"p cnf 3 2\n-1 3 0\n{line}\n")
+            for chunk_lines in (1, 2):
+                try:
+                    parse_dimacs(path, chunk_lines)
+                    assert False, f"{line!r} should have been refused"
+                except AssertionError as error:
+                    assert f"malformed literal {bad!r}" in str(error), (line, str(error))
+
+def encode_batch_test():
+    # the batch encoder has to agree with packing clauses one at a time
+    random.seed(254)
+    for var_bits, clause_size in [(1, 1), (3, 4), (6, 3), (8, 7), (12, 8)]:
+        clauses = [
+            [random.choice([-1, 1]) * random.randint(1, (1 << var_bits) - 1) for _ in range(random.randint(1, clause_size))]
+            for _ in range(50)
+        ]
+        memory = encode_clauses(clauses, var_bits, clause_size)
+        assert memory == {addr: encode_clause(clause, var_bits) for addr, clause in enumerate(clauses)}
+        # (12+1)*8 = 104 bit words get stitched together out of python ints
+        assert max(memory.values()) < 1 << ((var_bits + 1) * clause_size)
+
+    assert encode_clauses([], 3, 4) == {}
+
+    # lanes put clause addr*lanes + i in lane i of each word, the last row is padded out
+    clauses = [[1], [2, -1], [-3], [1, 2, 3]]
+    single = encode_clauses(clauses, 3, 4)
+    assert encode_clauses(clauses[:3], 3, 4, 2) == {0: single[0] | single[1] << 16, 1: single[2]}
+    assert encode_clauses(clauses, 3, 4, 4) == {0: single[0] | single[1] << 16 | single[2] << 32 | single[3] << 48}
+    # 4 lanes of 13*8 bit clauses
+    wide = encode_clauses([[200, -255]] * 5, 12, 8, 4)
+    assert wide[1] == encode_clause([200, -255], 12)
+    assert wide[0] == sum(encode_clause([200, -255], 12) << (104 * lane) for lane in range(4))
+
+def encode_occurrences_test():
+    clauses = [[1, -2], [2], [-2, 3, 1]]
+    index, occurrences = encode_occurrences(clauses, 2, 5)
+
+    def occurrences_of(lit):
+        start, end = index[lit] & 0b11111, index[lit] >> 5
+        return [occurrences[addr] for addr in range(start, end)]
+
+    # literal 0 is the unit clauses, then var*2 + negated
+    assert occurrences_of(0) == [1]
+    assert occurrences_of(1) == []
+    assert occurrences_of(2) == [0, 2]
+    assert occurrences_of(3) == []
+    assert occurrences_of(4) == [1]
+    assert occurrences_of(5) == [0, 2]
+    assert occurrences_of(6) == [2]
+    assert occurrences_of(7) == []
+    assert len(index) == 8
+    assert len(occurrences) == 7
+
+def design_size_test():
+    # 50 variables need 6 bits since 0 is reserved, 218 clauses need 8
+    instance = parse_dimacs(INSTANCE_DIR / "uf50-218" / "uf50-01.cnf")
+    assert instance.design_size() == (8, 6, 3)
+    assert instance.fits(*instance.design_size())
+
+    # exact powers of two
+    instance = CnfInstance("", 7, 8, [[1, -7]] * 8)
+    assert instance.design_size() == (3, 3, 2)
+    assert not instance.fits(2, 3, 2)
+    instance = CnfInstance("", 8, 9, [[8]] * 9)
+    assert instance.design_size() == (4, 4, 1)
+
+    # nothing ever goes below one bit
+    assert CnfInstance("", 1, 1, [[1]]).design_size() == (1, 1, 1)
+    assert CnfInstance("", 0, 0, []).design_size() == (1, 1, 1)
+
+def model_test():
+    # against checking one clause at a time, with repeated literals and unassigned variables thrown in
+    rng = random.Random(254)
+    for _ in range(200):
+        num_vars = rng.randint(1, 8)
+        clauses = [
+            [rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 4))]
+            for _ in range(rng.randint(1, 20))
+        ]
+        values = [None] + [rng.choice([0, 1, None]) for _ in range(num_vars)]
+        expected = [
+            index for index, clause in enumerate(clauses)
+            if not any(values[abs(lit)] is not None and values[abs(lit)] == (lit > 0) for lit in clause)
+        ]
+        assert unsatisfied_clauses(clauses, values) == expected
+    assert unsatisfied_clauses([], [None]) == []
+
+    assert model_line([None, 1, 0, 0, 1], 4) == "v 1 -2 -3 4 0"
+    assert model_line([None], 0) == "v 0"
+
+tests = [
+    parse_example_test,
+    parse_satlib_test,
+    encode_test,
+    wrapped_clauses_test,
+    chunked_parse_test,
+    malformed_literal_test,
+    encode_batch_test,
+    encode_occurrences_test,
+    design_size_test,
+    model_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
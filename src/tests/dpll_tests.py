@@ -0,0 +1,234 @@
+import pyrtl
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import runner
+from dimacs import parse_dimacs
+from dpll import build_dpll
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+def solve(design, name):
+    instance = parse_dimacs(INSTANCE_DIR / "example" / name)
+    result = runner.run_instance(design, instance, 5000)
+    assert result.finished
+    return result.sat
+
+def dpll_backtrack_test():
+    pyrtl.set_debug_mode(False)
+
+    # deciding x3 = 0 implies x4 and x6 at level 3 and runs into a conflict, and those have to be cleared before x3
+    # is flipped. with decisions written at level 0 they were left behind and this never finished
+    design = build_dpll(4, 3, 4)
+    assert solve(design, "sat-2.cnf")
+
+def dpll_examples_test():
+    pyrtl.set_debug_mode(False)
+
+    design = build_dpll(4, 3, 4)
+
+    assert solve(design, "sat-1.cnf")
+    assert not solve(design, "unsat-1.cnf")
+    # this one needs to backtrack through several levels
+    assert not solve(design, "unsat-2.cnf")
+
+def dpll_sizes_test():
+    pyrtl.set_debug_mode(False)
+
+    # two designs of different sizes can live side by side
+    small = build_dpll(3, 3, 4)
+    large = build_dpll(4, 4, 4)
+
+    assert small.block is not large.block
+    assert small.var_mem.bitwidth == 4 + 2*3
+    assert large.var_mem.bitwidth == 4 + 2*4
+    assert large.clause_mem.addrwidth == 4
+
+    assert solve(small, "sat-1.cnf")
+    assert solve(large, "sat-1.cnf")
+    assert not solve(small, "unsat-1.cnf")
+    assert not solve(large, "unsat-1.cnf")
+
+def design_reuse_test():
+    pyrtl.set_debug_mode(False)
+
+    # sat-1 and unsat-2 both fit a 4/3/4 design, so they should share it
+    sat = parse_dimacs(INSTANCE_DIR / "example" / "sat-1.cnf")
+    unsat = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    first, _ = runner.get_design(4, 3, 4)
+    second, _ = runner.get_design(4, 3, 4)
+    assert first is second
+    assert runner.run_instance(first, sat, 5000).sat
+    assert not runner.run_instance(second, unsat, 5000).sat
+
+    # the smallest design is picked per instance
+    design, _ = runner.design_for(sat)
+    assert (design.clause_bits, design.var_bits, design.clause_size) == sat.design_size()
+    assert design is not first
+    assert runner.run_instance(design, sat, 5000).sat
+
+def dpll_lanes_test():
+    pyrtl.set_debug_mode(False)
+
+    for lanes in [2, 4]:
+        design = build_dpll(4, 3, 4, lanes)
+        assert design.clause_mem.addrwidth == 4 - (lanes.bit_length() - 1)
+        assert design.clause_mem.bitwidth == (3 + 1) * 4 * lanes
+
+        assert solve(design, "sat-1.cnf")
+        assert not solve(design, "unsat-1.cnf")
+        assert not solve(design, "unsat-2.cnf")
+
+def dpll_wrap_around_test():
+    pyrtl.set_debug_mode(False)
+
+    for lanes in [1, 2]:
+        design = build_dpll(4, 3, 4, lanes, wrap_around=True)
+
+        assert solve(design, "sat-1.cnf")
+        assert not solve(design, "unsat-1.cnf")
+        assert not solve(design, "unsat-2.cnf")
+
+def dpll_occurrence_test():
+    pyrtl.set_debug_mode(False)
+
+    design = build_dpll(4, 3, 4, engine="occurrence")
+    assert design.occ_index_mem is not None
+
+    assert solve(design, "sat-1.cnf")
+    assert not solve(design, "unsat-1.cnf")
+    assert not solve(design, "unsat-2.cnf")
+
+def dpll_pipelined_test():
+    pyrtl.set_debug_mode(False)
+
+    for wrap_around in [False, True]:
+        design = build_dpll(4, 3, 4, engine="pipelined", wrap_around=wrap_around)
+
+        assert solve(design, "sat-1.cnf")
+        assert not solve(design, "unsat-1.cnf")
+        assert not solve(design, "unsat-2.cnf")
+
+def dpll_cdcl_test():
+    pyrtl.set_debug_mode(False)
+
+    for engine in ["scan", "pipelined"]:
+        design = build_dpll(4, 3, 4, engine=engine, cdcl=True)
+        # a learned half on top of the instance, and a pos and reason for every variable
+        assert design.clause_mem.addrwidth == 5
+        assert design.var_mem.bitwidth == 4 + 3*3 + 5
+
+        assert solve(design, "sat-1.cnf")
+        assert not solve(design, "unsat-1.cnf")
+        assert not solve(design, "unsat-2.cnf")
+
+    # unsat-2 needs more than one decision, so something gets learned on the way
+    design = build_dpll(4, 3, 4, cdcl=True)
+    sim = runner.new_simulation(design, parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf"))
+    for _ in range(5000):
+        sim.step({})
+        if sim.inspect("done"):
+            break
+    assert any(value for addr, value in sim.inspect_mem(design.clause_mem).items() if addr >= 16)
+
+    # rows over 64 bits (13 literals of 5 bits), packed into the learned half a literal at a time
+    design = build_dpll(4, 4, 13, cdcl=True)
+    assert solve(design, "sat-1.cnf")
+    assert not solve(design, "unsat-1.cnf")
+    assert not solve(design, "unsat-2.cnf")
+
+def dpll_activity_test():
+    pyrtl.set_debug_mode(False)
+
+    unsat = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    for engine, lanes, cdcl in [("scan", 1, False), ("scan", 2, False), ("occurrence", 1, False), ("pipelined", 1, True)]:
+        design = build_dpll(4, 3, 4, lanes, engine, cdcl=cdcl, decision="activity")
+        assert design.decider is not None
+
+        assert solve(design, "sat-1.cnf")
+        assert not solve(design, "unsat-1.cnf")
+        # x1 = 0 is the only decision, flipping it to 1 doesn't count
+        result = runner.run_instance(design, unsat, 5000)
+        assert result.finished and not result.sat
+        assert result.decisions == 1
+
+def dpll_polarity_test():
+    pyrtl.set_debug_mode(False)
+
+    unsat = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    for polarity in ["zero", "one", "saved", "random"]:
+        for engine, cdcl in [("scan", False), ("occurrence", False), ("scan", True)]:
+            design = build_dpll(4, 3, 4, engine=engine, cdcl=cdcl, polarity=polarity)
+
+            assert solve(design, "sat-1.cnf")
+            assert not solve(design, "unsat-1.cnf")
+            # whichever value x1 gets first, both of them fall over
+            result = runner.run_instance(design, unsat, 5000)
+            assert result.finished and not result.sat
+            assert result.decisions == 1 and result.conflicts == 2
+
+def dpll_undo_test():
+    pyrtl.set_debug_mode(False)
+
+    unsat = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    for engine, cdcl, decision, polarity in [
+        ("scan", False, "static", "zero"), ("occurrence", False, "activity", "saved"),
+        ("scan", True, "static", "zero"), ("pipelined", True, "activity", "random"),
+    ]:
+        scan = build_dpll(4, 3, 4, engine=engine, cdcl=cdcl, decision=decision, polarity=polarity)
+        expected = runner.run_instance(scan, unsat, 5000)
+        assert scan.trail is None and expected.backtrack_cycles > 0
+        for undo in ["trail", "flash"]:
+            design = build_dpll(4, 3, 4, engine=engine, cdcl=cdcl, decision=decision, polarity=polarity, undo=undo)
+            assert (design.trail is not None) == (undo == "trail")
+
+            assert solve(design, "sat-1.cnf")
+            assert not solve(design, "unsat-1.cnf")
+            # the same search as the scan, just no slower getting through the backtracking
+            result = runner.run_instance(design, unsat, 5000)
+            assert result.finished and not result.sat
+            assert (result.decisions, result.conflicts) == (expected.decisions, expected.conflicts)
+            assert result.backtrack_cycles < expected.backtrack_cycles
+            assert result.cycles <= expected.cycles
+
+def dpll_bitmap_store_test():
+    pyrtl.set_debug_mode(False)
+
+    # the bitmap store decides and checks the same way, so it's exactly the same run, cycle for cycle
+    for engine, decision, polarity in [("scan", "static", "zero"), ("occurrence", "activity", "saved")]:
+        memory = build_dpll(4, 3, 4, engine=engine, decision=decision, polarity=polarity, undo="trail")
+        bitmap = build_dpll(4, 3, 4, engine=engine, decision=decision, polarity=polarity, undo="trail", store="bitmap")
+        assert memory.var_mem.max_read_ports > bitmap.var_mem.max_read_ports
+        for name in ["sat-1.cnf", "unsat-1.cnf", "unsat-2.cnf"]:
+            instance = parse_dimacs(INSTANCE_DIR / "example" / name)
+            expected = runner.run_instance(memory, instance, 5000)
+            result = runner.run_instance(bitmap, instance, 5000)
+            assert result.finished and result.sat == expected.sat
+            assert (result.cycles, result.decisions, result.conflicts, result.backtrack_cycles) == (
+                expected.cycles, expected.decisions, expected.conflicts, expected.backtrack_cycles
+            )
+
+tests = [
+    dpll_backtrack_test,
+    dpll_examples_test,
+    dpll_sizes_test,
+    design_reuse_test,
+    dpll_lanes_test,
+    dpll_wrap_around_test,
+    dpll_occurrence_test,
+    dpll_pipelined_test,
+    dpll_cdcl_test,
+    dpll_activity_test,
+    dpll_polarity_test,
+    dpll_undo_test,
+    dpll_bitmap_store_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
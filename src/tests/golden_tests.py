@@ -0,0 +1,92 @@
+import itertools
+import pyrtl
+import pathlib
+import random
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import golden
+import runner
+from dimacs import CnfInstance, parse_dimacs
+from dpll import build_dpll
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+# small random instances, with repeated literals, tautologies and unit clauses left in on purpose
+def random_instance(rng, num_vars, num_clauses, clause_size):
+    clauses = [
+        [rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, clause_size))]
+        for _ in range(num_clauses)
+    ]
+    return CnfInstance("random", num_vars, num_clauses, clauses)
+
+def satisfies(clauses, values):
+    return all(any(values[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+def golden_brute_force_test():
+    rng = random.Random(254)
+    for _ in range(300):
+        instance = random_instance(rng, rng.randint(1, 6), rng.randint(1, 16), 3)
+        for polarity in golden.POLARITIES:
+            result = golden.solve(instance, 3, polarity)
+            expected = any(
+                satisfies(instance.clauses, (0,) + values) for values in itertools.product([0, 1], repeat=instance.num_vars)
+            )
+            assert result.sat == expected, instance.clauses
+            assert result.decisions == len(result.decision_trace)
+            assert result.conflicts == len(result.conflict_levels)
+            if result.sat:
+                # padding variables get decided too
+                assert len(result.model) == 8 and satisfies(instance.clauses, result.model)
+
+def golden_examples_test():
+    pyrtl.set_debug_mode(False)
+
+    # every variant the golden model follows makes the same search
+    for variant in [
+        {}, {"polarity": "one"}, {"lanes": 2}, {"wrap_around": True}, {"engine": "occurrence"}, {"engine": "pipelined"},
+        {"undo": "trail", "store": "bitmap"}, {"undo": "flash"},
+    ]:
+        design = build_dpll(4, 3, 4, **variant)
+        assert golden.matches_search(design)
+        for name in ["sat-1.cnf", "unsat-1.cnf", "unsat-2.cnf"]:
+            instance = parse_dimacs(INSTANCE_DIR / "example" / name)
+            result = runner.run_instance(design, instance, 5000)
+            expected = golden.solve(instance, 3, design.polarity)
+            assert result.finished
+            assert golden.differences(design, result, expected) == [], (variant, name)
+
+    # the rest only get their verdict checked
+    design = build_dpll(4, 3, 4, cdcl=True)
+    assert not golden.matches_search(design)
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    result = runner.run_instance(design, instance, 5000)
+    assert golden.differences(design, result, golden.solve(instance, 3)) == []
+    result.sat = True
+    assert golden.differences(design, result, golden.solve(instance, 3)) == ["verdict SAT, golden UNSAT"]
+
+def golden_random_test():
+    pyrtl.set_debug_mode(False)
+
+    design = build_dpll(4, 3, 3)
+    rng = random.Random(254)
+    for _ in range(20):
+        instance = random_instance(rng, rng.randint(1, 7), rng.randint(1, 16), 3)
+        result = runner.run_instance(design, instance, 20000)
+        expected = golden.solve(instance, 3)
+        assert result.finished
+        assert golden.differences(design, result, expected) == [], instance.clauses
+
+tests = [
+    golden_brute_force_test,
+    golden_examples_test,
+    golden_random_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
@@ -0,0 +1,133 @@
+import pyrtl
+from pyrtl import Input, Output
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+from occurrence_bcp import OccurrenceBCP
+from dimacs import encode_clauses, encode_occurrences
+from helpers import connect_wire_lists, map_wires
+
+# the engine hooked up to a memory of {val, assigned} pairs, the same way dpll.py hooks it up to the VarAssignStore
+def basic_setup():
+    bcp = OccurrenceBCP(3, 3, 2)
+    bcp.start_i <<= Input(bitwidth = 1, name = "start")
+    bcp.trigger_var_i <<= Input(bitwidth = 3, name = "trigger_var")
+    bcp.trigger_val_i <<= Input(bitwidth = 1, name = "trigger_val")
+
+    var_mem = pyrtl.MemBlock(bitwidth = 2, addrwidth = 3, name = "vars", max_read_ports = 2, asynchronous = True)
+    var_reads = map_wires(bcp.va_addrs_o, lambda x: var_mem[x])
+    connect_wire_lists(bcp.var_vals_i, map_wires(var_reads, lambda x: x[1]))
+    connect_wire_lists(bcp.var_assigned_i, map_wires(var_reads, lambda x: x[0]))
+    var_mem[bcp.va_write_addr_o] <<= pyrtl.MemBlock.EnabledWrite(
+        pyrtl.concat(bcp.va_write_val_o, pyrtl.Const(1, bitwidth = 1)), bcp.va_write_enable_o
+    )
+
+    active = Output(bitwidth = 1, name = "test_active")
+    status = Output(bitwidth = 1, name = "status")
+    va_write_addr = Output(bitwidth = 3, name = "va_write_addr")
+    va_write_val = Output(bitwidth = 1, name = "va_write_val")
+    va_write_enable = Output(bitwidth = 1, name = "va_write_enable")
+    active <<= bcp.active_o
+    status <<= bcp.status_o
+    va_write_addr <<= bcp.va_write_addr_o
+    va_write_val <<= bcp.va_write_val_o
+    va_write_enable <<= bcp.va_write_enable_o
+
+    return bcp, var_mem
+
+def memories(bcp, var_mem, clauses, assigned):
+    index, occurrences = encode_occurrences(clauses, 3, bcp.occ_bits)
+    return {
+        var_mem: {var: (val << 1) | 1 for var, val in assigned.items()},
+        bcp.clause_storage.mem: encode_clauses(clauses, 3, 2),
+        bcp.occ_index_mem: index,
+        bcp.occ_list_mem: occurrences,
+    }
+
+# runs from start until active drops, returns the (var, val) pairs written along the way
+def run(sim, sim_trace, trigger_var, trigger_val):
+    sim.step({"start": 1, "trigger_var": trigger_var, "trigger_val": trigger_val})
+    writes = []
+    for cycle in range(100):
+        sim.step({"start": 0, "trigger_var": 0, "trigger_val": 0})
+        if sim_trace.trace["va_write_enable"][-1]:
+            writes.append((sim_trace.trace["va_write_addr"][-1], sim_trace.trace["va_write_val"][-1]))
+        if not sim_trace.trace["test_active"][-1]:
+            return writes, cycle + 1
+    assert False, "never finished"
+
+def occurrence_chain_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(True)
+
+    bcp, var_mem = basic_setup()
+    clauses = [
+        [4, 5],
+        [1, 2],
+        [-2, 3],
+        [6, 7],
+    ]
+
+    sim_trace = pyrtl.SimulationTrace()
+    sim = backends.simulation(tracer=sim_trace, memory_value_map=memories(bcp, var_mem, clauses, {1: 0}))
+
+    # x1 = 0 makes x1 | x2 unit, which makes ~x2 | x3 unit
+    writes, cycles = run(sim, sim_trace, 1, 0)
+    assert writes == [(2, 1), (3, 1)]
+    assert sim_trace.trace["status"][-1] == 0
+    # the clauses that don't mention x1, ~x2 or ~x3 never get looked at:
+    # units (none), pop x1, fetch, resolve, pop x2, fetch, resolve, pop x3 (nothing to fetch), done
+    assert cycles == 9
+
+def occurrence_units_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(True)
+
+    bcp, var_mem = basic_setup()
+    # the unit clause gets visited even though the trigger has nothing to do with it
+    clauses = [
+        [1, 2],
+        [-3],
+        [3, 4],
+    ]
+
+    sim_trace = pyrtl.SimulationTrace()
+    sim = backends.simulation(tracer=sim_trace, memory_value_map=memories(bcp, var_mem, clauses, {5: 1}))
+
+    writes, _ = run(sim, sim_trace, 5, 1)
+    assert writes == [(3, 0), (4, 1)]
+    assert sim_trace.trace["status"][-1] == 0
+
+def occurrence_conflict_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(True)
+
+    bcp, var_mem = basic_setup()
+    clauses = [
+        [1, 2],
+        [1, -2],
+    ]
+
+    sim_trace = pyrtl.SimulationTrace()
+    sim = backends.simulation(tracer=sim_trace, memory_value_map=memories(bcp, var_mem, clauses, {1: 0}))
+
+    # x2 gets implied by the first clause and the second one falls over
+    writes, _ = run(sim, sim_trace, 1, 0)
+    assert writes == [(2, 1)]
+    assert sim_trace.trace["status"][-1] == 1
+
+tests = [
+    occurrence_chain_test,
+    occurrence_units_test,
+    occurrence_conflict_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
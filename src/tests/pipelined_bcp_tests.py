@@ -0,0 +1,127 @@
+import pyrtl
+from pyrtl import Input, Output
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+import timing
+from pipelined_bcp import PipelinedBCP
+from dimacs import encode_clauses
+from helpers import connect_wire_lists, map_wires
+
+# the pipeline hooked up to a memory of {val, assigned} pairs, the same way dpll.py hooks it up to the VarAssignStore
+def basic_setup(wrap_around = False):
+    bcp = PipelinedBCP(3, 3, 2, wrap_around = wrap_around)
+    bcp.start_i <<= Input(bitwidth = 1, name = "start")
+
+    var_mem = pyrtl.MemBlock(bitwidth = 2, addrwidth = 3, name = "vars", max_read_ports = 2, asynchronous = True)
+    var_reads = map_wires(bcp.va_addrs_o, lambda x: var_mem[x])
+    connect_wire_lists(bcp.var_vals_i, map_wires(var_reads, lambda x: x[1]))
+    connect_wire_lists(bcp.var_assigned_i, map_wires(var_reads, lambda x: x[0]))
+    var_mem[bcp.va_write_addr_o] <<= pyrtl.MemBlock.EnabledWrite(
+        pyrtl.concat(bcp.va_write_val_o, pyrtl.Const(1, bitwidth = 1)), bcp.va_write_enable_o
+    )
+
+    active = Output(bitwidth = 1, name = "test_active")
+    status = Output(bitwidth = 1, name = "status")
+    va_write_addr = Output(bitwidth = 3, name = "va_write_addr")
+    va_write_val = Output(bitwidth = 1, name = "va_write_val")
+    va_write_enable = Output(bitwidth = 1, name = "va_write_enable")
+    active <<= bcp.active_o
+    status <<= bcp.status_o
+    va_write_addr <<= bcp.va_write_addr_o
+    va_write_val <<= bcp.va_write_val_o
+    va_write_enable <<= bcp.va_write_enable_o
+
+    return bcp, var_mem
+
+# runs from start until active drops, returns the (var, val) pairs written along the way
+def run(sim, sim_trace):
+    sim.step({"start": 1})
+    writes = []
+    for cycle in range(100):
+        sim.step({"start": 0})
+        if sim_trace.trace["va_write_enable"][-1]:
+            writes.append((sim_trace.trace["va_write_addr"][-1], sim_trace.trace["va_write_val"][-1]))
+        if not sim_trace.trace["test_active"][-1]:
+            return writes, cycle + 1
+    assert False, "never finished"
+
+# every clause depends on the one right before it, so each of them only gets its implication through forwarding
+def pipelined_forwarding_test():
+    for wrap_around in [False, True]:
+        pyrtl.reset_working_block()
+        pyrtl.set_debug_mode(True)
+
+        bcp, var_mem = basic_setup(wrap_around)
+        clauses = [
+            [1, 2],
+            [-2, 3],
+            [-3, 4],
+            [-4, 5],
+        ]
+
+        sim_trace = pyrtl.SimulationTrace()
+        sim = backends.simulation(tracer=sim_trace, memory_value_map={
+            var_mem: {1: 0b01},
+            bcp.clause_storage.mem: encode_clauses(clauses, 3, 2),
+        })
+
+        writes, cycles = run(sim, sim_trace)
+        assert writes == [(2, 1), (3, 1), (4, 1), (5, 1)]
+        assert sim_trace.trace["status"][-1] == 0
+        # 3 cycles to fill the pipeline and one more for active to drop at the end
+        if wrap_around:
+            # round from clause 0 back to clause 2, just before the last implication
+            assert cycles == 3 + 8 + 3 + 1
+        else:
+            # the pass with the implications and a clean one
+            assert cycles == 3 + 8 + 8 + 1
+
+def pipelined_conflict_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(True)
+
+    bcp, var_mem = basic_setup()
+    # x2 gets implied by the first clause and the one right behind it falls over
+    # the third would imply x3, but it's still in flight when the conflict comes out
+    clauses = [
+        [1, 2],
+        [1, -2],
+        [1, 3],
+    ]
+
+    sim_trace = pyrtl.SimulationTrace()
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={
+        var_mem: {1: 0b01},
+        bcp.clause_storage.mem: encode_clauses(clauses, 3, 2),
+    })
+
+    writes, _ = run(sim, sim_trace)
+    assert writes == [(2, 1)]
+    assert sim_trace.trace["status"][-1] == 1
+
+# the clause memory read gets a cycle to itself instead of sharing one with the variable reads and the resolver
+def pipelined_timing_test():
+    pyrtl.set_debug_mode(False)
+
+    scan = timing.timing_report(4, 3, 4, engine="scan")
+    pipelined = timing.timing_report(4, 3, 4, engine="pipelined")
+    assert pipelined.clause_path_ps < scan.clause_path_ps
+    assert scan.clause_path_ps <= scan.critical_path_ps
+    assert pipelined.max_freq_mhz >= scan.max_freq_mhz
+
+tests = [
+    pipelined_forwarding_test,
+    pipelined_conflict_test,
+    pipelined_timing_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
@@ -0,0 +1,92 @@
+import pyrtl
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import runner
+from dimacs import CnfInstance, parse_dimacs, unsatisfied_clauses
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+# the plain loop run() replaces: step and look at done every cycle
+def reference(design, instance, max_cycles):
+    sim = runner.new_simulation(design, instance)
+    sim.step({})
+    cycles = 1
+    while cycles < max_cycles and sim.inspect("done") != 1:
+        sim.step({})
+        cycles += 1
+    return sim.inspect("done"), sim.inspect("sat"), cycles, sim.inspect("decisions"), sim.inspect("conflicts")
+
+def runner_cycle_budget_test():
+    pyrtl.set_debug_mode(False)
+
+    design, _ = runner.get_design(4, 3, 4)
+    for name in ["sat-1.cnf", "unsat-1.cnf", "unsat-2.cnf"]:
+        instance = parse_dimacs(INSTANCE_DIR / "example" / name)
+        result = runner.run_instance(design, instance, 5000)
+        done, sat, cycles, decisions, conflicts = reference(design, instance, 5000)
+        assert (result.finished, result.sat, result.cycles) == (done == 1, sat == 1, cycles), name
+        assert (result.decisions, result.conflicts) == (decisions, conflicts), name
+        assert result.exhausted is None
+
+        # a cycle short is a timeout, and running on from there finishes on the same cycle
+        sim = runner.new_simulation(design, instance)
+        short = runner.run(sim, result.cycles - 1)
+        assert not short.finished and short.verdict == "TIMEOUT" and short.exhausted == "cycles"
+        assert short.cycles == result.cycles - 1
+        rest = runner.run(sim, 5000)
+        assert rest.finished and rest.sat == result.sat and rest.cycles == 1
+
+def runner_seconds_budget_test():
+    pyrtl.set_debug_mode(False)
+
+    design, _ = runner.design_for(parse_dimacs(INSTANCE_DIR / "uuf50-218" / "uuf50-01.cnf"))
+    instance = parse_dimacs(INSTANCE_DIR / "uuf50-218" / "uuf50-01.cnf")
+    # the clock gets looked at every CLOCK_CYCLES cycles
+    result = runner.run_instance(design, instance, 10 ** 9, max_seconds=0)
+    assert not result.finished and result.exhausted == "seconds"
+    assert result.cycles == runner.CLOCK_CYCLES
+
+def runner_model_test():
+    pyrtl.set_debug_mode(False)
+
+    # the second one has to backtrack off x1 = 0 before it finds x1 = 1, x3 = 1
+    # flash undo and the bitmap store both leave the var memory looking different along the way
+    instances = [
+        parse_dimacs(INSTANCE_DIR / "example" / "sat-1.cnf"),
+        CnfInstance("backtrack", 5, 4, [[1, 2], [1, -2], [-1, 3], [3, 4, -5]]),
+    ]
+    for instance in instances:
+        for variant in [(), (1, "scan", True, False, "static", "one", "flash"),
+                        (2, "scan", False, False, "static", "zero", "trail", "bitmap")]:
+            design, _ = runner.get_design(4, 3, 4, *variant)
+            result = runner.run_instance(design, instance, 5000)
+            assert result.sat and result.verified, (instance.path, variant)
+            assert len(result.model) == instance.num_vars + 1 and None not in result.model[1:]
+            assert not unsatisfied_clauses(instance.clauses, result.model)
+    assert result.model[1] == 1 and result.model[3] == 1
+
+    # a model that leaves a clause false doesn't get through
+    wrong = list(result.model)
+    wrong[3] = 0
+    assert unsatisfied_clauses(instance.clauses, wrong) == [2]
+
+    # nothing to read back unless it's SAT
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-1.cnf")
+    result = runner.run_instance(runner.get_design(4, 3, 4)[0], instance, 5000)
+    assert result.finished and result.model is None and result.verified is None
+
+tests = [
+    runner_cycle_budget_test,
+    runner_seconds_budget_test,
+    runner_model_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
@@ -0,0 +1,72 @@
+import pyrtl
+import io
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+from sweep import SweepPoint, grid, pareto_front, run_sweep
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+def point(time_to_solution_us, area_mm2):
+    return SweepPoint(4, 3, 4, 1, "scan", 1.0, 1.0, 1, 1, 1, area_mm2, 1, 1, 1.0, time_to_solution_us)
+
+def pareto_front_test():
+    fast_big = point(10, 5)
+    slow_small = point(50, 1)
+    dominated = point(60, 2)
+    tied = point(10, 5)
+    untimed = point(0, 0.1)
+
+    front = pareto_front([fast_big, slow_small, dominated, tied, untimed])
+    assert fast_big in front and tied in front and slow_small in front
+    assert dominated not in front
+    # nothing it solved was in common, so there's nothing to compare it on
+    assert untimed not in front
+
+def grid_test():
+    points = grid([1, 4], [3], [2, 4], [1, 4], ["scan", "occurrence"], backend="sim")
+    sizes = {(p.clause_bits, p.clause_size, p.lanes, p.engine) for p in points}
+    # one clause bit can't hold two rows of 4 lanes, and the occurrence engine has no lanes
+    assert (1, 2, 4, "scan") not in sizes
+    assert (4, 2, 4, "scan") in sizes
+    assert not any(p.engine == "occurrence" and p.lanes != 1 for p in points)
+    assert all(p.backend == "sim" for p in points)
+    # scan: 4 with one lane, 2 with four. occurrence: 4
+    assert len(points) == 10
+
+def sweep_test():
+    pyrtl.set_debug_mode(False)
+
+    paths = [INSTANCE_DIR / "example" / name for name in ["sat-1.cnf", "unsat-1.cnf", "unsat-2.cnf"]]
+    points = grid([4, 5], [3], [4], [1], ["scan"], backend=backends.get_backend(), max_cycles=5000, timing=True)
+    result = run_sweep(paths, points, log=io.StringIO())
+
+    small, large = result["points"]
+    assert len(result["common"]) == 3
+    assert all(row.correct for row in result["rows"])
+    for p in (small, large):
+        assert p.solved == 3
+        assert p.max_freq_mhz > 0 and p.gates > 0
+        assert p.var_mem_read_ports >= 2 ** 3
+        assert p.time_to_solution_us == p.mean_cycles / p.max_freq_mhz
+    # twice the clause rows to sweep through every pass
+    assert large.mean_cycles > small.mean_cycles
+    assert large.area_mm2 > small.area_mm2
+    # so the small one wins on both
+    assert small.pareto and not large.pareto
+
+tests = [
+    pareto_front_test,
+    grid_test,
+    sweep_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
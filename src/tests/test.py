@@ -1,7 +1,21 @@
 from pathlib import Path
 from importlib import import_module
+import argparse
+import sys
 import traceback
 
+# slightly sketchy way to allow upward imports
+sys.path.append(str(Path(__file__).parents[1]))
+
+import backends
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--backend", choices=list(backends.BACKENDS), default=backends.get_backend(),
+                    help="simulation backend for every test (defaults to $SIM_BACKEND or sim)")
+args = parser.parse_args()
+backends.set_backend(args.backend)
+print(f"using simulation backend {args.backend}")
+
 # find all test files
 this_path = Path(__file__)
 test_dir = this_path.parents[0]
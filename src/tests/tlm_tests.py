@@ -0,0 +1,76 @@
+import pyrtl
+import pathlib
+import random
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import runner
+import tlm
+from dimacs import CnfInstance, parse_dimacs
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+
+# (lanes, engine, wrap_around, cdcl, decision, polarity, undo, store), covering every lane count, termination, undo
+# and store between them
+VARIANTS = [
+    (1, "scan", False, False, "static", "zero", "scan", "memory"),
+    (1, "scan", True, False, "static", "one", "trail", "memory"),
+    (2, "scan", False, False, "static", "zero", "flash", "memory"),
+    (4, "scan", True, False, "static", "zero", "trail", "bitmap"),
+]
+
+def instances():
+    found = [parse_dimacs(INSTANCE_DIR / "example" / name) for name in ["sat-1.cnf", "unsat-1.cnf", "unsat-2.cnf"]]
+    # with repeated literals, tautologies and unit clauses, so rows with several lanes implying come up too
+    rng = random.Random(254)
+    for _ in range(8):
+        num_vars = rng.randint(1, 7)
+        clauses = [
+            [rng.choice([-1, 1]) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3))]
+            for _ in range(rng.randint(1, 16))
+        ]
+        found.append(CnfInstance("random", num_vars, len(clauses), clauses))
+    return found
+
+def tlm_matches_rtl_test():
+    pyrtl.set_debug_mode(False)
+
+    for variant in VARIANTS:
+        design, _ = runner.get_design(4, 3, 4, *variant)
+        for instance in instances():
+            result = runner.run_instance(design, instance, 20000)
+            predicted = tlm.predict(instance, 4, 3, 4, *variant)
+            # cycle for cycle
+            assert (predicted.finished, predicted.sat, predicted.cycles) == (result.finished, result.sat, result.cycles), \
+                (variant, instance.clauses)
+            assert (predicted.decisions, predicted.conflicts, predicted.backtrack_cycles) == (
+                result.decisions, result.conflicts, result.backtrack_cycles
+            ), (variant, instance.clauses)
+
+def tlm_budget_test():
+    pyrtl.set_debug_mode(False)
+
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    design, _ = runner.get_design(4, 3, 4)
+    expected = runner.run_instance(design, instance, 20000)
+    # running out of cycles is a timeout, the same as the RTL
+    predicted = tlm.predict(instance, 4, 3, 4, max_cycles=expected.cycles - 1)
+    assert not predicted.finished and predicted.verdict == "TIMEOUT" and predicted.cycles == expected.cycles - 1
+    assert tlm.predict(instance, 4, 3, 4, max_cycles=expected.cycles).finished
+
+    assert tlm.supports(*VARIANTS[0])
+    assert not tlm.supports(engine="occurrence") and not tlm.supports(cdcl=True)
+    assert not tlm.supports(decision="activity") and not tlm.supports(polarity="saved")
+
+tests = [
+    tlm_matches_rtl_test,
+    tlm_budget_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
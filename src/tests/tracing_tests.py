@@ -0,0 +1,109 @@
+import io
+import pyrtl
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+import runner
+import tracing
+from dimacs import parse_dimacs
+from dpll import build_dpll
+
+INSTANCE_DIR = directory.parents[1] / "instances"
+WATCH = ["done", "sat", "dpll_state", "curr_level", "clause_addr"]
+
+# values of every wire at every cycle, read back out of a VCD file
+def read_vcd(text, cycles):
+    codes = {}
+    values = {}
+    current = {}
+    time = None
+    for line in text.splitlines():
+        words = line.split()
+        if words[0] == "$var":
+            codes[words[3]] = words[4]
+        elif line.startswith("#"):
+            if time is not None:
+                for _ in range(int(line[1:]) // 10 - time):
+                    for code, value in current.items():
+                        values.setdefault(codes[code], []).append(value)
+            time = int(line[1:]) // 10
+        elif line.startswith("b"):
+            current[words[1]] = int(words[0][1:], 2)
+    assert time == cycles
+    return values
+
+def run(design, instance, tracer, cycles):
+    sim = backends.simulation(tracer=tracer, memory_value_map=runner.memory_value_map(design, instance), block=design.block)
+    for _ in range(cycles):
+        sim.step({})
+    return sim
+
+def tracing_window_test():
+    pyrtl.set_debug_mode(False)
+
+    design = build_dpll(4, 3, 4)
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    full = pyrtl.SimulationTrace(tracing.watch_wires(design.block, WATCH), block=design.block)
+    run(design, instance, full, 33)
+
+    tracer = tracing.make_tracer("watch", design.block, WATCH, window=8)
+    sim = run(design, instance, tracer, 33)
+    # just the last 8 cycles, of just the watch list
+    assert sorted(tracer.trace) == sorted(WATCH)
+    for name in WATCH:
+        assert list(tracer.trace[name]) == full.trace[name][-8:], name
+    assert sim.inspect("done") == 1 and tracer.trace["done"][-1] == 1
+
+    assert tracing.make_tracer("none", design.block) is None
+    try:
+        tracing.watch_wires(design.block, ["done", "not_a_wire"])
+        assert False, "should have complained about not_a_wire"
+    except AssertionError as error:
+        assert "not_a_wire" in str(error)
+
+def tracing_vcd_test():
+    pyrtl.set_debug_mode(False)
+
+    design = build_dpll(4, 3, 4)
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    full = pyrtl.SimulationTrace(tracing.watch_wires(design.block, WATCH), block=design.block)
+    run(design, instance, full, 40)
+
+    file = io.StringIO()
+    file.close = lambda: None
+    tracer = tracing.make_tracer("vcd", design.block, WATCH, file, chunk=4)
+    run(design, instance, tracer, 40)
+    # written out as it goes, holding on to less than a chunk
+    assert tracer.written == 40 and tracer.changes == []
+    assert all(len(tracer.trace[name]) == 1 for name in WATCH)
+    tracer.close()
+    values = read_vcd(file.getvalue(), 40)
+    for name in WATCH:
+        assert values[name] == full.trace[name], name
+
+def tracing_no_tracer_test():
+    pyrtl.set_debug_mode(False)
+
+    design = build_dpll(4, 3, 4)
+    instance = parse_dimacs(INSTANCE_DIR / "example" / "unsat-2.cnf")
+    sim = run(design, instance, None, 33)
+    assert sim.inspect("done") == 1 and sim.inspect("sat") == 0
+    # compiled has to trace the outputs, but only keeps the latest value
+    if sim.tracer is not None:
+        assert all(len(values) == 1 for values in sim.tracer.trace.values())
+
+tests = [
+    tracing_window_test,
+    tracing_vcd_test,
+    tracing_no_tracer_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
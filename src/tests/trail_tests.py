@@ -0,0 +1,79 @@
+import pyrtl
+from pyrtl import Input, Output
+import pathlib
+import sys
+
+# slightly sketchy way to allow upward imports
+directory = pathlib.Path(__file__)
+sys.path.append(str(directory.parents[1]))
+
+import backends
+from trail import TrailStack
+
+VAR_BITS = 3
+
+# a trail driven straight from inputs, with everything it outputs as an output
+def basic_setup(pop_width = 2):
+    trail = TrailStack(VAR_BITS, pop_width)
+    for name in ["push", "push_var", "mark", "level", "pop"]:
+        wire = getattr(trail, name + "_i")
+        wire <<= Input(bitwidth = wire.bitwidth, name = name)
+    for name in ["ptr", "level_start"]:
+        wire = getattr(trail, name + "_o")
+        output = Output(bitwidth = wire.bitwidth, name = name)
+        output <<= wire
+    for k, wire in enumerate(trail.top_vars_o):
+        output = Output(bitwidth = VAR_BITS, name = f"top_{k}")
+        output <<= wire
+    return trail
+
+def step(sim, push = 0, push_var = 0, mark = 0, level = 0, pop = 0):
+    sim.step({"push": push, "push_var": push_var, "mark": mark, "level": level, "pop": pop})
+
+def trail_stack_test():
+    pyrtl.reset_working_block()
+
+    basic_setup()
+    sim = backends.simulation(tracer = None)
+
+    # level 1 is x3 and then x5, level 2 is x1 and then x6 and x2
+    step(sim, push = 1, push_var = 3, mark = 1, level = 1)
+    step(sim, push = 1, push_var = 5, level = 1)
+    step(sim, push = 1, push_var = 1, mark = 1, level = 2)
+    step(sim, push = 1, push_var = 6, level = 2)
+    step(sim, push = 1, push_var = 2, level = 2)
+
+    step(sim, level = 2)
+    assert sim.inspect("ptr") == 5
+    assert (sim.inspect("top_0"), sim.inspect("top_1")) == (2, 6)
+    assert sim.inspect("level_start") == 2
+    step(sim, level = 1)
+    assert sim.inspect("level_start") == 0
+    # level 0 was never marked
+    step(sim, level = 0)
+    assert sim.inspect("level_start") == 0
+
+    # two off at once leaves the root of level 2 on top
+    step(sim, pop = 2)
+    step(sim, level = 2)
+    assert sim.inspect("ptr") == 3
+    assert (sim.inspect("top_0"), sim.inspect("top_1")) == (1, 5)
+
+    # a new level 2 starts where the old one did once its root is gone, the old start doesn't hang around
+    step(sim, pop = 1)
+    step(sim, push = 1, push_var = 4, mark = 1, level = 2)
+    step(sim, push = 1, push_var = 7, mark = 1, level = 3)
+    step(sim, level = 2)
+    assert sim.inspect("level_start") == 2
+    step(sim, level = 3)
+    assert sim.inspect("level_start") == 3
+    assert (sim.inspect("ptr"), sim.inspect("top_0"), sim.inspect("top_1")) == (4, 7, 4)
+
+tests = [
+    trail_stack_test,
+]
+
+if __name__ == "__main__":
+    for test in tests:
+        print("Running", test.__name__)
+        test()
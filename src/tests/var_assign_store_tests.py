@@ -7,6 +7,7 @@ import sys
 directory = pathlib.Path(__file__)
 sys.path.append(str(directory.parents[1]))
 
+import backends
 from var_assign_store import VarAssignStore
 
 def basic_setup():
@@ -42,7 +43,7 @@ def inactive_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace)
+    sim = backends.simulation(tracer=sim_trace)
 
     inputs = {
         "start": 0,
@@ -84,7 +85,7 @@ def sat_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={
         vas.mem : memory
     })
 
@@ -121,7 +122,7 @@ def needs_backtrack_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={
         vas.mem : memory
     })
 
@@ -158,7 +159,7 @@ def unsat_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={
         vas.mem : memory
     })
 
@@ -195,7 +196,7 @@ def assign_test():
 
     # test
     sim_trace = pyrtl.SimulationTrace()
-    sim = pyrtl.Simulation(tracer=sim_trace, memory_value_map={
+    sim = backends.simulation(tracer=sim_trace, memory_value_map={
         vas.mem : memory
     })
 
@@ -220,12 +221,114 @@ def assign_test():
 
     #sim_trace.render_trace(symbol_len=100)
 
+# 2 clause bits, 3 var bits and 3 literals a clause, with the start and level inputs and ready_bcp out
+def polarity_setup(polarity):
+    vas = VarAssignStore(2, 3, 3, polarity = polarity)
+    vas.start <<= Input(bitwidth = 1, name = "start")
+    vas.level <<= Input(bitwidth = 4, name = "level")
+    ready_bcp = Output(bitwidth = 1, name = "ready_bcp")
+    ready_bcp <<= vas.ready_bcp
+    return vas
+
+# bits: 0 assigned, 1 val, 2 - 5 level, 6 - 8 address, 9 root, 10 flipped, 11 phase
+def polarity_word(var, assigned = 0, val = 0, level = 0, root = 0, flipped = 0, phase = 0):
+    return assigned | val << 1 | level << 2 | var << 6 | root << 9 | flipped << 10 | phase << 11
+
+def polarity_test():
+    pyrtl.set_debug_mode(False)
+
+    # x1 is assigned, x2 was a 1 last time round
+    memory = {
+        1: polarity_word(1, assigned = 1, val = 1, level = 1),
+        2: polarity_word(2, phase = 1),
+        3: polarity_word(3),
+    }
+    for polarity, val in [("zero", 0), ("one", 1), ("saved", 1)]:
+        pyrtl.reset_working_block()
+        vas = polarity_setup(polarity)
+        # zero has no flipped or phase bits
+        mask = (1 << vas.word_bits) - 1
+        sim = backends.simulation(tracer = None, memory_value_map = {vas.mem: {var: word & mask for var, word in memory.items()}})
+        sim.step({"start": 1, "level": 2})
+        expected = polarity_word(2, assigned = 1, val = val, level = 2, root = 1, phase = val)
+        assert sim.inspect_mem(vas.mem)[2] == expected & mask
+
+    # the LFSR starts out on 0xACE1, which gives a 1 then a 0
+    pyrtl.reset_working_block()
+    vas = polarity_setup("random")
+    sim = backends.simulation(tracer = None, memory_value_map = {vas.mem: memory})
+    sim.step({"start": 1, "level": 2})
+    sim.step({"start": 1, "level": 3})
+    assert sim.inspect_mem(vas.mem)[2] == polarity_word(2, assigned = 1, val = 1, level = 2, root = 1, phase = 1)
+    assert sim.inspect_mem(vas.mem)[3] == polarity_word(3, assigned = 1, val = 0, level = 3, root = 1, phase = 0)
+
+def word_helpers_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(False)
+
+    vas = polarity_setup("saved")
+    root = Input(bitwidth = vas.word_bits, name = "root")
+    for name, wire in [("cleared", vas.cleared(root)), ("flipped", vas.flip(root)), ("is_flipped", vas.flipped_root(root))]:
+        output = Output(bitwidth = wire.bitwidth, name = name)
+        output <<= wire
+    sim = backends.simulation(tracer = None)
+    sim.step({"start": 0, "level": 0, "root": polarity_word(5, assigned = 1, val = 1, level = 3, root = 1, phase = 1)})
+
+    # clearing keeps the address and the phase
+    assert sim.inspect("cleared") == polarity_word(5, phase = 1)
+    assert sim.inspect("flipped") == polarity_word(5, assigned = 1, val = 0, level = 3, root = 1, flipped = 1, phase = 0)
+    assert sim.inspect("is_flipped") == 0
+
+def flash_clear_test():
+    pyrtl.reset_working_block()
+    pyrtl.set_debug_mode(False)
+
+    vas = VarAssignStore(2, 3, 3, flash_clear = True)
+    vas.start <<= Input(bitwidth = 1, name = "start")
+    vas.level <<= Input(bitwidth = 4, name = "level")
+    vas.flash_i <<= Input(bitwidth = 1, name = "flash")
+    vas.flash_level_i <<= Input(bitwidth = 4, name = "flash_level")
+    vas.finish_writes()
+    ready_bcp = Output(bitwidth = 1, name = "ready_bcp")
+    ready_bcp <<= vas.ready_bcp
+    for i in range(1, 4):
+        word = Output(bitwidth = vas.word_bits, name = f"word_{i}")
+        word <<= vas.every_memory_value[i]
+    mask = (1 << vas.word_bits) - 1
+
+    sim = backends.simulation(tracer = None, memory_value_map = {vas.mem: {i: polarity_word(i) for i in range(8)}})
+    # decide x1, x2 and x3 at levels 1 to 3
+    for level in range(1, 4):
+        sim.step({"start": 1, "level": level, "flash": 0, "flash_level": 0})
+    sim.step({"start": 0, "level": 0, "flash": 0, "flash_level": 0})
+    assert [sim.inspect(f"word_{i}") for i in range(1, 4)] == [
+        polarity_word(i, assigned = 1, level = i, root = 1) & mask for i in range(1, 4)
+    ]
+
+    # levels 2 and up go in one cycle, the words are still in memory but read as cleared
+    sim.step({"start": 0, "level": 0, "flash": 1, "flash_level": 2})
+    sim.step({"start": 0, "level": 0, "flash": 0, "flash_level": 0})
+    assert [sim.inspect(f"word_{i}") for i in range(1, 4)] == [
+        polarity_word(1, assigned = 1, level = 1, root = 1) & mask, polarity_word(2), polarity_word(3)
+    ]
+    assert sim.inspect_mem(vas.mem)[3] == polarity_word(3, assigned = 1, level = 3, root = 1) & mask
+
+    # a write on the same cycle as a flash that covers it wins, x2 gets decided again
+    sim.step({"start": 1, "level": 2, "flash": 1, "flash_level": 1})
+    sim.step({"start": 0, "level": 0, "flash": 0, "flash_level": 0})
+    assert [sim.inspect(f"word_{i}") for i in range(1, 4)] == [
+        polarity_word(1), polarity_word(2, assigned = 1, level = 2, root = 1) & mask, polarity_word(3)
+    ]
+
 tests = [
     needs_backtrack_test,
     inactive_test,
     sat_test,
     unsat_test,
     assign_test,
+    polarity_test,
+    word_helpers_test,
+    flash_clear_test,
 ]
 
 if __name__ == "__main__":
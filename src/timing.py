@@ -0,0 +1,96 @@
+import contextlib
+import io
+import pyrtl
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from dpll import build_dpll
+
+# static timing (and area) estimates for a design, from pyrtl's TimingAnalysis and area_estimation after pyrtl.optimize()
+# the numbers are pyrtl's 130nm estimates, so they're only good for comparing designs against each other
+#
+# memory reads are priced by size and port count, which makes the variable memory (one read port per variable
+# for the VarAssignStore's checks) by far the slowest thing in the design. clause_path_ps is there so that
+# changes to the BCP path can still be seen while the VarAssignStore is what sets the clock
+
+@dataclass
+class TimingReport:
+    max_freq_mhz: float
+    # longest combinational path in ps, max_freq_mhz also has flip flop overhead on top
+    critical_path_ps: float
+    # where the critical path starts (a register, input or const) and the memories it reads along the way
+    critical_start: str
+    critical_memories: List[str]
+    # longest path through a read of the clause memory
+    clause_path_ps: float
+    # logic gates left after optimizing (wires, selects, concats, consts, registers and memories don't count)
+    gates: int
+    # (read, write) ports per memory
+    memory_ports: Dict[str, Tuple[int, int]]
+    logic_area_mm2: float
+    memory_area_mm2: float
+
+    @property
+    def period_ns(self) -> float:
+        return 1e3 / self.max_freq_mhz
+
+    # estimated wall clock time for this many cycles at max_freq_mhz
+    def runtime_us(self, cycles: int) -> float:
+        return cycles / self.max_freq_mhz
+
+    @property
+    def area_mm2(self) -> float:
+        return self.logic_area_mm2 + self.memory_area_mm2
+
+GATE_OPS = set("~&|^n+-*<>=x")
+
+# how late anything that went through a read of memory could settle, 0 for wires that didn't
+def path_through(analysis: pyrtl.TimingAnalysis, block: pyrtl.Block, memory: pyrtl.MemBlock) -> float:
+    through = {}
+    for net in block:  # ordered iteration
+        if net.op in ("r", "@"):
+            continue
+        if net.op == "m" and net.op_param[1] is memory:
+            settled = analysis.timing_map[net.dests[0]]
+        else:
+            settled = max((through[arg] for arg in net.args if arg in through), default=None)
+            if settled is None:
+                continue
+            settled += analysis.timing_map[net.dests[0]] - max(analysis.timing_map[arg] for arg in net.args)
+        for dest in net.dests:
+            through[dest] = settled
+    return max(through.values(), default=0.0)
+
+# analysis optimizes the block in place, so every report gets a design of its own
+# keyed the same way as runner.get_design
+_reports = {}
+
+def timing_report(clause_bits: int, var_bits: int, clause_size: int, lanes: int = 1, engine: str = "scan",
+                  wrap_around: bool = False, cdcl: bool = False, decision: str = "static",
+                  polarity: str = "zero", undo: str = "scan", store: str = "memory") -> TimingReport:
+    key = (clause_bits, var_bits, clause_size, lanes, engine, wrap_around, cdcl, decision, polarity, undo, store)
+    if key in _reports:
+        return _reports[key]
+
+    design = build_dpll(*key)
+    with pyrtl.set_working_block(design.block, no_sanity_check=True):
+        pyrtl.optimize()
+        analysis = pyrtl.TimingAnalysis()
+        # there can be a lot of paths tied for longest, one is enough to say where it is
+        # (pyrtl complains about hitting the limit on stdout)
+        with contextlib.redirect_stdout(io.StringIO()):
+            paths = analysis.critical_path(print_cp=False, cp_limit=1)
+        start, path = paths[0]
+        memories = list(dict.fromkeys(net.op_param[1].name for net in path if net.op == "m"))
+        ports = {
+            memory.name: (len(memory.readport_nets), len(memory.writeport_nets))
+            for memory in sorted({net.op_param[1] for net in design.block.logic if net.op in "m@"}, key=lambda m: m.name)
+        }
+        logic_area, memory_area = pyrtl.area_estimation()
+        report = TimingReport(
+            analysis.max_freq(), analysis.max_length(), start.name, memories,
+            path_through(analysis, design.block, design.clause_mem),
+            sum(1 for net in design.block.logic if net.op in GATE_OPS), ports, logic_area, memory_area
+        )
+    _reports[key] = report
+    return report
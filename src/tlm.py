@@ -0,0 +1,232 @@
+import math
+import sys
+import time
+from typing import List, Optional
+
+from dimacs import CnfInstance
+from runner import MAX_CYCLES, RunResult
+
+# transaction level model of the dpll design: the dpll_state machine (assign, BCP, backtrack, done), the BCP scan loop
+# and the VarAssignStore's decisions, counting the cycles each of them would take instead of simulating any logic
+# it covers the scan engine with any number of lanes, both terminations, every undo and both stores (the bitmap store
+# takes exactly as many cycles as the memory one), with static decisions, chronological backtracking and polarity zero
+# or one. predict() takes the same parameters as build_dpll and returns the same RunResult as runner.run_instance
+#
+# what a cycle costs, as the RTL does it:
+#  * assign: one cycle to decide, or to find everything assigned (sat) or a bad variable at level 0 (unsat)
+#  * BCP: a cycle to start, then a cycle per row of lanes clauses, then a cycle after the pass that ended it without
+#    a contradiction. a contradiction ends it on the row it turned up in. every row sees everything written before it,
+#    a pass without wrap_around ends on the last row (and another starts from row 0 if anything was implied), and with
+#    wrap_around it goes round until it gets back to the last implication's row (the one before it, with one lane
+#    or when the row gets looked at again) without implying anything. a row where several lanes imply writes the
+#    lowest one and gets looked at again
+#  * backtrack: the implications on the level come off one a cycle (scan), two a cycle (trail) or along with the root
+#    (flash), then a cycle to flip the root. a root on its second value takes a cycle to go bad, one in assign and
+#    one to clear it and step down a level
+# rather than looking at every row, it keeps track of which clauses are unit or contradicted (hot) as variables come
+# and go, and skips straight to the next row holding one
+
+class _Model:
+    def __init__(self, instance: CnfInstance, clause_bits: int, var_bits: int, lanes: int, wrap_around: bool,
+                 polarity: str, undo: str, max_cycles: int):
+        self.clauses = instance.clauses
+        self.lanes = lanes
+        self.rows = 2 ** clause_bits // lanes
+        self.wrap_around = wrap_around
+        self.first_value = int(polarity == "one")
+        self.undo = undo
+        self.max_cycles = max_cycles
+        self.num_vars = 2 ** var_bits - 1
+        self.occurrences = [[] for _ in range(self.num_vars + 1)]
+        for index, clause in enumerate(self.clauses):
+            for var in set(abs(lit) for lit in clause):
+                self.occurrences[var].append(index)
+
+        self.value = [None] * (self.num_vars + 1)
+        self.trail = []
+        # [where the level starts on the trail, its decision, on its second value]
+        self.levels = []
+        self.hot = set(index for index in range(len(self.clauses)) if self.status(index)[0] != "unknown")
+        self.cycles = 0
+        self.decisions = 0
+        self.conflicts = 0
+        self.backtrack_cycles = 0
+
+    # what the ClauseResolver makes of a clause: sat, unknown, conflict or (unit, implied literal)
+    # a literal slot is unassigned on its own, so a repeated literal takes two
+    def status(self, index):
+        unassigned = 0
+        implied = 0
+        for lit in self.clauses[index]:
+            val = self.value[abs(lit)]
+            if val is None:
+                unassigned += 1
+                implied = lit
+            elif val == (lit > 0):
+                return "sat", 0
+        if unassigned == 0:
+            return "conflict", 0
+        return ("unit", implied) if unassigned == 1 else ("unknown", 0)
+
+    def set_value(self, var, val):
+        self.value[var] = val
+        for index in self.occurrences[var]:
+            if self.status(index)[0] in ("unit", "conflict"):
+                self.hot.add(index)
+            else:
+                self.hot.discard(index)
+
+    def assign(self, var, val):
+        self.set_value(var, val)
+        self.trail.append(var)
+
+    def undo_to(self, start):
+        for var in reversed(self.trail[start:]):
+            self.set_value(var, None)
+        del self.trail[start:]
+
+    # the first row at or after addr with a hot clause in it, at most span rows on (wrapping round), None if there isn't one
+    def next_hot(self, addr, span):
+        distances = [(index // self.lanes - addr) % self.rows for index in self.hot]
+        nearest = min((d for d in distances if d <= span), default=None)
+        return None if nearest is None else (addr + nearest) % self.rows
+
+    # one run of BCP, True if it ended without a contradiction
+    def bcp(self):
+        self.cycles += 1
+        addr = 0
+        # last row to look at: the end of the pass, or (wrap_around) where to stop going round
+        stop = self.rows - 1
+        implied = False
+        while True:
+            span = (stop - addr) % self.rows if self.wrap_around else stop - addr
+            row = self.next_hot(addr, span)
+            if row is None:
+                self.cycles += span + 1
+                if implied and not self.wrap_around:
+                    addr, implied = 0, False
+                    continue
+                # and the cycle BCP goes idle
+                self.cycles += 1
+                return True
+            self.cycles += (row - addr) % self.rows + 1
+            statuses = [
+                self.status(index) for index in range(row * self.lanes, min((row + 1) * self.lanes, len(self.clauses)))
+            ]
+            if any(kind == "conflict" for kind, _ in statuses):
+                self.conflicts += 1
+                return False
+            units = [lit for kind, lit in statuses if kind == "unit"]
+            self.assign(abs(units[0]), int(units[0] > 0))
+            implied = True
+            if self.wrap_around:
+                stop = row if len(units) == 1 and self.lanes > 1 else (row - 1) % self.rows
+            if len(units) > 1:
+                # the other lanes get another look
+                addr = row
+            elif row == self.rows - 1 and not self.wrap_around:
+                addr, implied = 0, False
+            else:
+                addr = (row + 1) % self.rows
+
+    # cycles backtrack spends on k implications before it gets to the root
+    def undo_cycles(self, k):
+        return {"scan": k, "trail": math.ceil(k / 2), "flash": 0}[self.undo]
+
+    # backtrack after a contradiction, True if it flipped a root and BCP goes again, False on unsat
+    def backtrack(self):
+        while True:
+            start, root, flipped = self.levels[-1]
+            cycles = self.undo_cycles(len(self.trail) - start - 1) + 1
+            self.cycles += cycles
+            self.backtrack_cycles += cycles
+            if not flipped:
+                flip = 1 - self.value[root]
+                self.undo_to(start)
+                self.levels[-1][2] = True
+                self.assign(root, flip)
+                return True
+            # the bad state, then assign sees it
+            self.undo_to(start)
+            self.cycles += 1
+            if len(self.levels) == 1:
+                return False
+            # and back to clear it
+            self.levels.pop()
+            self.cycles += 1
+            self.backtrack_cycles += 1
+
+    def run(self) -> RunResult:
+        start = time.perf_counter()
+        sat = None
+        while sat is None and self.cycles < self.max_cycles:
+            self.cycles += 1
+            var = next((var for var in range(1, self.num_vars + 1) if self.value[var] is None), None)
+            if var is None:
+                sat = True
+                break
+            self.decisions += 1
+            self.levels.append([len(self.trail), var, False])
+            self.assign(var, self.first_value)
+            while not self.bcp():
+                if not self.backtrack():
+                    sat = False
+                    break
+                if self.cycles >= self.max_cycles:
+                    break
+        finished = sat is not None and self.cycles <= self.max_cycles
+        return RunResult(
+            finished, bool(finished and sat), min(self.cycles, self.max_cycles), time.perf_counter() - start,
+            self.decisions, self.conflicts, self.backtrack_cycles, None if finished else "cycles"
+        )
+
+# can predict() model this variant (the rest of build_dpll's parameters, in its order)?
+def supports(lanes: int = 1, engine: str = "scan", wrap_around: bool = False, cdcl: bool = False, decision: str = "static",
+             polarity: str = "zero", undo: str = "scan", store: str = "memory") -> bool:
+    return engine == "scan" and not cdcl and decision == "static" and polarity in ("zero", "one")
+
+# the RunResult runner.run_instance would get on a design built with these parameters, without building it
+def predict(instance: CnfInstance, clause_bits: int, var_bits: int, clause_size: int, lanes: int = 1, engine: str = "scan",
+            wrap_around: bool = False, cdcl: bool = False, decision: str = "static", polarity: str = "zero",
+            undo: str = "scan", store: str = "memory", max_cycles: int = MAX_CYCLES) -> RunResult:
+    assert supports(lanes, engine, wrap_around, cdcl, decision, polarity, undo, store), \
+        "the model only covers the scan engine with static decisions, chronological backtracking and polarity zero or one"
+    assert instance.fits(clause_bits, var_bits, clause_size)
+    return _Model(instance, clause_bits, var_bits, lanes, wrap_around, polarity, undo, max_cycles).run()
+
+if __name__ == "__main__":
+    import argparse
+    import backends
+    import runner
+    from benchmark import BenchmarkOptions
+    from dimacs import find_instances, parse_dimacs
+
+    parser = argparse.ArgumentParser(description="predict cycle counts with the transaction level model")
+    parser.add_argument("instances", nargs="+", help="cnf files, directories or globs")
+    parser.add_argument("--lanes", type=int, default=1)
+    parser.add_argument("--termination", choices=["restart", "wrap"], default="restart")
+    parser.add_argument("--polarity", choices=["zero", "one"], default="zero")
+    parser.add_argument("--undo", choices=["scan", "trail", "flash"], default="scan")
+    parser.add_argument("--max-cycles", type=int, default=MAX_CYCLES)
+    parser.add_argument("--check", choices=list(backends.BACKENDS), metavar="BACKEND",
+                        help="also simulate every instance on this backend and report how far off the model is")
+    args = parser.parse_args()
+
+    options = BenchmarkOptions(
+        lanes=args.lanes, wrap_around=args.termination == "wrap", polarity=args.polarity, undo=args.undo,
+        max_cycles=args.max_cycles
+    )
+    errors = []
+    for path in [path for pattern in args.instances for path in find_instances(pattern)]:
+        instance = parse_dimacs(path)
+        size = options.design_size(instance)
+        predicted = predict(instance, *size, *options.design_variant(), max_cycles=args.max_cycles)
+        line = f"{path}: {predicted.verdict} cycles:{predicted.cycles} time:{predicted.sim_seconds:.4f}s"
+        if args.check:
+            design, _ = runner.get_design(*size, *options.design_variant())
+            result = runner.run_instance(design, instance, args.max_cycles, args.check)
+            errors.append(abs(predicted.cycles - result.cycles) / result.cycles)
+            line += f" | rtl {result.verdict} cycles:{result.cycles} time:{result.sim_seconds:.2f}s error:{errors[-1]:.2%}"
+        print(line)
+    if errors:
+        print(f"max error {max(errors):.2%} over {len(errors)} instances")
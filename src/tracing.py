@@ -0,0 +1,151 @@
+import collections
+from collections.abc import Mapping
+from typing import List, Optional, TextIO
+
+import pyrtl
+
+# tracing that doesn't grow with the number of cycles simulated. pyrtl.SimulationTrace keeps every value of every
+# named wire, which is fine for the example instances but not for a uuf50 run. three modes:
+#  * none:  no tracer at all (the compiled backend still needs one to read the outputs, see backends.simulation)
+#  * watch: only the wires on a watch list, and only the last window cycles of them
+#  * vcd:   the wires on a watch list streamed out to a VCD file, chunk cycles at a time
+# both tracers drop in wherever a pyrtl.SimulationTrace goes, on every backend. trace[name][-1] is still the
+# latest value and render_trace still works, over the window
+TRACE_MODES = ["none", "watch", "vcd"]
+
+# cycles of each wire WindowTrace keeps by default
+WINDOW = 64
+# cycles VcdTrace holds on to before writing them out
+CHUNK = 1024
+
+# the wires these names refer to, in the same order
+def watch_wires(block: pyrtl.Block, names: List[str]) -> List[pyrtl.WireVector]:
+    wires = block.wirevector_by_name
+    missing = [name for name in names if name not in wires]
+    assert not missing, f"no wires named {', '.join(missing)} in this design"
+    return [wires[name] for name in names]
+
+# a wire's values, only the last window of them kept
+# the backends only ever append and read from the end, so this looks just like a list to them
+class _Column(collections.deque):
+    def __init__(self, index: int, window: Optional[int], on_append=None):
+        super().__init__(maxlen=window)
+        self.index = index
+        # values appended so far (how many cycles this wire has seen)
+        self.cycles = 0
+        self.on_append = on_append
+
+    def append(self, value):
+        super().append(value)
+        self.cycles += 1
+        if self.on_append is not None:
+            self.on_append(self, value)
+
+# stands in for pyrtl's TraceStorage. CompiledSimulation builds it over again (with just the wires) when it drops
+# the ones it can't trace, so the window and the callback stay where they were. that's calling trace.__init__ on the
+# existing object, which is how pyrtl 1.0.3 does it (compilesim.py, _remove_untraceable), hence the pin
+class _WindowStorage(Mapping):
+    def __init__(self, wires, window: Optional[int] = None, on_append=None):
+        if not hasattr(self, "window"):
+            self.window = window
+            self.on_append = on_append
+        names = sorted(wire.name for wire in wires)
+        self.columns = {name: _Column(index, self.window, self.on_append) for index, name in enumerate(names)}
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __getitem__(self, name):
+        if isinstance(name, pyrtl.WireVector):
+            name = name.name
+        return self.columns[name]
+
+# keeps the last window cycles of the wires it tracks and nothing more, window=None keeps everything
+class WindowTrace(pyrtl.SimulationTrace):
+    def __init__(self, wires_to_track: List[pyrtl.WireVector], window: Optional[int] = WINDOW, block: pyrtl.Block = None):
+        super().__init__(wires_to_track, block)
+        self.trace = _WindowStorage(wires_to_track, window)
+
+# streams the wires it tracks to a VCD file as it goes, a chunk of cycles at a time
+# only a changed value gets written (that's all VCD needs), and anything not written yet is in changes. close() writes
+# the rest out and closes the file
+class VcdTrace(WindowTrace):
+    def __init__(self, file: TextIO, wires_to_track: List[pyrtl.WireVector], chunk: int = CHUNK, window: int = 1,
+                 block: pyrtl.Block = None):
+        super().__init__(wires_to_track, window, block)
+        self.trace = _WindowStorage(wires_to_track, window, self._append)
+        self.file = file
+        self.chunk = chunk
+        # (cycle, column, value) not written out yet
+        self.changes = []
+        self.last = {}
+        self.written = 0
+        self.header = False
+
+    def _append(self, column: _Column, value: int):
+        if self.last.get(column.index) != value:
+            self.last[column.index] = value
+            self.changes.append((column.cycles - 1, column.index, value))
+        # every backend appends the last column last, so every other wire has caught up to it by then
+        if column.index == len(self.trace) - 1 and column.cycles % self.chunk == 0:
+            self.flush(column.cycles)
+
+    # short VCD identifiers: !, ", #, ... then two characters and so on
+    @staticmethod
+    def _code(index: int) -> str:
+        code = ""
+        while True:
+            code += chr(33 + index % 94)
+            index //= 94
+            if index == 0:
+                return code
+
+    def _write_header(self):
+        self.file.write("$timescale 1ns $end\n$scope module logic $end\n")
+        for name, column in self.trace.items():
+            self.file.write(f"$var wire {self._wires[name].bitwidth} {self._code(column.index)} {name} $end\n")
+        self.file.write("$upscope $end\n$enddefinitions $end\n")
+        self.header = True
+
+    # write out every change before cycle end
+    def flush(self, end: int):
+        if not self.header:
+            self._write_header()
+        lines = []
+        time = None
+        pending = []
+        for cycle, index, value in sorted(self.changes):
+            if cycle >= end:
+                pending.append((cycle, index, value))
+                continue
+            if cycle != time:
+                time = cycle
+                lines.append(f"#{cycle * 10}")
+            lines.append(f"b{value:b} {self._code(index)}")
+        if lines:
+            self.file.write("\n".join(lines) + "\n")
+        self.changes = pending
+        self.written = end
+
+    def close(self):
+        cycles = max((column.cycles for column in self.trace.values()), default=0)
+        self.flush(cycles)
+        self.file.write(f"#{cycles * 10}\n")
+        self.file.close()
+
+# the tracer to hand a simulation for this mode, None for none
+# vcd_file has to be open for writing (VcdTrace closes it)
+def make_tracer(mode: str, block: pyrtl.Block, watch: List[str] = None, vcd_file: TextIO = None,
+                window: int = WINDOW, chunk: int = CHUNK):
+    assert mode in TRACE_MODES, f"unknown trace mode {mode}, expected one of {TRACE_MODES}"
+    if mode == "none":
+        return None
+    assert watch, f"{mode} tracing needs a watch list"
+    wires = watch_wires(block, watch)
+    if mode == "watch":
+        return WindowTrace(wires, window, block)
+    assert vcd_file is not None, "vcd tracing needs a file to write to"
+    return VcdTrace(vcd_file, wires, chunk, block=block)
@@ -0,0 +1,72 @@
+import pyrtl
+from pyrtl import WireVector, Register
+from helpers import wirevector_list
+
+
+# every assignment in the order it was made, and where each level starts on it
+# backtracking pops straight off the top instead of searching the VarAssignStore for something at the current level,
+# so undoing a level costs the assignments on it rather than a tree over every variable
+#
+# exposed wires:
+# Inputs:
+# - push_i, push_var_i: put a variable on top
+# - mark_i:             (with push_i) the variable pushed starts level_i, its decision
+# - level_i:            the level to mark, or to look up for level_start_o
+# - pop_i:              how many to take off the top (up to pop_width), never at the same time as a push
+# Outputs:
+# - ptr_o:              how many entries there are
+# - top_vars_o:         the top pop_width variables, the very top first (garbage past the bottom)
+# - level_start_o:      where level_i starts, the entries from there up are on level_i or above
+#
+# level 0 starts at 0 without being marked, cdcl never makes a decision there
+# levels above the top one hold on to where they used to start, so only look up levels that are still there
+
+class TrailStack:
+    POP_WIDTH = 2
+
+    def __init__(self, var_bits: int, pop_width: int = POP_WIDTH, name_prefix = "trail_"):
+        assert pop_width >= 1
+        self.pop_width = pop_width
+        ## inputs ##
+        self.push_i =        WireVector(bitwidth = 1, name = name_prefix+"push_i")
+        self.push_var_i =    WireVector(bitwidth = var_bits, name = name_prefix+"push_var_i")
+        self.mark_i =        WireVector(bitwidth = 1, name = name_prefix+"mark_i")
+        self.level_i =       WireVector(bitwidth = var_bits + 1, name = name_prefix+"level_i")
+        self.pop_i =         WireVector(bitwidth = pop_width.bit_length(), name = name_prefix+"pop_i")
+
+        ## outputs ##
+        self.ptr_o =         WireVector(bitwidth = var_bits, name = name_prefix+"ptr_o")
+        self.top_vars_o =    wirevector_list(var_bits, name_prefix+"top_vars_o", pop_width)
+        self.level_start_o = WireVector(bitwidth = var_bits, name = name_prefix+"level_start_o")
+
+        ## memories ##
+        # variable 0 never gets assigned, so there are never more than 2 ** var_bits - 1 entries
+        self.mem = pyrtl.MemBlock(
+            bitwidth = var_bits,
+            addrwidth = var_bits,
+            name = "Trail",
+            max_read_ports = pop_width,
+            max_write_ports = 1,
+            asynchronous = True
+        )
+        self.level_mem = pyrtl.MemBlock(
+            bitwidth = var_bits,
+            addrwidth = var_bits + 1,
+            name = "Level Starts",
+            max_read_ports = 1,
+            max_write_ports = 1,
+            asynchronous = True
+        )
+
+        ## internal registers ##
+        ptr = Register(bitwidth = var_bits, name = name_prefix+"ptr")
+
+        ## logic ##
+        self.mem[ptr] <<= pyrtl.MemBlock.EnabledWrite(self.push_var_i, self.push_i)
+        self.level_mem[self.level_i] <<= pyrtl.MemBlock.EnabledWrite(ptr, self.push_i & self.mark_i)
+        ptr.next <<= ptr + self.push_i - self.pop_i
+
+        for k in range(pop_width):
+            self.top_vars_o[k] <<= self.mem[(ptr - (k + 1))[:var_bits]]
+        self.level_start_o <<= pyrtl.select(self.level_i == 0, pyrtl.Const(0, bitwidth = var_bits), self.level_mem[self.level_i])
+        self.ptr_o <<= ptr
@@ -5,50 +5,121 @@ from helpers import wirevector_list, connect_wire_lists
 from clause_resolver import ClauseResolver
 from clause_storage import ClauseStorage
 from bcp import BCP
-from consts import CLAUSE_BITS, VAR_BITS, CLAUSE_SIZE
-
-def get_unassignable(a, b):
-    ans = WireVector(bitwidth=max(a.bitwidth, b.bitwidth))
-    with pyrtl.conditional_assignment:
-        with (a[0]==0) & (a[1]==1):
-            ans |= a
-        with (b[0]==0) & (b[1]==1):
-            ans |= b
-        with pyrtl.otherwise:
-            ans |= b
-    return ans
-
-def get_unassigned(a, b):
-    ans = WireVector(bitwidth=max(a.bitwidth, b.bitwidth))
-    with pyrtl.conditional_assignment:
-        with a[3+VAR_BITS:3+VAR_BITS*2] == 0:
-            ans |= b
-        with a[0:2]==0b00:
-            ans |= a
-        with b[0:2]==0b00:
-            ans |= b
-        with pyrtl.otherwise:
-            ans |= a
-    return ans
-
-def get_a_current_level(a, b, level):
-    ans = WireVector(bitwidth=max(a.bitwidth, b.bitwidth))
-    with pyrtl.conditional_assignment:
-        with (b[2:3+VAR_BITS]==level) & b[0]:
-            ans |= b
-        with (a[2:3+VAR_BITS]==level) & a[0]:
-            ans |=a
-        with pyrtl.otherwise:
-            ans |= a
-    return ans
-
-# although we pass these in as arguments, they don't quite work since the helper functions end up needing to use the constants file anyways
-class VarAssignStore:
-    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = "assign_"):
+
+# latest assigned variable out of words tagged {valid, pos, ...}, ties can't happen since positions are unique
+def get_latest(a, b):
+    return pyrtl.select(a[-1] & (~b[-1] | (a[:-1] > b[:-1])), a, b)
+
+# memory word, from the bottom:
+#  * assigned, val
+#  * level (var_bits + 1)
+#  * address (var_bits)
+#  * is_root
+# with reason_bits > 0 (cdcl) two more fields go on top, see conflict_analyzer.py:
+#  * pos (var_bits): where the variable sits on the trail, 1 for the first thing assigned and counting up.
+#    anything assigned later has a bigger pos, and backtracking only ever clears the latest ones
+#  * reason (reason_bits): clause address that implied the variable, meaningless for roots
+# and the store gets
+#  * latest_pos: biggest pos of anything assigned (0 if nothing is), decisions get latest_pos + 1
+# with any polarity but "zero" two more go on top of everything else:
+#  * flipped: a root that's on its second value (with "zero" that's just val, the second value is always 1)
+#  * phase: the value the variable had last time it was assigned, clearing it leaves this alone
+# use assignment / cleared / flip / flipped_root below to build and read words, they know which fields there are
+#
+# shared by every store: VarAssignStore here and BitmapVarAssignStore (bitmap_store.py)
+class VarWords:
+    def __init__(self, var_bits: int, reason_bits: int, polarity: str):
+        self.var_bits = var_bits
+        self.reason_bits = reason_bits
+        self.polarity = polarity
+        self._writes = [] # (addr, word, enable) for every write port
+        self.word_bits = (
+            4 + var_bits + var_bits + (var_bits + reason_bits if reason_bits else 0) + (2 if polarity != "zero" else 0)
+        )
+
+    def write(self, addr, word, enable):
+        self.mem[addr] <<= pyrtl.MemBlock.EnabledWrite(word, enable)
+        self._writes.append((addr, word, enable))
+
+    # drives decision_val, the value a decision gives decision_var, from polarity:
+    #  * zero, one: always that
+    #  * saved:     its phase
+    #  * random:    the bottom bit of a 16 bit LFSR that steps on every decision (enable_write)
+    def _connect_decision_val(self, name_prefix):
+        polarity = self.polarity
+        if polarity == "zero" or polarity == "one":
+            self.decision_val <<= int(polarity == "one")
+        elif polarity == "saved":
+            self.decision_val <<= self.mem[self.decision_var][-1]
+        elif polarity == "random":
+            # x^16 + x^14 + x^13 + x^11 + 1, maximal length
+            lfsr = Register(bitwidth = 16, name = name_prefix+"lfsr", reset_value = 0xACE1)
+            feedback = lfsr[0] ^ lfsr[2] ^ lfsr[3] ^ lfsr[5]
+            lfsr.next <<= pyrtl.select(self.enable_write, pyrtl.concat(feedback, lfsr[1:]), lfsr)
+            self.decision_val <<= lfsr[0]
+        else:
+            assert False, f"unknown polarity {polarity}"
+
+    # optional fields in a word, from the bottom
+    def _top_fields(self, pos, reason, flipped, phase):
+        fields = []
+        if self.reason_bits:
+            fields += [pyrtl.as_wires(pos, bitwidth = self.var_bits), pyrtl.as_wires(reason, bitwidth = self.reason_bits)]
+        if self.polarity != "zero":
+            fields += [pyrtl.as_wires(flipped, bitwidth = 1), pyrtl.as_wires(phase, bitwidth = 1)]
+        return fields
+
+    # word for var getting assigned val, pos and reason only get used with reason_bits
+    def assignment(self, var, val, level, is_root, pos = 0, reason = 0):
+        return pyrtl.concat_list([
+            pyrtl.Const(1, bitwidth = 1), pyrtl.as_wires(val, bitwidth = 1), pyrtl.as_wires(level, bitwidth = self.var_bits + 1),
+            var, pyrtl.as_wires(is_root, bitwidth = 1),
+        ] + self._top_fields(pos, reason, 0, val))
+
+    # word, with its variable unassigned (its phase stays)
+    def cleared(self, word):
+        var_bits = self.var_bits
+        return pyrtl.concat_list([
+            pyrtl.Const(0, bitwidth = 3 + var_bits), word[3+var_bits:3+2*var_bits], pyrtl.Const(0, bitwidth = 1),
+        ] + self._top_fields(0, 0, 0, word[-1]))
+
+    # has the root in word already had its second value
+    def flipped_root(self, word):
+        return word[-2] if self.polarity != "zero" else word[1]
+
+    # the root in word given its second value
+    def flip(self, word):
+        val = ~word[1]
+        if self.polarity == "zero":
+            return pyrtl.concat(word[2:], val, pyrtl.Const(1, bitwidth = 1))
+        return pyrtl.concat(val, pyrtl.Const(1, bitwidth = 1), word[2:-2], val, pyrtl.Const(1, bitwidth = 1))
+
+
+# decisions go to the lowest unassigned variable, unless external_decision is set. then it's up to whatever drives
+# decide_var_i (see decision_unit.py), which has to be unassigned whenever there's anything unassigned at all
+# either way decision_var is the variable that start assigns
+#
+# backtrack_ports is how many write ports (past BCP's and start's) whatever does the backtracking gets
+#
+# with flash_clear every variable also gets a live bit, and flash_i unassigns everything at flash_level_i or above
+# in one go (a comparator on every word's level). a word that isn't live reads as cleared, the memory itself is
+# left alone. so everything goes through read / write below instead of mem, and finish_writes has to be called
+# once the last write port is in
+class VarAssignStore(VarWords):
+    def __init__(self, clause_bits: int, var_bits:int, clause_size: int, name_prefix = "assign_", lanes: int = 1,
+                 reason_bits: int = 0, external_decision: bool = False, polarity: str = "zero", backtrack_ports: int = 1,
+                 flash_clear: bool = False):
+        super().__init__(var_bits, reason_bits, polarity)
+        self.flash_clear = flash_clear
 
         ## inputs ##
         self.start = WireVector(bitwidth = 1, name = name_prefix+"start")
         self.level = WireVector(bitwidth = var_bits+1, name = name_prefix+"level")
+        if external_decision:
+            self.decide_var_i = WireVector(bitwidth = var_bits, name = name_prefix+"decide_var_i")
+        if flash_clear:
+            self.flash_i = WireVector(bitwidth = 1, name = name_prefix+"flash_i")
+            self.flash_level_i = WireVector(bitwidth = var_bits+1, name = name_prefix+"flash_level_i")
 
         ## outputs ##
         #self.active = WireVector(bitwidth = 1, name = name_prefix+"active")
@@ -58,46 +129,78 @@ class VarAssignStore:
         self.ready_bcp = WireVector(bitwidth = 1, name = name_prefix+"ready_bcp")
         self.has_current_level = WireVector(bitwidth = 1, name = name_prefix+"has_current_level")
         self.current_level_addr = WireVector(bitwidth = var_bits, name = name_prefix+"current_level_addr")
+        self.decision_var = WireVector(bitwidth = var_bits, name = name_prefix+"decision_var")
+        self.decision_val = WireVector(bitwidth = 1, name = name_prefix+"decision_val")
 
         ## internal variable storage ##
         self.mem = pyrtl.MemBlock(
-            bitwidth = 4 + var_bits + var_bits, # 1 for assigned, 1 for val, VAR_BITS + 1 for level, var_bits for address
+            bitwidth = self.word_bits, # 1 for assigned, 1 for val, var_bits + 1 for level, var_bits for address (+ cdcl fields)
             addrwidth = var_bits,
             name = "Variable Memory",
-            max_read_ports = 2 ** var_bits + 1 + clause_size, # oops you didn't see that!
-            max_write_ports = 3,
+            max_read_ports = 2 ** var_bits + 2 + clause_size * lanes + backtrack_ports, # oops you didn't see that!
+            max_write_ports = 2 + backtrack_ports,
             asynchronous=True
         )
 
         ## internal wires ##
-        self.unassignable_check = WireVector(bitwidth = 4 + var_bits + var_bits, name = name_prefix+"unassignable_check")
-        self.unassigned_check = WireVector(bitwidth = 4 + var_bits + var_bits, name = name_prefix+"unassigned_check")
-        self.currlevel_check = WireVector(bitwidth = 4 + var_bits + var_bits, name = name_prefix+"currlevel_check")
-        self.new_assign = WireVector(bitwidth = 4 + var_bits + var_bits, name = name_prefix+"new_assign")
+        self.has_unassignable = WireVector(bitwidth = 1, name = name_prefix+"has_unassignable")
+        self.unassignable_level = WireVector(bitwidth = var_bits+1, name = name_prefix+"unassignable_level")
+        self.has_unassigned = WireVector(bitwidth = 1, name = name_prefix+"has_unassigned")
+        self.unassigned_var = WireVector(bitwidth = var_bits, name = name_prefix+"unassigned_var")
+        self.currlevel_check = WireVector(bitwidth = self.word_bits, name = name_prefix+"currlevel_check")
+        self.new_assign = WireVector(bitwidth = self.word_bits, name = name_prefix+"new_assign")
         self.enable_write = WireVector(bitwidth = 1, name=name_prefix+"enable_write")
 
-        self.every_memory_value = wirevector_list(4 + var_bits + var_bits, "every_memory_value", 2 ** var_bits)
+        if flash_clear:
+            # variable 0 never gets assigned
+            self.live = [pyrtl.Const(0, bitwidth = 1)] + [
+                Register(bitwidth = 1, name = f"{name_prefix}live_{i}") for i in range(1, 2 ** var_bits)
+            ]
+        self.every_memory_value = wirevector_list(self.word_bits, "every_memory_value", 2 ** var_bits)
         for i in range(2 ** var_bits):
-            self.every_memory_value[i] <<= self.mem[i]
+            self.every_memory_value[i] <<= self.read(i)
 
-        self.unassignable_check <<= helpers.create_bin_tree(self.every_memory_value, get_unassignable)
-        self.unassigned_check <<= helpers.create_bin_tree(self.every_memory_value, get_unassigned)
-        self.currlevel_check <<= helpers.create_bin_tree(self.every_memory_value, get_a_current_level, self.level)
+        # every check boils each word down to a bit, priority encodes those (helpers.py) and only reads back out
+        # of the word it found what it needs:
+        #  * unassignable: the lowest variable in the bad state (unassigned with val 1), for its level
+        #  * unassigned:   the lowest unassigned variable (words with address 0 don't count)
+        #  * currlevel:    a variable at the level that's either assigned or in the bad state. the highest one that
+        #                  isn't a root, or the highest root if there's nothing else, so that backtracking clears out
+        #                  a level's implications before touching its root. the whole word (word 0 if there's none)
+        levels = [word[2:3+var_bits] for word in self.every_memory_value]
+        has_unassignable, unassignable_index = helpers.priority_encode(
+            [~word[0] & word[1] for word in self.every_memory_value]
+        )
+        self.has_unassignable <<= has_unassignable
+        self.unassignable_level <<= pyrtl.mux(unassignable_index, *levels)
+        has_unassigned, unassigned_index = helpers.priority_encode(
+            [(word[0:2] == 0) & (word[3+var_bits:3+var_bits*2] != 0) for word in self.every_memory_value]
+        )
+        self.has_unassigned <<= has_unassigned
+        self.unassigned_var <<= unassigned_index
 
-        self.has_current_level <<= (self.currlevel_check[2:3+var_bits] == self.level)
+        at_level = [(word[2:3+var_bits] == self.level) & (word[0] | word[1]) for word in self.every_memory_value]
+        has_implied, implied_index = helpers.priority_encode(
+            [match & ~word[3+var_bits*2] for match, word in zip(at_level, self.every_memory_value)], highest = True
+        )
+        has_current_level, root_index = helpers.priority_encode(at_level, highest = True)
+        self.currlevel_check <<= pyrtl.mux(
+            pyrtl.select(has_implied, implied_index, root_index), *self.every_memory_value
+        )
+        self.has_current_level <<= has_current_level
         self.current_level_addr <<= self.currlevel_check[3+var_bits:3+var_bits * 2]
 
         with pyrtl.conditional_assignment:
             with self.start:
                 # first check if any variables are unassignable
                 # if so, we need to backtrack, or if we're at level 0, we're unsat
-                with (self.unassignable_check[0]==0)& (self.unassignable_check[1]==1):
-                    with self.unassignable_check[2:3+VAR_BITS]==0b00:
+                with self.has_unassignable:
+                    with self.unassignable_level==0b00:
                         self.ready_bcp |= 0
                         self.needs_backtrack |= 0
                         self.unsat |= 1
                         self.sat |= 0
-                    with self.unassignable_check[2:3+VAR_BITS]!=0b00:
+                    with self.unassignable_level!=0b00:
                         self.ready_bcp |= 0
                         self.needs_backtrack |= 1
                         self.unsat |= 0
@@ -105,7 +208,7 @@ class VarAssignStore:
 
                 # check if all variables are assigned
                 # if so, return sat
-                with self.unassigned_check[0:2]!=0b00:
+                with ~self.has_unassigned:
                     self.ready_bcp |= 0
                     self.needs_backtrack |= 0
                     self.unsat |= 0
@@ -127,10 +230,41 @@ class VarAssignStore:
                 self.unsat |= 0
                 self.sat |= 0
 
-        index_bits = self.unassigned_check[3+VAR_BITS:3+VAR_BITS*2]
-        assign_bit = pyrtl.Const(1, bitwidth=1)
-        val_bit = pyrtl.Const(0, bitwidth=1)
-        level_bits = self.level
-        is_root = pyrtl.Const(1, bitwidth=1)
-        self.new_assign <<= pyrtl.concat(is_root, index_bits, level_bits, val_bit, assign_bit)
-        self.mem[index_bits] <<= pyrtl.MemBlock.EnabledWrite(self.new_assign, self.enable_write)
+        self.decision_var <<= self.decide_var_i if external_decision else self.unassigned_var
+        self._connect_decision_val(name_prefix)
+
+        pos = 0
+        if reason_bits:
+            self.latest_pos = WireVector(bitwidth = var_bits, name = name_prefix+"latest_pos")
+            latest = helpers.create_bin_tree([
+                pyrtl.concat(word[0], word[4+2*var_bits:4+3*var_bits]) for word in self.every_memory_value
+            ], get_latest)
+            self.latest_pos <<= pyrtl.select(latest[-1], latest[:-1], pyrtl.Const(0, bitwidth = var_bits))
+            pos = (self.latest_pos + 1)[:var_bits]
+        self.new_assign <<= self.assignment(self.decision_var, self.decision_val, self.level, 1, pos)
+        self.write(self.decision_var, self.new_assign, self.enable_write)
+
+    # {val, assigned} for every variable, for anything that only cares whether it's assigned
+    @property
+    def every_assignment(self):
+        return [word[0:2] for word in self.every_memory_value]
+
+    # word for addr as everything else should see it
+    def read(self, addr):
+        word = self.mem[addr]
+        if not self.flash_clear:
+            return word
+        live = self.live[addr] if isinstance(addr, int) else pyrtl.mux(addr, *self.live)
+        return pyrtl.select(live, word, self.cleared(word))
+
+    # with flash_clear, hook the live bits up to every write port there is
+    # anything written this cycle is live next cycle, even if it's also being flash cleared
+    def finish_writes(self):
+        if not self.flash_clear:
+            return
+        var_bits = self.var_bits
+        for i in range(1, 2 ** var_bits):
+            written = helpers.create_bin_tree([enable & (addr == i) for addr, _, enable in self._writes], lambda a, b: a|b)
+            # (a word that isn't live already reads as cleared, so its level doesn't matter)
+            killed = self.flash_i & (self.every_memory_value[i][2:3+var_bits] >= self.flash_level_i)
+            self.live[i].next <<= written | (self.live[i] & ~killed)